@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Compare Keras and TFLite inference for the LSTM prediction model.
+
+Trains a small LSTM on a synthetic history (briefly: only inference is measured),
+exports float and dynamic-range quantized TFLite artifacts, and reports:
+
+  * parity: largest difference from Keras over held-out windows
+  * forecast latency per backend for a multi-day forecast
+  * peak memory of a fresh worker process that loads the model through each
+    backend and serves one forecast
+
+Memory only drops fully when ai-edge-litert or tflite-runtime is installed;
+otherwise the TFLite interpreter bundled with TensorFlow is used and the worker
+still loads TensorFlow.
+
+Usage:
+    python benchmarks/bench_inference_backends.py [--days 5] [--repeats 50] [--epochs 3]
+"""
+
+import argparse
+import json
+import os
+import pickle
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from services.model_registry import ModelRegistry
+
+SYMBOL = 'BENCH'
+BACKENDS = ('keras', 'tflite', 'tflite-quantized')
+
+
+def registry_for(model_dir: str, backend: str) -> ModelRegistry:
+    return ModelRegistry(model_dir, backend='keras' if backend == 'keras' else 'tflite')
+
+
+def child(model_dir: str, backend: str, days: int):
+    """Fresh-process body: load through one backend, forecast once, report peak RSS"""
+    from services.ai_predictor import StockPredictor
+
+    predictor = StockPredictor(model_path=model_dir, cache_path=os.path.join(model_dir, 'predictions.db'))
+    predictor.registry = registry_for(model_dir, backend)
+    entry = predictor.load_model(SYMBOL)
+    window = np.load(os.path.join(model_dir, 'window.npy'))
+    predictor.forecast(entry, window, days)
+    print(json.dumps({
+        'backend': entry['backend'],
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }))
+
+
+def train(model_dir: str, epochs: int):
+    from bench_model_tiers import synthetic_history
+    from sklearn.preprocessing import MinMaxScaler
+    from services.ai_predictor import StockPredictor
+
+    predictor = StockPredictor(model_path=model_dir, cache_path=os.path.join(model_dir, 'predictions.db'))
+    scaler = MinMaxScaler()
+    X, y = predictor.prepare_data(synthetic_history(750, seed=0), scaler)
+    model = predictor.build_model(X.shape[1:])
+    model.fit(predictor._dataset(X, y, 32, shuffle=True), epochs=epochs, verbose=0)
+
+    model_file, scaler_file = predictor.registry.model_files(SYMBOL)
+    model.save(model_file)
+    with open(scaler_file, 'wb') as f:
+        pickle.dump(scaler, f)
+    np.save(os.path.join(model_dir, 'window.npy'), np.ascontiguousarray(X[-1:]))
+    return predictor, np.ascontiguousarray(X[-64:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=50)
+    parser.add_argument('--epochs', type=int, default=3)
+    parser.add_argument('--child', nargs=2, metavar=('MODEL_DIR', 'BACKEND'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.days)
+        return
+
+    model_dir = tempfile.mkdtemp()
+    predictor, holdout = train(model_dir, args.epochs)
+
+    from services.tflite_backend import export_checked
+
+    keras_model = registry_for(model_dir, 'keras').get(SYMBOL)['model']
+    model_file, _ = predictor.registry.model_files(SYMBOL)
+    results = []
+    for backend in BACKENDS:
+        # Each backend gets its own artifact, exported the way training exports it
+        for path in os.listdir(model_dir):
+            if path.endswith('.tflite'):
+                os.remove(os.path.join(model_dir, path))
+        export_seconds = None
+        if backend != 'keras':
+            start = time.perf_counter()
+            export_checked(keras_model, model_file, quantize=backend == 'tflite-quantized', windows=holdout[-8:])
+            export_seconds = round(time.perf_counter() - start, 2)
+
+        registry = registry_for(model_dir, backend)
+        start = time.perf_counter()
+        entry = registry.get(SYMBOL)
+        load_seconds = time.perf_counter() - start
+        predictor.registry = registry
+
+        expected = keras_model(holdout, training=False).numpy()[:, 0]
+        if entry['backend'] == 'keras':
+            actual = predictor.forecast(entry, holdout, 1)[:, 0]
+        else:
+            actual = entry['model'].predict_next(holdout)
+
+        window = holdout[-1:]
+        predictor.forecast(entry, window, args.days)    # warm up
+        latencies = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            predictor.forecast(entry, window, args.days)
+            latencies.append(time.perf_counter() - start)
+
+        memory = json.loads(subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--days', str(args.days), '--child', model_dir, backend],
+            capture_output=True, text=True, check=True
+        ).stdout.strip().splitlines()[-1])
+
+        results.append({
+            'backend': backend,
+            'served_by': entry['backend'],
+            'export_seconds': export_seconds,
+            'first_load_seconds': round(load_seconds, 2),
+            'parity_max_error': float(np.abs(actual - expected).max()),
+            'forecast_ms_p50': round(float(np.percentile(latencies, 50)) * 1000, 3),
+            'forecast_ms_p95': round(float(np.percentile(latencies, 95)) * 1000, 3),
+            'artifact_bytes': os.path.getsize(entry['model'].path) if entry['backend'] == 'tflite' else None,
+            'worker_peak_rss_mb': memory['peak_rss_mb']
+        })
+
+    print(json.dumps({'forecast_days': args.days, 'backends': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+"""
+Load test the HTTP API with concurrent virtual users.
+
+Boots the API blueprints on a threaded HTTP server in a separate process, in a
+temporary working directory (fresh SQLite databases and model store), with market data
+from the offline provider (services/offline_market_data.py) at a simulated
+--provider-latency-ms. Models for --symbols are trained up front with --predict-tier so
+predictions never wait on training, and a recommendation snapshot is generated.
+
+Each virtual user registers, then loops for --duration seconds picking an endpoint
+from --mix by weight (optionally pausing --think-ms between requests). This repeats for
+each --users level. Reported per level and endpoint: requests, throughput, errors,
+status codes and p50/p95/p99/max latency, as JSON.
+
+Endpoints: portfolio (GET /api/trading/portfolio), search (GET /api/stocks/search),
+buy (POST /api/trading/buy, one share), predict (GET /api/ai/predict/<symbol>),
+recommendations (GET /api/ai/recommendations), price (GET /api/stocks/price/<symbol>).
+
+Usage:
+    python benchmarks/bench_load.py [--users 1 8 32] [--duration 15]
+        [--mix portfolio=4 search=2 buy=1 predict=1] [--provider-latency-ms 50] [--output load.json]
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SYMBOLS = ['AAPL', 'MSFT', 'GOOGL', 'AMZN', 'NVDA']
+SEARCH_QUERIES = ['A', 'AA', 'MS', 'GOO', 'N', 'TS', 'META', 'PY']
+
+
+def _portfolio(client, base, rng, args):
+    return client.get(f'{base}/api/trading/portfolio')
+
+
+def _search(client, base, rng, args):
+    return client.get(f'{base}/api/stocks/search', params={'q': rng.choice(SEARCH_QUERIES)})
+
+
+def _buy(client, base, rng, args):
+    return client.post(f'{base}/api/trading/buy', json={'symbol': rng.choice(args.symbols), 'shares': 1})
+
+
+def _predict(client, base, rng, args):
+    return client.get(f'{base}/api/ai/predict/{rng.choice(args.symbols)}',
+                      params={'days': 5, 'tier': args.predict_tier})
+
+
+def _recommendations(client, base, rng, args):
+    return client.get(f'{base}/api/ai/recommendations')
+
+
+def _price(client, base, rng, args):
+    return client.get(f'{base}/api/stocks/price/{rng.choice(args.symbols)}')
+
+
+ENDPOINTS = {
+    'portfolio': _portfolio,
+    'search': _search,
+    'buy': _buy,
+    'predict': _predict,
+    'recommendations': _recommendations,
+    'price': _price,
+}
+
+
+def parse_mix(items):
+    mix = {}
+    for item in items:
+        name, _, weight = item.partition('=')
+        if name not in ENDPOINTS:
+            raise ValueError(f"Unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def configure_environment(workdir: str, provider_latency_ms: float):
+    """Point the app at the offline provider and keep every store inside ``workdir``.
+
+    Must run before the route modules are imported: they create their stores and read
+    the environment at import time.
+    """
+    os.environ['MARKET_DATA_PROVIDER'] = 'services.offline_market_data'
+    os.environ['OFFLINE_MARKET_DATA_LATENCY_MS'] = str(provider_latency_ms)
+    for name in ('DAILY_RETRAIN', 'RECOMMENDATIONS_JOB', 'AI_PRELOAD'):
+        os.environ[name] = 'false'
+    os.chdir(workdir)
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def build_app():
+    """Flask app with the API blueprints, as create_app registers them (without the background threads)"""
+    from flask import Flask
+    from config.settings import Config
+    from src.routes.auth_routes import auth_bp
+    from src.routes.trading_routes import trading_bp
+    from src.routes.stock_routes import stock_bp
+    from src.routes.ai_routes import ai_bp
+    from src.routes.metrics_routes import metrics_bp
+
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    for blueprint in (auth_bp, trading_bp, stock_bp, ai_bp, metrics_bp):
+        app.register_blueprint(blueprint)
+    return app
+
+
+def prepare(args):
+    """Train the models predictions will use and generate a recommendation snapshot"""
+    from src.routes.ai_routes import get_predictor, recommendation_job
+
+    predictor = get_predictor()
+    for symbol in args.symbols:
+        if not predictor.train_model(symbol, tier=args.predict_tier):
+            raise RuntimeError(f'Training {args.predict_tier} failed for {symbol}')
+    recommendation_job.tier = args.predict_tier
+    recommendation_job.universe = list(args.symbols)
+    recommendation_job.generate('load-test')
+
+
+def serve(args):
+    """Server process body: prepare the app, report its port on stdout, serve until killed"""
+    from werkzeug.serving import WSGIRequestHandler, make_server
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_request(self, *args, **kwargs):
+            pass
+
+    configure_environment(args.serve, args.provider_latency_ms)
+    # Setup chatter (training, snapshot generation) stays off stdout, which carries the port
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    app = build_app()
+    prepare(args)
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    stdout.write(f'{server.server_port}\n')
+    stdout.flush()
+    server.serve_forever()
+
+
+def start_server(args, workdir):
+    """Run the API in its own process, so the load generator doesn't compete with it for the GIL"""
+    command = [
+        sys.executable, os.path.abspath(__file__), '--serve', workdir,
+        '--symbols', *args.symbols, '--predict-tier', args.predict_tier,
+        '--provider-latency-ms', str(args.provider_latency_ms)
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    port = process.stdout.readline().strip()
+    if not port:
+        process.wait()
+        raise RuntimeError('API server failed to start')
+    return process, f'http://127.0.0.1:{port}'
+
+
+def make_users(base, count):
+    import requests
+
+    users = []
+    for i in range(count):
+        client = requests.Session()
+        response = client.post(f'{base}/api/auth/register', json={'username': f'load_user_{i}'})
+        response.raise_for_status()
+        users.append(client)
+    return users
+
+
+def run_level(users, base, mix, args, duration):
+    """Drive every endpoint in ``mix`` with ``len(users)`` concurrent users for ``duration`` seconds"""
+    names, weights = list(mix), list(mix.values())
+    samples = defaultdict(list)    # endpoint -> [(seconds, status)]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def user_loop(index, client):
+        rng = random.Random(args.seed * 100003 + index)
+        local = defaultdict(list)
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                status = ENDPOINTS[name](client, base, rng, args).status_code
+            except Exception:
+                status = 'error'
+            local[name].append((time.perf_counter() - start, status))
+            if args.think_ms:
+                time.sleep(rng.expovariate(1000 / args.think_ms))
+        with lock:
+            for name, values in local.items():
+                samples[name].extend(values)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=user_loop, args=(i, client)) for i, client in enumerate(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return samples, elapsed
+
+
+def summarize(samples, elapsed):
+    endpoints = {}
+    for name, values in sorted(samples.items()):
+        latencies = np.array([seconds for seconds, _ in values]) * 1000
+        statuses = defaultdict(int)
+        for _, status in values:
+            statuses[str(status)] += 1
+        errors = sum(count for status, count in statuses.items() if status == 'error' or int(status) >= 400)
+        endpoints[name] = {
+            'requests': len(values),
+            'throughput_rps': round(len(values) / elapsed, 1),
+            'errors': errors,
+            'status_codes': dict(statuses),
+            'p50_ms': round(float(np.percentile(latencies, 50)), 2),
+            'p95_ms': round(float(np.percentile(latencies, 95)), 2),
+            'p99_ms': round(float(np.percentile(latencies, 99)), 2),
+            'max_ms': round(float(latencies.max()), 2)
+        }
+
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {
+        'seconds': round(elapsed, 2),
+        'requests': total,
+        'errors': sum(endpoint['errors'] for endpoint in endpoints.values()),
+        'throughput_rps': round(total / elapsed, 1),
+        'endpoints': endpoints
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, nargs='+', default=[1, 8, 32], help='concurrent users per level')
+    parser.add_argument('--duration', type=float, default=15, help='seconds per level')
+    parser.add_argument('--warmup', type=float, default=3, help='unmeasured seconds before the first level')
+    parser.add_argument('--mix', nargs='+', default=['portfolio=4', 'search=2', 'buy=1', 'predict=1'],
+                        help='endpoint=weight pairs')
+    parser.add_argument('--think-ms', type=float, default=0, help='mean pause between a user\'s requests')
+    parser.add_argument('--symbols', nargs='+', default=DEFAULT_SYMBOLS)
+    parser.add_argument('--predict-tier', default='ridge', help='model tier trained up front and predicted with')
+    parser.add_argument('--provider-latency-ms', type=float, default=50, help='simulated market data latency')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the report here instead of stdout')
+    parser.add_argument('--serve', metavar='WORKDIR', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    workdir = tempfile.mkdtemp()
+    server, base = start_server(args, workdir)
+    try:
+        users = make_users(base, max(args.users))
+        if args.warmup:
+            run_level(users[:max(1, min(len(users), 4))], base, mix, args, args.warmup)
+
+        levels = []
+        for count in args.users:
+            samples, elapsed = run_level(users[:count], base, mix, args, args.duration)
+            level = {'users': count, **summarize(samples, elapsed)}
+            print(f"{count} users: {level['throughput_rps']} req/s, {level['errors']} errors", file=sys.stderr)
+            levels.append(level)
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'workdir': workdir,
+        'provider_latency_ms': args.provider_latency_ms,
+        'predict_tier': args.predict_tier,
+        'think_ms': args.think_ms,
+        'duration_seconds': args.duration,
+        'mix': mix,
+        'levels': levels
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Benchmark prediction accuracy against latency for each model tier.
+
+Each symbol's history is split in time: every tier trains on the older part through
+StockPredictor.train_model, then predicts the held-out bars it never saw. Accuracy
+is next-day Close RMSE and direction hit rate; latency is the forecast time for one
+symbol and for a batch of all symbols. Models are written to a temp directory.
+
+By default prices are synthetic random walks so the benchmark runs offline; pass
+--symbols to use real history from yfinance instead.
+
+Usage:
+    python benchmarks/bench_model_tiers.py [--tiers lstm ridge] [--symbols AAPL MSFT] [--holdout 120]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_squared_error
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from services import feature_pipeline
+from services.ai_predictor import StockPredictor
+from services.model_tiers import TIERS
+
+
+def synthetic_history(bars: int, seed: int) -> pd.DataFrame:
+    """Geometric random walk with mild momentum, shaped like a yfinance history frame"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0003, 0.018, bars)
+    returns[1:] += 0.1 * returns[:-1]
+    close = 100 * np.exp(np.cumsum(returns))
+    return pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.003, bars)),
+        'High': close * 1.01,
+        'Low': close * 0.99,
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 5_000_000, bars).astype(float)
+    }, index=pd.bdate_range('2015-01-02', periods=bars))
+
+
+class HoldoutPredictor(StockPredictor):
+    """StockPredictor that trains on everything except each symbol's held-out bars"""
+
+    def __init__(self, histories, holdout, **kwargs):
+        super().__init__(**kwargs)
+        self.histories = histories
+        self.holdout = holdout
+
+    def get_stock_data(self, symbol, period='2y'):
+        return self.histories[symbol].iloc[:-self.holdout]
+
+
+def evaluate(predictor, entry, history, holdout):
+    """One-step forecasts for every held-out bar, in prices"""
+    scaled = feature_pipeline.scale_features(feature_pipeline.feature_frame(history), entry['scaler'])
+    X, _ = feature_pipeline.training_windows(scaled, predictor.sequence_length)
+    X_test = X[-holdout:]
+
+    closes = feature_pipeline.feature_frame(history)['Close'].to_numpy()
+    actual = closes[-holdout:]
+    previous = closes[-holdout - 1:-1]
+
+    scaler = entry['scaler']
+    predicted = predictor.forecast(entry, X_test, 1)[:, 0] * scaler.data_range_[0] + scaler.data_min_[0]
+
+    return {
+        'rmse': float(np.sqrt(mean_squared_error(actual, predicted))),
+        'direction_accuracy': float(np.mean(np.sign(predicted - previous) == np.sign(actual - previous)))
+    }, X_test
+
+
+def percentile_ms(samples, q):
+    return round(float(np.percentile(samples, q)) * 1000, 3)
+
+
+def run_tier(predictor, tier, histories, holdout, days, repeats):
+    entries, windows, train_seconds, scores = [], [], [], []
+    for symbol, history in histories.items():
+        start = time.perf_counter()
+        if not predictor.train_model(symbol, tier=tier):
+            raise RuntimeError(f'Training {tier} failed for {symbol}')
+        train_seconds.append(time.perf_counter() - start)
+
+        entry = predictor.load_model(symbol, tier)
+        score, X_test = evaluate(predictor, entry, history, holdout)
+        scores.append(score)
+        entries.append(entry)
+        windows.append(np.ascontiguousarray(X_test[-1:]))
+
+    # Warm up compiled paths before timing
+    predictor.forecast(entries[0], windows[0], days)
+    predictor.forecast_group(entries, np.concatenate(windows), days)
+
+    single = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictor.forecast(entries[0], windows[0], days)
+        single.append(time.perf_counter() - start)
+
+    batch = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictor.forecast_group(entries, np.concatenate(windows), days)
+        batch.append(time.perf_counter() - start)
+
+    return {
+        'tier': tier,
+        'train_seconds_per_symbol': round(float(np.mean(train_seconds)), 3),
+        'rmse': round(float(np.mean([score['rmse'] for score in scores])), 4),
+        'direction_accuracy': round(float(np.mean([score['direction_accuracy'] for score in scores])), 4),
+        'single_latency_ms_p50': percentile_ms(single, 50),
+        'single_latency_ms_p95': percentile_ms(single, 95),
+        'batch_latency_ms_p50': percentile_ms(batch, 50),
+        'batch_size': len(entries)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tiers', nargs='+', default=list(TIERS), choices=TIERS)
+    parser.add_argument('--symbols', nargs='+', help='real symbols to fetch (default: synthetic)')
+    parser.add_argument('--synthetic-symbols', type=int, default=3)
+    parser.add_argument('--bars', type=int, default=750, help='bars per synthetic symbol')
+    parser.add_argument('--holdout', type=int, default=120)
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args()
+
+    model_dir = tempfile.mkdtemp()
+    predictor_kwargs = {'model_path': model_dir, 'cache_path': os.path.join(model_dir, 'predictions.db')}
+
+    if args.symbols:
+        histories = {symbol: StockPredictor(**predictor_kwargs).get_stock_data(symbol, period='5y')
+                     for symbol in args.symbols}
+    else:
+        histories = {f'SYN{i}': synthetic_history(args.bars, seed=i) for i in range(args.synthetic_symbols)}
+
+    predictor = HoldoutPredictor(histories, args.holdout, **predictor_kwargs)
+    report = {
+        'symbols': list(histories),
+        'holdout_bars': args.holdout,
+        'forecast_days': args.days,
+        'tiers': [run_tier(predictor, tier, histories, args.holdout, args.days, args.repeats) for tier in args.tiers]
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Walk-forward accuracy and latency harness for StockPredictor, with regression checks.
+
+Each symbol's history is split into --folds consecutive test spans. For every fold,
+each model trains through StockPredictor.train_model on all bars before the span,
+then forecasts --days ahead from every bar in it. Reported per model backend:
+
+  * accuracy: MSE and MAPE of the forecast prices, and hit rate of the BUY/SELL/HOLD
+    call implied by the forecast against the realized move over the same horizon
+  * train time per fold
+  * cold latency (fresh registry: model load plus first forecast) and warm latency
+  * peak RSS of a fresh process that loads the model and forecasts once
+
+Runs offline on synthetic histories by default, or on recorded histories: save them
+once with --record DIR --symbols AAPL MSFT, then pass --history-dir DIR.
+
+The report is JSON (stdout, or --output). With --baseline OLD.json, metrics that
+regressed beyond the thresholds are listed under "regressions" and the exit status is 1.
+
+Usage:
+    python benchmarks/bench_predictor.py [--backends lstm-keras lstm-tflite ridge] [--folds 2]
+        [--history-dir DIR] [--output report.json] [--baseline previous.json]
+"""
+
+import argparse
+import contextlib
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import mean_absolute_percentage_error, mean_squared_error
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(BACKEND_DIR, 'src'))
+
+from services import feature_pipeline
+from services.model_registry import ModelRegistry
+
+# backend name -> (model tier, registry backend)
+BACKENDS = {
+    'lstm-keras': ('lstm', 'keras'),
+    'lstm-tflite': ('lstm', 'tflite'),
+    'ridge': ('ridge', 'keras'),
+}
+CLASSES = ('BUY', 'SELL', 'HOLD')
+
+
+def load_histories(args):
+    if args.history_dir:
+        return {
+            os.path.splitext(os.path.basename(path))[0]: pd.read_csv(path, index_col=0, parse_dates=True)
+            for path in sorted(glob.glob(os.path.join(args.history_dir, '*.csv')))
+        }
+    from bench_model_tiers import synthetic_history
+
+    return {f'SYN{i}': synthetic_history(args.bars, seed=i) for i in range(args.synthetic_symbols)}
+
+
+def record(symbols, directory, period):
+    """Save yfinance histories as CSV so later runs are offline and repeatable"""
+    from services.stock_service import StockService
+
+    os.makedirs(directory, exist_ok=True)
+    service = StockService()
+    for symbol in symbols:
+        data = service.get_history(symbol, period)
+        if data is None:
+            print(f'No history for {symbol}', file=sys.stderr)
+            continue
+        data[['Open', 'High', 'Low', 'Close', 'Volume']].to_csv(os.path.join(directory, f'{symbol}.csv'))
+
+
+def make_predictor(model_dir, histories):
+    from services.ai_predictor import StockPredictor
+
+    class WalkForwardPredictor(StockPredictor):
+        """StockPredictor that only sees each symbol's bars before the current cutoff"""
+
+        cutoff = None
+
+        def get_stock_data(self, symbol, period='2y'):
+            return histories[symbol].iloc[:self.cutoff]
+
+    return WalkForwardPredictor(model_path=model_dir, cache_path=os.path.join(model_dir, 'predictions.db'))
+
+
+def fold_windows(history, scaler, cutoff, span, days, sequence_length):
+    """Scaled input windows ending the bar before each forecast origin in the span.
+
+    Returns (windows, current closes, actual closes of shape (n, days)).
+    """
+    frame = feature_pipeline.feature_frame(history.iloc[:cutoff + span])
+    scaled = feature_pipeline.scale_features(frame, scaler)
+    all_windows = feature_pipeline.windows(scaled, sequence_length)
+
+    closes = history['Close'].to_numpy()
+    origins = range(cutoff, cutoff + span - days + 1)
+    # Window j ends on frame row j + sequence_length - 1
+    rows = [frame.index.get_loc(history.index[origin - 1]) - sequence_length + 1 for origin in origins]
+
+    windows = np.ascontiguousarray(all_windows[rows])
+    current = closes[[origin - 1 for origin in origins]]
+    actual = np.stack([closes[origin:origin + days] for origin in origins])
+    return windows, current, actual
+
+
+def classify(predictor, current, final):
+    return [predictor.get_recommendation((f - c) / c * 100) for c, f in zip(current, final)]
+
+
+def accuracy(predictor, predicted, current, actual):
+    predicted_calls = classify(predictor, current, predicted[:, -1])
+    actual_calls = classify(predictor, current, actual[:, -1])
+    hits = np.array(predicted_calls) == np.array(actual_calls)
+
+    by_class = {}
+    for call in CLASSES:
+        made = np.array(predicted_calls) == call
+        by_class[call] = {
+            'predicted': int(made.sum()),
+            'actual': int((np.array(actual_calls) == call).sum()),
+            'hits': int(hits[made].sum())
+        }
+
+    return {
+        'mse': float(mean_squared_error(actual.ravel(), predicted.ravel())),
+        'mape': float(mean_absolute_percentage_error(actual.ravel(), predicted.ravel())),
+        'mape_by_day': [round(float(mean_absolute_percentage_error(actual[:, day], predicted[:, day])), 5)
+                        for day in range(actual.shape[1])],
+        'hit_rate': float(hits.mean()),
+        'by_class': by_class,
+        'forecasts': int(len(current))
+    }
+
+
+def merge_accuracy(scores):
+    """Combine per-fold scores, weighting by forecast count"""
+    weights = np.array([score['forecasts'] for score in scores], dtype=float)
+
+    def weighted(key):
+        return round(float(np.average([score[key] for score in scores], weights=weights)), 6)
+
+    by_class = {}
+    for call in CLASSES:
+        predicted = sum(score['by_class'][call]['predicted'] for score in scores)
+        hits = sum(score['by_class'][call]['hits'] for score in scores)
+        by_class[call] = {
+            'predicted': predicted,
+            'actual': sum(score['by_class'][call]['actual'] for score in scores),
+            'precision': round(hits / predicted, 4) if predicted else None
+        }
+
+    return {
+        'mse': weighted('mse'),
+        'mape': weighted('mape'),
+        'mape_by_day': [round(float(v), 5) for v in np.average([s['mape_by_day'] for s in scores], axis=0, weights=weights)],
+        'hit_rate': weighted('hit_rate'),
+        'by_class': by_class,
+        'forecasts': int(weights.sum())
+    }
+
+
+def to_prices(forecast, scaler):
+    return forecast * scaler.data_range_[0] + scaler.data_min_[0]
+
+
+def latency(predictor, model_dir, backend, symbol, window, days, repeats):
+    """Cold (fresh registry: load plus first forecast) and warm single-symbol forecast times"""
+    tier, registry_backend = BACKENDS[backend]
+    predictor.registry = ModelRegistry(model_dir, backend=registry_backend)
+
+    start = time.perf_counter()
+    entry = predictor.registry.get(symbol, tier)
+    predictor.forecast(entry, window, days)
+    cold = time.perf_counter() - start
+
+    warm = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predictor.forecast(entry, window, days)
+        warm.append(time.perf_counter() - start)
+
+    return {
+        'served_by': entry['backend'],
+        'cold_ms': round(cold * 1000, 1),
+        'warm_ms_p50': round(float(np.percentile(warm, 50)) * 1000, 3),
+        'warm_ms_p95': round(float(np.percentile(warm, 95)) * 1000, 3)
+    }
+
+
+def child(model_dir, backend, symbol, days):
+    """Fresh-process body: load one model through a backend, forecast once, report peak RSS.
+
+    Only the Keras backend goes through StockPredictor (which imports TensorFlow), so the
+    other backends are measured with just the runtime they need to serve.
+    """
+    tier, registry_backend = BACKENDS[backend]
+    registry = ModelRegistry(model_dir, backend=registry_backend)
+    entry = registry.get(symbol, tier)
+    window = np.load(os.path.join(model_dir, 'window.npy'))
+    if entry['backend'] == 'keras':
+        make_predictor(model_dir, {}).forecast(entry, window, days)
+    else:
+        entry['model'].forecast(window, days)
+    # VmHWM starts afresh at exec, unlike ru_maxrss, which keeps the forking parent's peak
+    with open('/proc/self/status') as f:
+        peak_kb = next(int(line.split()[1]) for line in f if line.startswith('VmHWM:'))
+    print(json.dumps({'peak_rss_mb': round(peak_kb / 1024, 1)}))
+
+
+def peak_memory(model_dir, backend, symbol, days):
+    result = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--days', str(days), '--child', model_dir, backend, symbol],
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])['peak_rss_mb']
+
+
+def run(args, histories):
+    import tensorflow as tf
+
+    tf.keras.utils.set_random_seed(args.seed)
+    model_dir = tempfile.mkdtemp()
+    predictor = make_predictor(model_dir, histories)
+    keras_registry = predictor.registry
+    tiers = sorted({BACKENDS[backend][0] for backend in args.backends})
+    # Training exports the TFLite artifact only when it runs with the TFLite backend, as in production
+    serves_tflite = any(BACKENDS[backend][1] == 'tflite' for backend in args.backends)
+    training_registry = ModelRegistry(model_dir, backend='tflite') if serves_tflite else keras_registry
+
+    scores = {backend: [] for backend in args.backends}
+    train_seconds = {tier: [] for tier in tiers}
+    for fold in range(args.folds):
+        for symbol, history in histories.items():
+            cutoff = len(history) - (args.folds - fold) * args.span
+            predictor.cutoff = cutoff
+            predictor.registry = training_registry
+            for tier in tiers:
+                start = time.perf_counter()
+                if not predictor.train_model(symbol, tier=tier):
+                    raise RuntimeError(f'Training {tier} failed for {symbol}')
+                train_seconds[tier].append(time.perf_counter() - start)
+
+            for backend in args.backends:
+                tier, registry_backend = BACKENDS[backend]
+                registry = keras_registry if registry_backend == 'keras' else ModelRegistry(model_dir, backend=registry_backend)
+                entry = registry.get(symbol, tier)
+                windows, current, actual = fold_windows(
+                    history, entry['scaler'], cutoff, args.span, args.days, predictor.sequence_length
+                )
+                predicted = to_prices(predictor.forecast(entry, windows, args.days), entry['scaler'])
+                scores[backend].append(accuracy(predictor, predicted, current, actual))
+
+    # Latency and memory use the last symbol's final model and its newest window
+    np.save(os.path.join(model_dir, 'window.npy'), np.ascontiguousarray(windows[-1:]))
+    window = np.load(os.path.join(model_dir, 'window.npy'))
+
+    results = {}
+    for backend in args.backends:
+        tier = BACKENDS[backend][0]
+        result = {'tier': tier, 'train_seconds_per_fold': round(float(np.mean(train_seconds[tier])), 3)}
+        result.update(merge_accuracy(scores[backend]))
+        result.update(latency(predictor, model_dir, backend, symbol, window, args.days, args.repeats))
+        result['peak_rss_mb'] = peak_memory(model_dir, backend, symbol, args.days)
+        results[backend] = result
+    return results
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def regressions(report, baseline, args):
+    """Metrics that got worse than the baseline by more than the allowed margins"""
+    found = []
+    for backend, result in report['results'].items():
+        old = baseline.get('results', {}).get(backend)
+        if not old:
+            continue
+        def slower(metric):
+            # Sub-millisecond timings are mostly noise, so a slowdown must also exceed --min-latency-ms
+            return (result[metric] > old[metric] * (1 + args.max_latency_increase)
+                    and result[metric] - old[metric] > args.min_latency_ms)
+
+        checks = [
+            ('mse', result['mse'] > old['mse'] * (1 + args.max_error_increase)),
+            ('mape', result['mape'] > old['mape'] * (1 + args.max_error_increase)),
+            ('hit_rate', result['hit_rate'] < old['hit_rate'] - args.max_hit_rate_drop),
+            ('warm_ms_p50', slower('warm_ms_p50')),
+            ('cold_ms', slower('cold_ms')),
+            ('peak_rss_mb', result['peak_rss_mb'] > old['peak_rss_mb'] * (1 + args.max_latency_increase)),
+        ]
+        found += [{'backend': backend, 'metric': metric, 'baseline': old[metric], 'current': result[metric]}
+                  for metric, regressed in checks if regressed]
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS), choices=list(BACKENDS))
+    parser.add_argument('--history-dir', help='directory of recorded SYMBOL.csv histories (default: synthetic)')
+    parser.add_argument('--record', metavar='DIR', help='save yfinance histories for --symbols to DIR and exit')
+    parser.add_argument('--symbols', nargs='+', help='symbols to record')
+    parser.add_argument('--period', default='5y', help='history period to record')
+    parser.add_argument('--synthetic-symbols', type=int, default=2)
+    parser.add_argument('--bars', type=int, default=750, help='bars per synthetic symbol')
+    parser.add_argument('--folds', type=int, default=2)
+    parser.add_argument('--span', type=int, default=60, help='test bars per fold')
+    parser.add_argument('--days', type=int, default=5)
+    parser.add_argument('--repeats', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the report here instead of stdout')
+    parser.add_argument('--baseline', help='previous report to check for regressions')
+    parser.add_argument('--max-error-increase', type=float, default=0.10, help='relative MSE/MAPE increase allowed')
+    parser.add_argument('--max-hit-rate-drop', type=float, default=0.05, help='absolute hit rate drop allowed')
+    parser.add_argument('--max-latency-increase', type=float, default=0.25, help='relative latency/memory increase allowed')
+    parser.add_argument('--min-latency-ms', type=float, default=1.0, help='absolute latency increase ignored')
+    parser.add_argument('--child', nargs=3, metavar=('MODEL_DIR', 'BACKEND', 'SYMBOL'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(*args.child, args.days)
+        return
+    if args.record:
+        if not args.symbols:
+            parser.error('--record needs --symbols')
+        record(args.symbols, args.record, args.period)
+        return
+
+    histories = load_histories(args)
+    if not histories:
+        parser.error('no histories found')
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'data': args.history_dir or 'synthetic',
+        'symbols': list(histories),
+        'folds': args.folds,
+        'span': args.span,
+        'forecast_days': args.days
+    }
+    # Training progress goes to stderr so the report alone is on stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        report['results'] = run(args, histories)
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = regressions(report, json.load(f), args)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+    if report.get('regressions'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
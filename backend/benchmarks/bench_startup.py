@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Measure API worker cold start and what it imports.
+
+Each scenario runs in a fresh interpreter (with a temporary working directory, so the
+SQLite stores the route modules create don't touch real data) under ``-X importtime``:
+
+  * api:       the modules app.py imports at startup (blueprints, Flask extensions)
+  * ai-first:  api, then the first AI request's cost of building the predictor
+
+Reports wall time and peak RSS (median over --repeats runs), import time per root
+package (summed self time, so nothing is counted twice), and whether the heavy,
+lazily loaded dependencies were imported.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeats 3] [--top 15]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from collections import defaultdict
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_MODULES = [
+    'config.settings',
+    'flask_socketio',
+    'flask_cors',
+    'src.routes.auth_routes',
+    'src.routes.trading_routes',
+    'src.routes.stock_routes',
+    'src.routes.ai_routes',
+]
+LAZY_DEPENDENCIES = ['tensorflow', 'keras', 'sklearn', 'yfinance']
+
+CHILD = '''
+import importlib, json, resource, sys, time
+sys.path.insert(0, {backend!r})
+start = time.perf_counter()
+for name in {modules!r}:
+    importlib.import_module(name)
+if {first_ai!r}:
+    sys.modules['src.routes.ai_routes'].get_predictor()
+seconds = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': seconds,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'loaded': {{name: name in sys.modules for name in {lazy!r}}}
+}}))
+'''
+
+
+def import_costs(stderr: str):
+    """Sum ``-X importtime`` self times (microseconds) per root package"""
+    costs = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        costs[name.strip().split('.')[0]] += int(self_us)
+    return costs
+
+
+def run(first_ai: bool, workdir: str):
+    code = CHILD.format(backend=BACKEND_DIR, modules=STARTUP_MODULES, first_ai=first_ai, lazy=LAZY_DEPENDENCIES)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=workdir, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), import_costs(result.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--top', type=int, default=15, help='packages to list per scenario')
+    args = parser.parse_args()
+
+    report = {}
+    for scenario, first_ai in (('api', False), ('ai-first', True)):
+        runs = []
+        with tempfile.TemporaryDirectory() as workdir:
+            for _ in range(args.repeats):
+                runs.append(run(first_ai, workdir))
+
+        costs = runs[-1][1]
+        report[scenario] = {
+            'seconds_median': round(statistics.median(r['seconds'] for r, _ in runs), 3),
+            'peak_rss_mb_median': round(statistics.median(r['peak_rss_mb'] for r, _ in runs), 1),
+            'loaded': runs[-1][0]['loaded'],
+            'import_ms_by_package': {
+                name: round(us / 1000, 1)
+                for name, us in sorted(costs.items(), key=lambda item: item[1], reverse=True)[:args.top]
+            }
+        }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
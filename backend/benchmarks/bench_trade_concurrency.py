@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark concurrent trade execution across users.
+
+Runs buy orders for many users through TradingService on thread pools of increasing
+size, against a temp SQLite database and a stand-in price source with simulated
+provider latency. Throughput should scale with worker threads because the provider
+call happens outside the per-user critical section. A second phase pushes a burst
+of orders for one user through OrderPipeline and checks they executed in submission
+order.
+
+Usage:
+    python benchmarks/bench_trade_concurrency.py [--users 200] [--trades 400] [--latency-ms 50]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from models.database import Database
+from services.trading_service import TradingService
+from services.order_pipeline import OrderPipeline
+
+
+class LatencyPriceSource:
+    """Stand-in for StockService that sleeps like a network provider"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def validate_symbol(self, symbol):
+        return True
+
+    def get_stock_price(self, symbol):
+        time.sleep(self.latency)
+        return 100.0
+
+    def get_multiple_prices(self, symbols):
+        time.sleep(self.latency)
+        return {symbol: 100.0 for symbol in symbols}
+
+
+def run_throughput(users: int, trades: int, latency: float, workers: int) -> dict:
+    db_dir = tempfile.mkdtemp()
+    service = TradingService(Database(os.path.join(db_dir, 'bench.db')), LatencyPriceSource(latency))
+    usernames = [f'user{i}' for i in range(users)]
+    for username in usernames:
+        service.create_user(username)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            lambda i: service.buy_stock(usernames[i % users], 'AAPL', 1),
+            range(trades)
+        ))
+    elapsed = time.perf_counter() - start
+
+    filled = sum(1 for result in results if result['success'])
+    return {
+        'workers': workers,
+        'trades': trades,
+        'filled': filled,
+        'seconds': round(elapsed, 3),
+        'trades_per_second': round(trades / elapsed, 1)
+    }
+
+
+def run_ordering(orders: int, latency: float, workers: int) -> dict:
+    db_dir = tempfile.mkdtemp()
+    service = TradingService(Database(os.path.join(db_dir, 'bench.db')), LatencyPriceSource(latency))
+    service.create_user('ordered')
+    pipeline = OrderPipeline(service, max_workers=workers)
+
+    # Alternate buys and sells with distinct sizes so the ledger order is recognisable
+    expected = []
+    for i in range(orders):
+        side = 'BUY' if i % 2 == 0 else 'SELL'
+        shares = (i // 2) + 1
+        expected.append((side, shares))
+        pipeline.submit('ordered', f'order-{i}', side, 'AAPL', shares)
+
+    pipeline.executor.shutdown(wait=True)
+    user_id = service.db.get_user('ordered')[0]
+    ledger = [(t[1], t[2]) for t in reversed(service.db.get_transactions(user_id, limit=orders))]
+
+    return {
+        'orders': orders,
+        'executed': len(ledger),
+        'in_submission_order': ledger == expected
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--trades', type=int, default=400)
+    parser.add_argument('--latency-ms', type=float, default=50)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    latency = args.latency_ms / 1000
+    report = {
+        'latency_ms': args.latency_ms,
+        'throughput': [run_throughput(args.users, args.trades, latency, w) for w in args.workers],
+        'same_user_ordering': run_ordering(50, latency, max(args.workers))
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Soak test the Socket.IO price fan-out with thousands of simulated clients.
+
+Starts the full app (create_app: Socket.IO handlers and the price_updater thread) in a
+separate process, in a temporary working directory, with market data from the offline
+provider and a tick every --tick-interval seconds. Clients connect over raw websockets
+(Engine.IO v4 / Socket.IO v5, driven from one asyncio loop) and each subscribes to
+--symbols-per-client random symbols from --symbols with subscribe_stock.
+
+Connections are stepped up through --levels. After each step the clients are held for
+--hold seconds while, every --churn-interval seconds, a --churn fraction of them drop
+their connection abruptly and reconnect. Reported per level:
+
+  * connections: connected/failed and connect time (until every subscription is acked)
+  * updates: received per second, the measured time between a symbol's ticks (the
+    updater falls behind --tick-interval once a pass over the symbols takes longer),
+    tick-to-client latency p50/p95/p99/max, missed
+    (gaps in each symbol's sequence numbers), duplicated, unexpected (symbols the
+    client never subscribed to) and stalled clients (nothing for 3 tick intervals)
+  * reconnects: succeeded/failed, reconnect time and time to the first update after it
+  * server CPU, RSS and thread count, sampled every second; the report's timeline has
+    every sample
+
+"capacity" is the largest level whose p99 latency is within --slo-ms and whose ticks
+kept within 25% of --tick-interval, with no failed connections, missed updates or
+stalled clients. Client CPU is reported as well: if it
+nears 100%, the load generator, not the server, is the bottleneck.
+
+Requires the websockets package (pip install websockets).
+
+Usage:
+    python benchmarks/bench_websocket_soak.py [--levels 250 500 1000 2000] [--hold 20]
+        [--tick-interval 1] [--symbols-per-client 3] [--output soak.json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_SYMBOLS = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'META', 'NVDA', 'NFLX', 'V', 'JPM']
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+# How far the measured time between a symbol's ticks may stretch past --tick-interval
+TICK_INTERVAL_TOLERANCE = 1.25
+
+
+def raise_file_limit():
+    """Every connection is a file descriptor on both ends"""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def serve(args):
+    """Server process body: run the app on --port until killed"""
+    raise_file_limit()
+    os.environ['MARKET_DATA_PROVIDER'] = 'services.offline_market_data'
+    os.environ['PRICE_UPDATE_INTERVAL'] = str(args.tick_interval)
+    for name in ('DAILY_RETRAIN', 'RECOMMENDATIONS_JOB', 'AI_PRELOAD'):
+        os.environ[name] = 'false'
+    os.chdir(args.serve)
+    sys.path[:0] = [BACKEND_DIR, os.path.join(BACKEND_DIR, 'src')]
+
+    from src.app import create_app
+
+    app, socketio = create_app()
+    socketio.run(app, host='127.0.0.1', port=args.port, debug=False, use_reloader=False,
+                 log_output=False, allow_unsafe_werkzeug=True)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args):
+    port = free_port()
+    command = [
+        sys.executable, os.path.abspath(__file__), '--serve', tempfile.mkdtemp(),
+        '--port', str(port), '--tick-interval', str(args.tick_interval)
+    ]
+    # The app prints a line per connection and subscription; keep that out of the report
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL)
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('Server exited during startup')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('Server did not start listening')
+
+
+class ProcessSampler:
+    """CPU, RSS and thread count of a process, from /proc"""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.last = (time.monotonic(), self._cpu_seconds())
+
+    def _cpu_seconds(self):
+        with open(f'/proc/{self.pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS    # utime + stime
+
+    def sample(self):
+        now, cpu = time.monotonic(), self._cpu_seconds()
+        last_time, last_cpu = self.last
+        self.last = (now, cpu)
+        status = {}
+        with open(f'/proc/{self.pid}/status') as f:
+            for line in f:
+                key, _, value = line.partition(':')
+                status[key] = value.split()
+        return {
+            'cpu_percent': round(100 * (cpu - last_cpu) / max(now - last_time, 1e-9), 1),
+            'rss_mb': round(int(status['VmRSS'][0]) / 1024, 1),
+            'threads': int(status['Threads'][0])
+        }
+
+
+class Stats:
+    """Counters for the current measurement window"""
+
+    def __init__(self):
+        self.latencies = []
+        self.received = 0
+        self.missed = 0
+        self.duplicates = 0
+        self.unexpected = 0
+        self.connect_ms = []
+        self.connect_failures = 0
+        self.reconnect_ms = []
+        self.reconnect_failures = 0
+        self.first_update_ms = []
+        self.ticks = {}    # symbol -> [first seq, first arrival, last seq, last arrival]
+
+
+class SoakClient:
+    """One Socket.IO connection subscribed to a few symbols"""
+
+    def __init__(self, url, symbols, runner):
+        self.url = url
+        self.symbols = set(symbols)
+        self.runner = runner
+        self.ws = None
+        self.task = None
+        self.last_seq = {}
+        self.last_update = None
+        self.reconnected_at = None
+        self.connected = False
+
+    async def connect(self):
+        import websockets
+
+        start = time.perf_counter()
+        try:
+            self.ws = await websockets.connect(self.url, ping_interval=None, compression=None, open_timeout=30)
+            opened = await asyncio.wait_for(self.ws.recv(), 30)
+            if not opened.startswith('0'):
+                raise RuntimeError(f'Unexpected Engine.IO open packet: {opened[:40]}')
+            await self.ws.send('40')
+            pending = set(self.symbols)
+            for symbol in self.symbols:
+                await self.ws.send('42' + json.dumps(['subscribe_stock', {'symbol': symbol}]))
+            # Wait for the namespace connect and every subscription ack; updates may already arrive
+            while pending:
+                message = await asyncio.wait_for(self.ws.recv(), 30)
+                event = self._handle(message)
+                if event and event[0] == 'subscribed':
+                    pending.discard(event[1]['symbol'])
+        except Exception:
+            if self.ws is not None:
+                self.ws.transport.abort()
+            return None
+
+        self.connected = True
+        self.last_update = time.monotonic()
+        self.task = asyncio.ensure_future(self._read())
+        return (time.perf_counter() - start) * 1000
+
+    def _handle(self, message):
+        if message == '2':
+            # Engine.IO ping from the server
+            asyncio.ensure_future(self.ws.send('3'))
+            return None
+        if not message.startswith('42'):
+            return None
+        event = json.loads(message[2:])
+        if event[0] == 'price_update':
+            self._on_update(event[1])
+        return event
+
+    def _on_update(self, update):
+        stats = self.runner.stats
+        now = time.monotonic()
+        stats.received += 1
+        stats.latencies.append(time.time() - update['timestamp'])
+        if self.reconnected_at is not None:
+            stats.first_update_ms.append((now - self.reconnected_at) * 1000)
+            self.reconnected_at = None
+        self.last_update = now
+
+        symbol, seq = update['symbol'], update['seq']
+        ticks = stats.ticks.setdefault(symbol, [seq, now, seq, now])
+        if seq > ticks[2]:
+            ticks[2:] = [seq, now]
+        if symbol not in self.symbols:
+            stats.unexpected += 1
+            return
+        last = self.last_seq.get(symbol)
+        if last is not None:
+            if seq <= last:
+                stats.duplicates += 1
+                return
+            stats.missed += seq - last - 1
+        self.last_seq[symbol] = seq
+
+    async def _read(self):
+        try:
+            async for message in self.ws:
+                self._handle(message)
+        except Exception:
+            pass
+        self.connected = False
+
+    def drop(self):
+        """Close the connection abruptly, as a network failure would"""
+        self.connected = False
+        if self.task:
+            self.task.cancel()
+        self.ws.transport.abort()
+
+    async def reconnect(self):
+        self.drop()
+        self.last_seq = {}    # updates sent while disconnected are not missed deliveries
+        elapsed = await self.connect()
+        if elapsed is None:
+            self.runner.stats.reconnect_failures += 1
+        else:
+            self.runner.stats.reconnect_ms.append(elapsed)
+            self.reconnected_at = time.monotonic() - elapsed / 1000
+
+
+def percentiles(values, digits=1):
+    values = np.asarray(values)
+    if not len(values):
+        return None
+    return {
+        'p50': round(float(np.percentile(values, 50)), digits),
+        'p95': round(float(np.percentile(values, 95)), digits),
+        'p99': round(float(np.percentile(values, 99)), digits),
+        'max': round(float(values.max()), digits)
+    }
+
+
+class SoakRunner:
+    def __init__(self, args, port, server_pid):
+        self.args = args
+        self.url = f'ws://127.0.0.1:{port}/socket.io/?EIO=4&transport=websocket'
+        self.rng = random.Random(args.seed)
+        self.clients = []
+        self.stats = Stats()
+        self.server = ProcessSampler(server_pid)
+        self.client_process = ProcessSampler(os.getpid())
+        self.timeline = []
+        self.started = time.monotonic()
+
+    async def _sample(self):
+        previous = 0
+        while True:
+            await asyncio.sleep(1)
+            sample = {
+                't': round(time.monotonic() - self.started, 1),
+                'connections': sum(client.connected for client in self.clients),
+                'updates_per_second': self.stats.received - previous,
+                **self.server.sample(),
+                'client_cpu_percent': self.client_process.sample()['cpu_percent']
+            }
+            previous = self.stats.received
+            self.timeline.append(sample)
+
+    async def ramp(self, target):
+        """Open connections until there are ``target``, --ramp-rate per second"""
+        semaphore = asyncio.Semaphore(self.args.connect_concurrency)
+
+        async def open_one():
+            client = SoakClient(
+                self.url, self.rng.sample(self.args.symbols, self.args.symbols_per_client), self
+            )
+            async with semaphore:
+                elapsed = await client.connect()
+            if elapsed is None:
+                self.stats.connect_failures += 1
+            else:
+                self.stats.connect_ms.append(elapsed)
+                self.clients.append(client)
+
+        tasks = []
+        for _ in range(target - len(self.clients)):
+            tasks.append(asyncio.ensure_future(open_one()))
+            await asyncio.sleep(1 / self.args.ramp_rate)
+        await asyncio.gather(*tasks)
+
+    async def hold(self):
+        """Keep the connections for --hold seconds, churning some of them periodically"""
+        deadline = time.monotonic() + self.args.hold
+        next_churn = time.monotonic() + self.args.churn_interval
+        while time.monotonic() < deadline:
+            await asyncio.sleep(min(0.5, max(0.0, deadline - time.monotonic())))
+            if self.args.churn and time.monotonic() >= next_churn and self.clients:
+                count = max(1, int(len(self.clients) * self.args.churn))
+                await asyncio.gather(*(client.reconnect() for client in self.rng.sample(self.clients, count)))
+                next_churn = time.monotonic() + self.args.churn_interval
+
+    def level_report(self, target, hold_stats, window):
+        now = time.monotonic()
+        connected = [client for client in self.clients if client.connected]
+        stalled = sum(1 for client in connected if now - client.last_update > 3 * self.args.tick_interval)
+        cpu = [sample['cpu_percent'] for sample in window]
+        intervals = [
+            (last_time - first_time) / (last - first)
+            for first, first_time, last, last_time in hold_stats.ticks.values() if last > first
+        ]
+        return {
+            'connections': target,
+            'connected': len(connected),
+            'connect_failures': self.stats.connect_failures,
+            'connect_ms': percentiles(self.stats.connect_ms),
+            'updates': {
+                'received': hold_stats.received,
+                'per_second': round(hold_stats.received / self.args.hold, 1),
+                'tick_interval_seconds': round(float(np.mean(intervals)), 3) if intervals else None,
+                'latency_ms': percentiles(np.array(hold_stats.latencies) * 1000),
+                'missed': hold_stats.missed,
+                'duplicates': hold_stats.duplicates,
+                'unexpected': hold_stats.unexpected,
+                'stalled_clients': stalled
+            },
+            'reconnects': {
+                'succeeded': len(hold_stats.reconnect_ms),
+                'failed': hold_stats.reconnect_failures,
+                'reconnect_ms': percentiles(hold_stats.reconnect_ms),
+                'first_update_ms': percentiles(hold_stats.first_update_ms)
+            },
+            'server': {
+                'cpu_percent_mean': round(float(np.mean(cpu)), 1) if cpu else None,
+                'cpu_percent_max': max(cpu) if cpu else None,
+                'rss_mb_max': max((sample['rss_mb'] for sample in window), default=None),
+                'threads_max': max((sample['threads'] for sample in window), default=None)
+            },
+            'client_cpu_percent_max': max((sample['client_cpu_percent'] for sample in window), default=None)
+        }
+
+    async def run(self):
+        sampler = asyncio.ensure_future(self._sample())
+        levels = []
+        try:
+            for target in self.args.levels:
+                self.stats = Stats()
+                await self.ramp(target)
+                # Connection results belong to the ramp; everything else is measured while holding
+                ramp_stats, self.stats = self.stats, Stats()
+                start = len(self.timeline)
+                await self.hold()
+                hold_stats, self.stats = self.stats, ramp_stats
+                level = self.level_report(target, hold_stats, self.timeline[start:])
+                levels.append(level)
+                latency = level['updates']['latency_ms']
+                print(f"{target} connections: {level['updates']['per_second']} updates/s, "
+                      f"tick every {level['updates']['tick_interval_seconds']} s, "
+                      f"p99 {latency['p99'] if latency else '-'} ms, missed {level['updates']['missed']}, "
+                      f"server CPU {level['server']['cpu_percent_mean']}%", file=sys.stderr)
+        finally:
+            sampler.cancel()
+            for client in self.clients:
+                if client.ws is not None:
+                    client.drop()
+        return levels
+
+
+def capacity(levels, slo_ms, tick_interval):
+    """Largest level that met the latency SLO and kept ticking on time, without failures, gaps or stalls"""
+    best = 0
+    for level in levels:
+        updates = level['updates']
+        healthy = (
+            level['connect_failures'] == 0 and updates['latency_ms'] is not None
+            and updates['latency_ms']['p99'] <= slo_ms and updates['missed'] == 0
+            and updates['stalled_clients'] == 0 and updates['unexpected'] == 0
+            and updates['tick_interval_seconds'] is not None
+            and updates['tick_interval_seconds'] <= tick_interval * TICK_INTERVAL_TOLERANCE
+        )
+        if healthy:
+            best = max(best, level['connections'])
+    return best
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--levels', type=int, nargs='+', default=[250, 500, 1000, 2000], help='connections per step')
+    parser.add_argument('--hold', type=float, default=20, help='seconds measured at each level')
+    parser.add_argument('--tick-interval', type=float, default=1, help='seconds between price updates')
+    parser.add_argument('--symbols', nargs='+', default=DEFAULT_SYMBOLS)
+    parser.add_argument('--symbols-per-client', type=int, default=3)
+    parser.add_argument('--ramp-rate', type=float, default=200, help='new connections per second')
+    parser.add_argument('--connect-concurrency', type=int, default=50, help='connections opening at once')
+    parser.add_argument('--churn', type=float, default=0.02, help='fraction of clients reconnecting each churn')
+    parser.add_argument('--churn-interval', type=float, default=10, help='seconds between churns')
+    parser.add_argument('--slo-ms', type=float, default=1000, help='p99 tick-to-client latency allowed for capacity')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write the report here instead of stdout')
+    parser.add_argument('--serve', metavar='WORKDIR', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args)
+        return
+    if args.symbols_per_client > len(args.symbols):
+        parser.error('--symbols-per-client is larger than --symbols')
+
+    raise_file_limit()
+    server, port = start_server(args)
+    try:
+        runner = SoakRunner(args, port, server.pid)
+        levels = asyncio.run(runner.run())
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'tick_interval_seconds': args.tick_interval,
+        'symbols': len(args.symbols),
+        'symbols_per_client': args.symbols_per_client,
+        'hold_seconds': args.hold,
+        'churn': args.churn,
+        'slo_ms': args.slo_ms,
+        'capacity': capacity(levels, args.slo_ms, args.tick_interval),
+        'levels': levels,
+        'timeline': runner.timeline
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -19,4 +19,44 @@ class Config:
     CORS_ORIGINS = ["http://localhost:3000", "http://127.0.0.1:5500"]
     
     # WebSocket Configuration
-    PRICE_UPDATE_INTERVAL = 5  # seconds
\ No newline at end of file
+    PRICE_UPDATE_INTERVAL = float(os.getenv('PRICE_UPDATE_INTERVAL', '5'))  # seconds
+    INDICATOR_REFRESH_INTERVAL = int(os.getenv('INDICATOR_REFRESH_INTERVAL', '900'))  # seconds between history re-syncs
+    INDICATOR_MAX_SYMBOLS = int(os.getenv('INDICATOR_MAX_SYMBOLS', '1000'))  # symbols tracked at once
+    INDICATOR_IDLE_TIMEOUT = int(os.getenv('INDICATOR_IDLE_TIMEOUT', '3600'))  # seconds unread before a symbol is dropped
+    
+    # Profiling (admin only): per-request profiles and the stack sampler are disabled without a token
+    PROFILING_TOKEN = os.getenv('PROFILING_TOKEN', '')
+    PROFILES_PATH = os.getenv('PROFILES_PATH', 'profiles')
+    PROFILES_KEEP = int(os.getenv('PROFILES_KEEP', '50'))  # stored request profiles kept
+    
+    # Order Execution
+    ORDER_WORKERS = int(os.getenv('ORDER_WORKERS', '4'))
+    
+    # Analytics Configuration
+    RISK_FREE_RATE = float(os.getenv('RISK_FREE_RATE', '0.0'))  # annual, e.g. 0.04 for 4%
+    LEADERBOARD_REFRESH_INTERVAL = int(os.getenv('LEADERBOARD_REFRESH_INTERVAL', '60'))  # seconds
+    BACKTEST_WORKERS = int(os.getenv('BACKTEST_WORKERS', str(os.cpu_count() or 1)))
+    BACKTEST_SWEEP_TIMEOUT = float(os.getenv('BACKTEST_SWEEP_TIMEOUT', '60'))  # seconds
+    
+    # AI Configuration
+    MODEL_MEMORY_BUDGET_MB = int(os.getenv('MODEL_MEMORY_BUDGET_MB', '512'))
+    PREDICTION_CACHE_PATH = os.getenv('PREDICTION_CACHE_PATH', 'models/predictions.db')
+    PREDICTION_BAR_CHECK_INTERVAL = int(os.getenv('PREDICTION_BAR_CHECK_INTERVAL', '900'))  # seconds
+    TRAINING_WORKERS = int(os.getenv('TRAINING_WORKERS', '1'))  # concurrent training processes
+    TRAINING_INTRA_OP_THREADS = int(os.getenv('TRAINING_INTRA_OP_THREADS', '0'))  # TensorFlow threads per training process, 0 = even share of the cores
+    TRAINING_INTER_OP_THREADS = int(os.getenv('TRAINING_INTER_OP_THREADS', '0'))  # 0 = 1
+    TRAINING_MANIFEST_PATH = os.getenv('TRAINING_MANIFEST_PATH', 'models/training_manifest.json')
+    TRAINING_JOBS_PATH = os.getenv('TRAINING_JOBS_PATH', 'models/training_jobs.db')
+    INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'keras')  # 'keras' or 'tflite'
+    TFLITE_QUANTIZE = os.getenv('TFLITE_QUANTIZE', 'false').lower() == 'true'
+    AI_PRELOAD = os.getenv('AI_PRELOAD', 'false').lower() == 'true'  # load TensorFlow at startup instead of on the first AI request
+    DAILY_RETRAIN = os.getenv('DAILY_RETRAIN', 'true').lower() == 'true'  # fine-tune every trained model once a day
+    RETRAIN_HOUR_UTC = int(os.getenv('RETRAIN_HOUR_UTC', '22'))
+    RETRAIN_EPOCHS = int(os.getenv('RETRAIN_EPOCHS', '5'))
+    RECOMMENDATIONS_PATH = os.getenv('RECOMMENDATIONS_PATH', 'models/recommendations.db')
+    RECOMMENDATION_UNIVERSE = [s.strip().upper() for s in os.getenv(
+        'RECOMMENDATION_UNIVERSE', 'AAPL,GOOGL,MSFT,AMZN,TSLA,META,NVDA'
+    ).split(',') if s.strip()]
+    RECOMMENDATION_TIER = os.getenv('RECOMMENDATION_TIER') or None  # None uses the default tier
+    RECOMMENDATIONS_HOUR_UTC = int(os.getenv('RECOMMENDATIONS_HOUR_UTC', '21'))
+    RECOMMENDATIONS_JOB = os.getenv('RECOMMENDATIONS_JOB', 'true').lower() == 'true'  # generate snapshots in this process
@@ -1,22 +1,38 @@
-from flask import Flask, jsonify
-from flask_socketio import SocketIO, emit
+from flask import Flask, jsonify, session, request
+from flask_socketio import SocketIO, emit, join_room, leave_room
 from flask_cors import CORS
 import threading
 import time
 import sys
 import os
 
-# Add the backend directory to Python path
+# Add the backend directory to Python path, and src for the services' top-level imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from config.settings import Config
-from routes.auth_routes import auth_bp
-from routes.trading_routes import trading_bp
-from routes.stock_routes import stock_bp
-from routes.ai_routes import ai_bp
 from services.stock_service import StockService
+from services.metrics import registry as metrics
+
+websocket_connections = metrics.gauge('websocket_connections', 'Open Socket.IO connections')
+websocket_emits = metrics.counter('websocket_emits_total', 'Socket.IO messages emitted by the server by event', ['event'])
+tick_seconds = metrics.histogram('price_tick_duration_seconds', 'Time for one price updater pass over every symbol')
+tick_messages = metrics.histogram(
+    'price_tick_messages', 'price_update messages delivered to clients in one price updater pass',
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000)
+)
 
 def create_app():
+    # The routes build their singletons (order queue, schedulers, pools) on import. Importing
+    # them here rather than at module level keeps spawned pool processes, which re-import this
+    # module as __mp_main__, from building them again.
+    # Blueprints use package-relative imports, so they are imported through the src package
+    from src.routes.auth_routes import auth_bp
+    from src.routes.trading_routes import trading_bp, order_service, order_pipeline, leaderboard
+    from src.routes.stock_routes import stock_bp, indicator_engine
+    from src.routes.ai_routes import ai_bp, get_predictor, retrain_scheduler, recommendation_job
+    from src.routes.metrics_routes import metrics_bp
+    
     app = Flask(__name__)
     app.config.from_object(Config)
     
@@ -29,11 +45,39 @@ def create_app():
     app.register_blueprint(trading_bp)
     app.register_blueprint(stock_bp)
     app.register_blueprint(ai_bp)
+    app.register_blueprint(metrics_bp)
+    if Config.PROFILING_TOKEN:
+        from src.routes.profiling_routes import profiling_bp
+        app.register_blueprint(profiling_bp)
     
     # Global variables for real-time updates
-    active_symbols = set()
+    active_symbols = {}           # symbol -> session ids subscribed to its price updates
+    subscriptions_lock = threading.Lock()
+    tick_sequence = {}            # symbol -> number of the last price update sent, so clients can spot gaps
+    indicator_symbols = {}        # symbol -> session ids subscribed to its indicator updates
     stock_service = StockService()
     
+    def subscription_counts():
+        with subscriptions_lock:
+            return {
+                'symbols': len(active_symbols),
+                'subscriptions': sum(len(subscribers) for subscribers in active_symbols.values())
+            }
+    
+    metrics.gauge(
+        'websocket_price_subscriptions', 'Subscribed symbols and (connection, symbol) price subscriptions', ['kind'],
+        collect=lambda: {(kind,): count for kind, count in subscription_counts().items()}
+    )
+    
+    # Push asynchronous order results to the submitting user's room
+    order_pipeline.set_notifier(
+        lambda order_request: socketio.emit(
+            'order_request_update', order_request, to=f"user_{order_request['user_id']}"
+        )
+    )
+    # Only here, not at import: spawned pool workers re-import the app module and must not touch the queue
+    order_pipeline.recover()
+    
     @app.route('/')
     def index():
         return jsonify({
@@ -58,17 +102,41 @@ def create_app():
     @socketio.on('connect')
     def handle_connect():
         print('Client connected')
+        websocket_connections.inc()
+        # Logged-in clients get a private room for their own order updates
+        user_id = session.get('user_id')
+        if user_id:
+            join_room(f'user_{user_id}')
         emit('connected', {'message': 'Connected to stock price updates'})
     
+    def remove_subscriber(subscriptions, symbol, sid):
+        """Drop a client's subscription to a symbol; returns whether it had one (call with the lock held)"""
+        subscribers = subscriptions.get(symbol)
+        if not subscribers or sid not in subscribers:
+            return False
+        subscribers.discard(sid)
+        if not subscribers:
+            del subscriptions[symbol]
+        return True
+    
     @socketio.on('disconnect')
     def handle_disconnect():
+        websocket_connections.dec()
+        # Socket.IO drops the client from its rooms; forget its subscriptions too
+        with subscriptions_lock:
+            for subscriptions in (active_symbols, indicator_symbols):
+                for symbol in list(subscriptions):
+                    remove_subscriber(subscriptions, symbol, request.sid)
         print('Client disconnected')
     
     @socketio.on('subscribe_stock')
     def handle_subscribe(data):
         symbol = data.get('symbol', '').upper()
         if symbol and stock_service.validate_symbol(symbol):
-            active_symbols.add(symbol)
+            # Updates go to a per-symbol room, so each client only receives what it subscribed to
+            join_room(f'stock_{symbol}')
+            with subscriptions_lock:
+                active_symbols.setdefault(symbol, set()).add(request.sid)
             emit('subscribed', {'symbol': symbol, 'message': f'Subscribed to {symbol} updates'})
             print(f'Client subscribed to {symbol}')
         else:
@@ -77,35 +145,97 @@ def create_app():
     @socketio.on('unsubscribe_stock')
     def handle_unsubscribe(data):
         symbol = data.get('symbol', '').upper()
-        if symbol in active_symbols:
-            active_symbols.remove(symbol)
+        with subscriptions_lock:
+            subscribed = remove_subscriber(active_symbols, symbol, request.sid)
+        if subscribed:
+            leave_room(f'stock_{symbol}')
             emit('unsubscribed', {'symbol': symbol, 'message': f'Unsubscribed from {symbol} updates'})
             print(f'Client unsubscribed from {symbol}')
     
+    @socketio.on('subscribe_indicators')
+    def handle_subscribe_indicators(data):
+        symbol = data.get('symbol', '').upper()
+        indicators = indicator_engine.snapshot(symbol) if symbol else None
+        if indicators:
+            # Updates go to a per-symbol room, so only subscribers receive them
+            join_room(f'indicators_{symbol}')
+            with subscriptions_lock:
+                indicator_symbols.setdefault(symbol, set()).add(request.sid)
+            emit('indicator_update', indicators)
+        else:
+            emit('error', {'message': 'Indicators not available'})
+    
+    @socketio.on('unsubscribe_indicators')
+    def handle_unsubscribe_indicators(data):
+        symbol = data.get('symbol', '').upper()
+        # The last subscriber leaving stops the symbol's ticks unless prices or orders still need them
+        with subscriptions_lock:
+            remove_subscriber(indicator_symbols, symbol, request.sid)
+        leave_room(f'indicators_{symbol}')
+        emit('unsubscribed_indicators', {'symbol': symbol})
+    
     @socketio.on('get_active_symbols')
     def handle_get_active_symbols():
-        emit('active_symbols', {'symbols': list(active_symbols)})
+        with subscriptions_lock:
+            symbols = list(active_symbols)
+        emit('active_symbols', {'symbols': symbols})
     
     def price_updater():
         """Background thread to send real-time price updates"""
         print('Price updater thread started')
         while True:
             try:
-                if active_symbols:
-                    print(f'Updating prices for {len(active_symbols)} symbols')
-                    for symbol in list(active_symbols):
+                # Symbols with resting orders need ticks even when no client is watching them
+                with subscriptions_lock:
+                    symbols = set(active_symbols) | set(indicator_symbols)
+                symbols |= set(order_service.symbols())
+                if symbols:
+                    print(f'Updating prices for {len(symbols)} symbols')
+                    tick_start = time.perf_counter()
+                    delivered = 0
+                    for symbol in symbols:
                         try:
-                            price = stock_service.get_stock_price(symbol)
-                            if price:
-                                socketio.emit('price_update', {
-                                    'symbol': symbol,
-                                    'price': round(price, 2),
-                                    'timestamp': time.time()
-                                })
+                            quote = stock_service.get_stock_quote(symbol)
+                            if quote:
+                                price = quote['price']
+                                with subscriptions_lock:
+                                    subscribers = len(active_symbols.get(symbol, ()))
+                                if subscribers:
+                                    tick_sequence[symbol] = tick_sequence.get(symbol, 0) + 1
+                                    socketio.emit('price_update', {
+                                        'symbol': symbol,
+                                        'price': round(price, 2),
+                                        'seq': tick_sequence[symbol],
+                                        'timestamp': time.time()
+                                    }, to=f'stock_{symbol}')
+                                    websocket_emits.inc(event='price_update')
+                                    delivered += subscribers
+                                
+                                for order in order_service.on_price_tick(symbol, price):
+                                    socketio.emit('order_update', order, to=f"user_{order['user_id']}")
+                                    websocket_emits.inc(event='order_update')
+                                
+                                # O(1) per tick; only symbols the engine already tracks are updated.
+                                # Subscribed symbols are read each tick so they stay tracked and re-synced.
+                                if symbol in indicator_symbols:
+                                    indicator_engine.ensure(symbol)
+                                indicators = indicator_engine.on_tick(symbol, price, volume=quote['volume'])
+                                if indicators and symbol in indicator_symbols:
+                                    socketio.emit('indicator_update', indicators, to=f'indicators_{symbol}')
+                                    websocket_emits.inc(event='indicator_update')
                         except Exception as e:
                             print(f"Error updating price for {symbol}: {e}")
                             # Remove problematic symbol
-                            active_symbols.discard(symbol)
+                            with subscriptions_lock:
+                                active_symbols.pop(symbol, None)
+                                indicator_symbols.pop(symbol, None)
+                    tick_seconds.observe(time.perf_counter() - tick_start)
+                    tick_messages.observe(delivered)
+                
+                try:
+                    leaderboard.refresh_if_stale()
+                except Exception as e:
+                    print(f"Error refreshing leaderboard: {e}")
                 
                 time.sleep(Config.PRICE_UPDATE_INTERVAL)
             except Exception as e:
@@ -113,9 +243,19 @@ def create_app():
                 time.sleep(10)  # Wait longer on error
     
     # Start price update thread
-    price_update_thread = threading.Thread(target=price_updater, daemon=True)
+    price_update_thread = threading.Thread(target=price_updater, name='price-updater', daemon=True)
     price_update_thread.start()
     
+    # Workers dedicated to /api/ai can load TensorFlow up front instead of on the first request
+    if Config.AI_PRELOAD:
+        threading.Thread(target=get_predictor, daemon=True).start()
+    
+    if Config.DAILY_RETRAIN:
+        retrain_scheduler.start()
+    
+    if Config.RECOMMENDATIONS_JOB:
+        recommendation_job.start()
+    
     return app, socketio
 
 if __name__ == '__main__':
@@ -130,9 +270,13 @@ if __name__ == '__main__':
     print("  GET  /api/trading/portfolio - Get portfolio")
     print("  POST /api/trading/buy      - Buy stocks")
     print("  POST /api/trading/sell     - Sell stocks")
+    print("  POST /api/trading/order-requests - Submit async order")
+    print("  POST /api/trading/orders   - Place limit/stop order")
     print("  GET  /api/stocks/search    - Search stocks")
     print("  GET  /api/stocks/info/<symbol> - Get stock info")
+    print("  GET  /api/stocks/indicators/<symbol> - Get technical indicators")
     print("  GET  /api/ai/predict/<symbol> - Get AI prediction")
     print("  GET  /api/ai/recommendations - Get AI recommendations")
+    print("  GET  /api/metrics          - Prometheus metrics")
     
     socketio.run(app, debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
\ No newline at end of file
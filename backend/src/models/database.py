@@ -1,8 +1,14 @@
 import sqlite3
 import os
+import sys
 from datetime import datetime
 from typing import Optional, List, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.metrics import registry, time_methods
 
+query_seconds = registry.histogram('db_query_duration_seconds', 'Time spent in each Database method', ['method'])
+
+@time_methods(query_seconds)
 class Database:
     def __init__(self, db_path: str = 'trading.db'):
         self.db_path = db_path
@@ -13,6 +19,9 @@ class Database:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # WAL lets readers proceed while a trade transaction holds the write lock
+        cursor.execute('PRAGMA journal_mode=WAL')
+        
         # Users table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS users (
@@ -66,6 +75,49 @@ class Database:
             )
         ''')
         
+        # Resting orders table (limit / stop / stop-limit)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS orders (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                symbol TEXT NOT NULL,
+                side TEXT NOT NULL CHECK (side IN ('BUY', 'SELL')),
+                order_type TEXT NOT NULL CHECK (order_type IN ('LIMIT', 'STOP', 'STOP_LIMIT')),
+                shares INTEGER NOT NULL,
+                limit_price REAL,
+                stop_price REAL,
+                status TEXT NOT NULL DEFAULT 'OPEN'
+                    CHECK (status IN ('OPEN', 'TRIGGERED', 'FILLED', 'CANCELLED', 'REJECTED')),
+                filled_price REAL,
+                message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id)
+            )
+        ''')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_orders_user_status ON orders (user_id, status)'
+        )
+        
+        # Asynchronous order submissions, deduplicated per user by idempotency key
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS order_requests (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                user_id INTEGER,
+                idempotency_key TEXT NOT NULL,
+                side TEXT NOT NULL CHECK (side IN ('BUY', 'SELL')),
+                symbol TEXT NOT NULL,
+                shares INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'QUEUED'
+                    CHECK (status IN ('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED')),
+                result TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (user_id) REFERENCES users (id),
+                UNIQUE(user_id, idempotency_key)
+            )
+        ''')
+        
         conn.commit()
         conn.close()
     
@@ -131,7 +183,15 @@ class Database:
         """Update portfolio holdings"""
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
+        self._apply_portfolio_change(cursor, user_id, symbol, shares, price)
+        conn.commit()
+        conn.close()
+    
+    def _apply_portfolio_change(self, cursor, user_id: int, symbol: str, shares: int, price: float) -> bool:
+        """Apply a share delta to a holding using average-cost basis.
         
+        Returns False without touching the row if the delta would leave a negative position.
+        """
         cursor.execute(
             'SELECT shares, avg_price FROM portfolio WHERE user_id = ? AND symbol = ?', 
             (user_id, symbol)
@@ -159,15 +219,83 @@ class Database:
                     UPDATE portfolio SET shares = ?, avg_price = ?, updated_at = CURRENT_TIMESTAMP
                     WHERE user_id = ? AND symbol = ?
                 ''', (new_shares, new_avg_price, user_id, symbol))
+            else:
+                return False
         else:
             if shares > 0:
                 cursor.execute('''
                     INSERT INTO portfolio (user_id, symbol, shares, avg_price)
                     VALUES (?, ?, ?, ?)
                 ''', (user_id, symbol, shares, price))
+            elif shares < 0:
+                return False
         
-        conn.commit()
-        conn.close()
+        return True
+    
+    def execute_trades(self, user_id: int, trades: List[Tuple[str, str, int, float]],
+                       fill_order_id: Optional[int] = None) -> Optional[float]:
+        """Apply a set of trades in a single transaction and return the new balance.
+        
+        Each trade is (symbol, type, shares, price). Sells are applied before buys so
+        that sale proceeds can fund purchases. If the user lacks the cash or shares for
+        the whole set, nothing is written and None is returned.
+        
+        With ``fill_order_id``, the resting order is marked FILLED in the same
+        transaction, so a trade is never committed without its order leaving the book.
+        If the order is no longer resting, nothing is written and None is returned.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        try:
+            # Take the write lock up front so balance and holdings can't change under us
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('SELECT balance FROM users WHERE id = ?', (user_id,))
+            row = cursor.fetchone()
+            if not row:
+                conn.rollback()
+                return None
+            
+            balance = row[0]
+            ordered = sorted(trades, key=lambda trade: trade[1] != 'SELL')
+            for symbol, transaction_type, shares, price in ordered:
+                total_amount = shares * price
+                delta = -shares if transaction_type == 'SELL' else shares
+                
+                if transaction_type == 'SELL':
+                    balance += total_amount
+                else:
+                    balance -= total_amount
+                
+                if balance < 0 or not self._apply_portfolio_change(cursor, user_id, symbol, delta, price):
+                    conn.rollback()
+                    return None
+                
+                cursor.execute('''
+                    INSERT INTO transactions (user_id, symbol, type, shares, price, total_amount)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (user_id, symbol, transaction_type, shares, price, total_amount))
+            
+            cursor.execute(
+                'UPDATE users SET balance = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?', 
+                (balance, user_id)
+            )
+            
+            if fill_order_id is not None:
+                cursor.execute('''
+                    UPDATE orders SET status = 'FILLED', filled_price = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE id = ? AND status IN ('OPEN', 'TRIGGERED')
+                ''', (ordered[0][3], fill_order_id))
+                if cursor.rowcount != 1:
+                    conn.rollback()
+                    return None
+            
+            conn.commit()
+            return balance
+        except sqlite3.Error:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
     
     def get_portfolio(self, user_id: int) -> List[Tuple]:
         """Get user's portfolio"""
@@ -188,12 +316,52 @@ class Database:
         cursor.execute('''
             SELECT symbol, type, shares, price, total_amount, timestamp 
             FROM transactions WHERE user_id = ? 
-            ORDER BY timestamp DESC LIMIT ?
+            ORDER BY timestamp DESC, id DESC LIMIT ?
         ''', (user_id, limit))
         transactions = cursor.fetchall()
         conn.close()
         return transactions
     
+    def get_ledger_snapshot(self, user_id: int, after_id: int = 0) -> Tuple[Optional[float], List[Tuple]]:
+        """Get the user's balance and their transactions after ``after_id``, in execution order.
+        
+        Both are read in one transaction, so the balance is the one right after the last
+        returned trade. The balance is None if the user doesn't exist.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN')
+            cursor.execute('SELECT balance FROM users WHERE id = ?', (user_id,))
+            row = cursor.fetchone()
+            cursor.execute('''
+                SELECT id, symbol, type, shares, price, total_amount, timestamp
+                FROM transactions WHERE user_id = ? AND id > ?
+                ORDER BY id
+            ''', (user_id, after_id))
+            ledger = cursor.fetchall()
+            conn.commit()
+        finally:
+            conn.close()
+        return (row[0] if row else None), ledger
+    
+    def get_all_positions(self) -> List[Tuple]:
+        """Get every user with each of their open positions in one query.
+        
+        Rows are (user_id, username, balance, symbol, shares, avg_price); users without
+        positions appear once with NULL position columns.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT u.id, u.username, u.balance, p.symbol, p.shares, p.avg_price
+            FROM users u
+            LEFT JOIN portfolio p ON p.user_id = u.id AND p.shares > 0
+        ''')
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    
     def add_to_watchlist(self, user_id: int, symbol: str) -> bool:
         """Add stock to watchlist"""
         conn = sqlite3.connect(self.db_path)
@@ -231,4 +399,151 @@ class Database:
         )
         watchlist = [row[0] for row in cursor.fetchall()]
         conn.close()
-        return watchlist
\ No newline at end of file
+        return watchlist
+    
+    def create_order(self, user_id: int, symbol: str, side: str, order_type: str, shares: int,
+                     limit_price: Optional[float] = None, stop_price: Optional[float] = None) -> int:
+        """Persist a new resting order"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO orders (user_id, symbol, side, order_type, shares, limit_price, stop_price)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (user_id, symbol, side, order_type, shares, limit_price, stop_price))
+        order_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        return order_id
+    
+    def get_order(self, order_id: int) -> Optional[Tuple]:
+        """Get a single order by ID"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM orders WHERE id = ?', (order_id,))
+        order = cursor.fetchone()
+        conn.close()
+        return order
+    
+    def get_open_orders(self) -> List[Tuple]:
+        """Get all resting orders across users (used to rebuild the order books)"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT * FROM orders WHERE status IN ('OPEN', 'TRIGGERED') ORDER BY id"
+        )
+        orders = cursor.fetchall()
+        conn.close()
+        return orders
+    
+    def get_orders(self, user_id: int, status: Optional[str] = None, limit: int = 50) -> List[Tuple]:
+        """Get user's orders, newest first"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        if status:
+            cursor.execute(
+                'SELECT * FROM orders WHERE user_id = ? AND status = ? ORDER BY id DESC LIMIT ?',
+                (user_id, status, limit)
+            )
+        else:
+            cursor.execute(
+                'SELECT * FROM orders WHERE user_id = ? ORDER BY id DESC LIMIT ?',
+                (user_id, limit)
+            )
+        orders = cursor.fetchall()
+        conn.close()
+        return orders
+    
+    def update_order_status(self, order_id: int, status: str, filled_price: Optional[float] = None,
+                            message: Optional[str] = None) -> bool:
+        """Move a resting order to a new status; returns False if it was no longer resting"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE orders SET status = ?, filled_price = ?, message = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status IN ('OPEN', 'TRIGGERED')
+        ''', (status, filled_price, message, order_id))
+        updated = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return updated
+    
+    def cancel_order(self, user_id: int, order_id: int) -> bool:
+        """Cancel a user's resting order"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE orders SET status = 'CANCELLED', updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND user_id = ? AND status IN ('OPEN', 'TRIGGERED')
+        ''', (order_id, user_id))
+        cancelled = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return cancelled
+    
+    def create_order_request(self, user_id: int, idempotency_key: str, side: str,
+                             symbol: str, shares: int) -> Tuple[Tuple, bool]:
+        """Insert an order submission, or return the existing one for the same key.
+        
+        Returns (row, created) where created is False for a replayed key.
+        """
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT INTO order_requests (user_id, idempotency_key, side, symbol, shares)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (user_id, idempotency_key, side, symbol, shares))
+            conn.commit()
+            created = True
+        except sqlite3.IntegrityError:
+            created = False
+        
+        cursor.execute(
+            'SELECT * FROM order_requests WHERE user_id = ? AND idempotency_key = ?',
+            (user_id, idempotency_key)
+        )
+        row = cursor.fetchone()
+        conn.close()
+        return row, created
+    
+    def get_order_request(self, request_id: int) -> Optional[Tuple]:
+        """Get an order submission by ID"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM order_requests WHERE id = ?', (request_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return row
+    
+    def get_order_requests_by_status(self, status: str) -> List[Tuple]:
+        """Get all order submissions in a given status, oldest first"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM order_requests WHERE status = ? ORDER BY id', (status,))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+    
+    def claim_order_request(self, request_id: int) -> bool:
+        """Move a QUEUED order submission to RUNNING; returns False if someone else claimed it"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE order_requests SET status = 'RUNNING', updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status = 'QUEUED'
+        ''', (request_id,))
+        claimed = cursor.rowcount == 1
+        conn.commit()
+        conn.close()
+        return claimed
+    
+    def update_order_request(self, request_id: int, status: str, result: Optional[str] = None):
+        """Update an order submission's status and result"""
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        cursor.execute('''
+            UPDATE order_requests SET status = ?, result = ?, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        ''', (status, result, request_id))
+        conn.commit()
+        conn.close()
@@ -1,9 +1,64 @@
 from flask import Blueprint, request, jsonify, session
-from ..services.ai_predictor import StockPredictor
 import threading
+from ..services.training_jobs import TrainingJobManager, RetrainScheduler, TRAINING_MODES
+from ..services.model_registry import ModelRegistry
+from ..services.recommendations import RecommendationSnapshots, RecommendationJob
+from .stock_routes import indicator_engine, stock_service
+from ..services.model_tiers import TIERS
+from config.settings import Config
 
 ai_bp = Blueprint('ai', __name__, url_prefix='/api/ai')
-predictor = StockPredictor()
+training_jobs = TrainingJobManager(
+    Config.TRAINING_JOBS_PATH,
+    max_workers=Config.TRAINING_WORKERS,
+    intra_op_threads=Config.TRAINING_INTRA_OP_THREADS,
+    inter_op_threads=Config.TRAINING_INTER_OP_THREADS,
+    predictor_options={
+        'cache_path': Config.PREDICTION_CACHE_PATH,
+        'inference_backend': Config.INFERENCE_BACKEND,
+        'tflite_quantize': Config.TFLITE_QUANTIZE,
+        'retrain_epochs': Config.RETRAIN_EPOCHS
+    }
+)
+# Started by the app when DAILY_RETRAIN is enabled
+retrain_scheduler = RetrainScheduler(training_jobs, ModelRegistry().symbols, hour_utc=Config.RETRAIN_HOUR_UTC)
+
+# The predictor loads TensorFlow, so it is built on first use rather than at import:
+# workers that never serve /api/ai start without it
+_predictor = None
+_predictor_lock = threading.Lock()
+
+def get_predictor():
+    """Shared StockPredictor, created on first call"""
+    global _predictor
+    if _predictor is None:
+        with _predictor_lock:
+            if _predictor is None:
+                from ..services.ai_predictor import StockPredictor
+                
+                predictor = StockPredictor(
+                    model_memory_budget_mb=Config.MODEL_MEMORY_BUDGET_MB,
+                    cache_path=Config.PREDICTION_CACHE_PATH,
+                    bar_check_interval=Config.PREDICTION_BAR_CHECK_INTERVAL,
+                    inference_backend=Config.INFERENCE_BACKEND,
+                    tflite_quantize=Config.TFLITE_QUANTIZE,
+                    indicator_engine=indicator_engine
+                )
+                predictor.set_training_jobs(training_jobs)
+                _predictor = predictor
+    return _predictor
+
+recommendation_snapshots = RecommendationSnapshots(Config.RECOMMENDATIONS_PATH)
+# Started by the app when RECOMMENDATIONS_JOB is enabled
+recommendation_job = RecommendationJob(
+    recommendation_snapshots, get_predictor, Config.RECOMMENDATION_UNIVERSE,
+    claim_run=training_jobs.store.claim_run, release_run=training_jobs.store.release_run,
+    tier=Config.RECOMMENDATION_TIER, hour_utc=Config.RECOMMENDATIONS_HOUR_UTC
+)
+# New models change recommendations; only jobs submitted by this process are reported here
+training_jobs.set_notifier(
+    lambda job: recommendation_job.request_refresh('retrain') if job and job['status'] == 'COMPLETED' else None
+)
 
 def require_auth():
     """Check if user is authenticated"""
@@ -26,8 +81,18 @@ def predict_stock(symbol):
         if days < 1 or days > 30:
             days = 5
         
+        # Either name a model tier or give a latency budget and let the predictor choose
+        tier = request.args.get('tier')
+        latency_budget_ms = request.args.get('latency_budget_ms', type=float)
+        if tier and tier not in TIERS:
+            return jsonify({'success': False, 'message': f'Tier must be one of {", ".join(TIERS)}'}), 400
+        
         # Run prediction in background to avoid timeout
-        prediction = predictor.predict_trend(symbol, days)
+        prediction = get_predictor().predict_trend(symbol, days, tier, latency_budget_ms)
+        
+        if prediction and prediction.get('status') == 'pending':
+            # No model yet: training was queued, poll the job and retry
+            return jsonify({'success': True, 'pending': True, 'job': prediction['job']}), 202
         
         if prediction:
             return jsonify({'success': True, 'prediction': prediction})
@@ -54,38 +119,52 @@ def batch_predict():
         # Limit to 10 symbols to avoid timeout
         symbols = [s.upper().strip() for s in symbols[:10]]
         
-        predictions = predictor.get_multiple_predictions(symbols)
+        tier = data.get('tier')
+        latency_budget_ms = data.get('latency_budget_ms')
+        if tier and tier not in TIERS:
+            return jsonify({'success': False, 'message': f'Tier must be one of {", ".join(TIERS)}'}), 400
+        if latency_budget_ms is not None and not isinstance(latency_budget_ms, (int, float)):
+            return jsonify({'success': False, 'message': 'latency_budget_ms must be a number'}), 400
+        
+        predictions = get_predictor().get_multiple_predictions(symbols, tier=tier, latency_budget_ms=latency_budget_ms)
         
-        return jsonify({'success': True, 'predictions': predictions})
+        # Symbols without a model come back as queued training jobs, listed apart from the forecasts
+        pending = [{'symbol': symbol, 'job': pred['job']} for symbol, pred in predictions.items()
+                   if pred.get('status') == 'pending']
+        predictions = {symbol: pred for symbol, pred in predictions.items() if pred.get('status') != 'pending'}
+        
+        return jsonify({'success': True, 'predictions': predictions, 'pending': pending})
     
     except Exception as e:
         return jsonify({'success': False, 'message': 'Batch prediction failed'}), 500
 
 @ai_bp.route('/recommendations', methods=['GET'])
 def get_recommendations():
-    """Get AI recommendations for popular stocks"""
+    """Get AI recommendations from the latest precomputed snapshot"""
     username = require_auth()
     if not username:
         return jsonify({'success': False, 'message': 'Authentication required'}), 401
     
     try:
-        # Popular stocks for recommendations
-        popular_stocks = ['AAPL', 'GOOGL', 'MSFT', 'AMZN', 'TSLA', 'META', 'NVDA']
-        
-        predictions = predictor.get_multiple_predictions(popular_stocks)
+        limit = request.args.get('limit', 5, type=int)
+        if limit < 1 or limit > 100:
+            limit = 5
         
-        # Sort by recommendation strength
-        recommendations = []
-        for symbol, pred in predictions.items():
-            if pred['recommendation'] in ['BUY', 'SELL']:
-                recommendations.append(pred)
-        
-        # Sort by trend change magnitude
-        recommendations.sort(key=lambda x: abs(x['trend_change']), reverse=True)
+        # Never predicts inline: snapshots are generated in the background
+        snapshot = recommendation_snapshots.latest()
+        if not snapshot:
+            return jsonify({'success': True, 'recommendations': [], 'snapshot': None})
         
         return jsonify({
-            'success': True, 
-            'recommendations': recommendations[:5]  # Top 5 recommendations
+            'success': True,
+            'recommendations': snapshot['recommendations'][:limit],
+            'snapshot': {
+                'version': snapshot['version'],
+                'generated_at': snapshot['generated_at'],
+                'universe_size': snapshot['universe_size'],
+                'predicted': snapshot['predicted'],
+                'pending': len(snapshot['pending'])
+            }
         })
     
     except Exception as e:
@@ -93,7 +172,7 @@ def get_recommendations():
 
 @ai_bp.route('/train/<symbol>', methods=['POST'])
 def train_model(symbol):
-    """Train model for specific stock (admin feature)"""
+    """Queue model training for a stock (admin feature)"""
     username = require_auth()
     if not username:
         return jsonify({'success': False, 'message': 'Authentication required'}), 401
@@ -101,17 +180,59 @@ def train_model(symbol):
     try:
         symbol = symbol.upper().strip()
         
-        # Train model in background thread
-        def train_async():
-            predictor.train_model(symbol)
+        # 'incremental' fine-tunes the existing model on recent bars instead of starting over
+        mode = request.args.get('mode', 'full')
+        if mode not in TRAINING_MODES:
+            return jsonify({'success': False, 'message': f'Mode must be one of {", ".join(TRAINING_MODES)}'}), 400
+        
+        # Every job holds a training process for minutes, so never queue one for an unknown symbol
+        if not stock_service.validate_symbol(symbol):
+            return jsonify({'success': False, 'message': 'Invalid stock symbol'}), 400
         
-        thread = threading.Thread(target=train_async)
-        thread.start()
+        result = training_jobs.submit(symbol, mode)
+        message = f'Training already in progress for {symbol}' if result['duplicate'] \
+            else f'Training queued for {symbol}. This may take a few minutes.'
         
         return jsonify({
-            'success': True, 
-            'message': f'Training started for {symbol}. This may take a few minutes.'
-        })
+            'success': True,
+            'duplicate': result['duplicate'],
+            'message': message,
+            'job': result['job']
+        }), 202
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Training failed'}), 500
+
+@ai_bp.route('/train/jobs/<int:job_id>', methods=['GET'])
+def get_training_job(job_id):
+    """Get the state and progress of a training job"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        job = training_jobs.get(job_id)
+        if not job:
+            return jsonify({'success': False, 'message': 'Training job not found'}), 404
+        
+        return jsonify({'success': True, 'job': job})
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to get training job'}), 500
+
+@ai_bp.route('/train/jobs/<int:job_id>', methods=['DELETE'])
+def cancel_training_job(job_id):
+    """Cancel a queued or running training job"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        job = training_jobs.cancel(job_id)
+        if not job:
+            return jsonify({'success': False, 'message': 'Training job not found'}), 404
+        
+        return jsonify({'success': True, 'job': job})
     
     except Exception as e:
-        return jsonify({'success': False, 'message': 'Training failed'}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'message': 'Failed to cancel training job'}), 500
@@ -0,0 +1,30 @@
+from flask import Blueprint, Response, g, request
+import time
+# Imported by its top-level name, as the services import it, so this is the registry they record to
+from services.metrics import registry
+
+metrics_bp = Blueprint('metrics', __name__, url_prefix='/api')
+
+request_seconds = registry.histogram(
+    'http_request_duration_seconds', 'HTTP request latency by method, route and status', ['method', 'route', 'status']
+)
+
+@metrics_bp.before_app_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@metrics_bp.after_app_request
+def record_request(response):
+    start = g.pop('request_start', None)
+    if start is not None:
+        # Label by the URL rule, not the path, so /predict/AAPL and /predict/MSFT share a series
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        request_seconds.observe(
+            time.perf_counter() - start, method=request.method, route=route, status=response.status_code
+        )
+    return response
+
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics():
+    """Every metric of this process in the Prometheus text format"""
+    return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,131 @@
+from flask import Blueprint, Response, g, jsonify, request, send_file
+import cProfile
+import hmac
+import os
+import pstats
+import time
+from urllib.parse import urlencode
+from ..services.profiling import ProfileStore, StackSampler, format_report
+from config.settings import Config
+
+# Registered by the app only when PROFILING_TOKEN is set, so requests pay nothing otherwise
+profiling_bp = Blueprint('profiling', __name__, url_prefix='/api/profiling')
+profile_store = ProfileStore(Config.PROFILES_PATH, keep=Config.PROFILES_KEEP)
+sampler = StackSampler()
+
+PROFILE_MODES = ('store', 'return')
+
+def is_admin():
+    """Whether the request carries the profiling token (header, or query string for browsers)"""
+    token = request.headers.get('X-Profile-Token') or request.args.get('profile_token', '')
+    # Compared as bytes: compare_digest rejects str with non-ASCII characters
+    return bool(Config.PROFILING_TOKEN) and hmac.compare_digest(token.encode(), Config.PROFILING_TOKEN.encode())
+
+def requested_profile_mode():
+    """'store' or 'return' when this request asked to be profiled, else None"""
+    mode = request.headers.get('X-Profile') or request.args.get('profile')
+    if not mode:
+        return None
+    mode = 'store' if mode == '1' else mode
+    return mode if mode in PROFILE_MODES else None
+
+@profiling_bp.before_app_request
+def start_request_profile():
+    mode = requested_profile_mode()
+    if mode is None or request.blueprint == 'profiling' or not is_admin():
+        return
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return    # another profiler already runs on this thread
+    g.request_profile = (profiler, mode, time.perf_counter())
+
+@profiling_bp.after_app_request
+def finish_request_profile(response):
+    profile = g.pop('request_profile', None)
+    if profile is None:
+        return response
+    profiler, mode, start = profile
+    profiler.disable()
+
+    # Stored profiles must not keep the token
+    query = urlencode([(key, value) for key, value in request.args.items(multi=True)
+                       if key not in ('profile', 'profile_token')])
+    meta = {
+        'method': request.method,
+        'path': f'{request.path}?{query}' if query else request.path,
+        'route': request.url_rule.rule if request.url_rule else None,
+        'status': response.status_code,
+        'duration_ms': round((time.perf_counter() - start) * 1000, 2)
+    }
+    profile_id = profile_store.save(profiler, meta)
+    if mode == 'return':
+        report = format_report(pstats.Stats(profiler), {'id': profile_id, **meta})
+        response = Response(report, content_type='text/plain; charset=utf-8')
+        response.headers['X-Profiled-Status'] = str(meta['status'])
+    response.headers['X-Profile-Id'] = profile_id
+    return response
+
+@profiling_bp.teardown_app_request
+def discard_request_profile(error=None):
+    # The response hook doesn't run when the request fails outright; never leave a profiler enabled
+    profile = g.pop('request_profile', None)
+    if profile is not None:
+        profile[0].disable()
+
+@profiling_bp.before_request
+def require_admin():
+    if not is_admin():
+        return jsonify({'success': False, 'message': 'Profiling token required'}), 403
+
+@profiling_bp.route('/requests', methods=['GET'])
+def list_request_profiles():
+    """Stored request profiles, newest first"""
+    return jsonify({'success': True, 'profiles': profile_store.list()})
+
+@profiling_bp.route('/requests/<profile_id>', methods=['GET'])
+def get_request_profile(profile_id):
+    """A stored profile as a text report, or the raw pstats dump with ?format=pstats"""
+    if request.args.get('format') == 'pstats':
+        path = profile_store.profile_path(profile_id)
+        if path is None:
+            return jsonify({'success': False, 'message': 'Profile not found'}), 404
+        return send_file(os.path.abspath(path), mimetype='application/octet-stream',
+                         as_attachment=True, download_name=f'{profile_id}.prof')
+
+    limit = request.args.get('limit', 50, type=int)
+    report = profile_store.report(profile_id, limit)
+    if report is None:
+        return jsonify({'success': False, 'message': 'Profile not found'}), 404
+    return Response(report, content_type='text/plain; charset=utf-8')
+
+@profiling_bp.route('/sampler', methods=['GET'])
+def sampler_status():
+    """Sampler status, or the stacks collected so far with ?format=folded"""
+    if request.args.get('format') == 'folded':
+        return Response(sampler.folded(), content_type='text/plain; charset=utf-8')
+    return jsonify({'success': True, 'sampler': sampler.status()})
+
+@profiling_bp.route('/sampler/start', methods=['POST'])
+def start_sampler():
+    """Start sampling every thread's stack"""
+    data = request.get_json(silent=True) or {}
+    interval_ms = data.get('interval_ms', 10)
+    max_seconds = data.get('max_seconds', 600)
+    if not isinstance(interval_ms, (int, float)) or not 1 <= interval_ms <= 1000:
+        return jsonify({'success': False, 'message': 'interval_ms must be between 1 and 1000'}), 400
+    if not isinstance(max_seconds, (int, float)) or max_seconds <= 0:
+        return jsonify({'success': False, 'message': 'max_seconds must be positive'}), 400
+
+    if not sampler.start(interval_ms, max_seconds):
+        return jsonify({'success': False, 'message': 'Sampler is already running'}), 409
+    return jsonify({'success': True, 'sampler': sampler.status()})
+
+@profiling_bp.route('/sampler/stop', methods=['POST'])
+def stop_sampler():
+    """Stop sampling and return the collected stacks in the folded (flamegraph) format"""
+    # A sampler that reached max_seconds has stopped already; its stacks are still returned
+    if not sampler.stop() and not sampler.samples:
+        return jsonify({'success': False, 'message': 'Sampler is not running'}), 409
+    return Response(sampler.folded(), content_type='text/plain; charset=utf-8')
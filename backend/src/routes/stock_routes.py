@@ -1,8 +1,15 @@
 from flask import Blueprint, request, jsonify
 from ..services.stock_service import StockService
+from ..services.indicator_engine import IndicatorEngine
+from config.settings import Config
 
 stock_bp = Blueprint('stocks', __name__, url_prefix='/api/stocks')
 stock_service = StockService()
+# Shared with the price updater (ticks) and the AI predictor (feature windows)
+indicator_engine = IndicatorEngine(
+    stock_service.get_history, refresh_interval=Config.INDICATOR_REFRESH_INTERVAL,
+    max_symbols=Config.INDICATOR_MAX_SYMBOLS, idle_timeout=Config.INDICATOR_IDLE_TIMEOUT
+)
 
 @stock_bp.route('/search', methods=['GET'])
 def search_stocks():
@@ -66,6 +73,21 @@ def get_historical_data(symbol):
     except Exception as e:
         return jsonify({'success': False, 'message': 'Failed to fetch historical data'}), 500
 
+@stock_bp.route('/indicators/<symbol>', methods=['GET'])
+def get_indicators(symbol):
+    """Get the latest technical indicators for a stock"""
+    try:
+        symbol = symbol.upper().strip()
+        indicators = indicator_engine.snapshot(symbol)
+        
+        if indicators:
+            return jsonify({'success': True, 'symbol': symbol, 'indicators': indicators})
+        else:
+            return jsonify({'success': False, 'message': 'Indicators not available'}), 404
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to fetch indicators'}), 500
+
 @stock_bp.route('/movers', methods=['GET'])
 def get_market_movers():
     """Get market movers (gainers and losers)"""
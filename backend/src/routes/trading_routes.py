@@ -1,8 +1,26 @@
 from flask import Blueprint, request, jsonify, session
 from ..services.trading_service import TradingService
+from ..services.order_book import OrderService, ORDER_STATUSES
+from ..services.order_pipeline import OrderPipeline
+from ..services.portfolio_analytics import PortfolioAnalytics
+from ..services.leaderboard import Leaderboard
+from ..services.backtester import Backtester
+from config.settings import Config
 
 trading_bp = Blueprint('trading', __name__, url_prefix='/api/trading')
 trading_service = TradingService()
+order_service = OrderService(trading_service)
+order_pipeline = OrderPipeline(trading_service, max_workers=Config.ORDER_WORKERS)
+portfolio_analytics = PortfolioAnalytics(
+    trading_service.db, trading_service.stock_service, risk_free_rate=Config.RISK_FREE_RATE
+)
+leaderboard = Leaderboard(
+    trading_service.db, trading_service.stock_service,
+    initial_balance=Config.INITIAL_BALANCE, refresh_interval=Config.LEADERBOARD_REFRESH_INTERVAL
+)
+backtester = Backtester(
+    trading_service.stock_service, max_workers=Config.BACKTEST_WORKERS, sweep_timeout=Config.BACKTEST_SWEEP_TIMEOUT
+)
 
 def require_auth():
     """Check if user is authenticated"""
@@ -27,6 +45,37 @@ def get_portfolio():
     except Exception as e:
         return jsonify({'success': False, 'message': 'Failed to fetch portfolio'}), 500
 
+@trading_bp.route('/analytics', methods=['GET'])
+def get_analytics():
+    """Get portfolio performance analytics"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        analytics = portfolio_analytics.get_analytics(username)
+        if analytics:
+            return jsonify({'success': True, 'analytics': analytics})
+        else:
+            return jsonify({'success': False, 'message': 'User not found'}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to compute analytics'}), 500
+
+@trading_bp.route('/leaderboard', methods=['GET'])
+def get_leaderboard():
+    """Get top users by total account value plus the caller's rank"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        limit = request.args.get('limit', 10, type=int)
+        limit = max(1, min(limit, 100))
+        
+        return jsonify({'success': True, 'leaderboard': leaderboard.get(username, limit)})
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to fetch leaderboard'}), 500
+
 @trading_bp.route('/buy', methods=['POST'])
 def buy_stock():
     """Buy stocks"""
@@ -93,6 +142,236 @@ def sell_stock():
     except Exception as e:
         return jsonify({'success': False, 'message': 'Sell order failed'}), 500
 
+@trading_bp.route('/basket', methods=['POST'])
+def basket_order():
+    """Execute a multi-leg basket order atomically"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        data = request.get_json()
+        legs = data.get('legs', [])
+        
+        if not isinstance(legs, list) or len(legs) == 0:
+            return jsonify({'success': False, 'message': 'Invalid legs list'}), 400
+        
+        # Limit basket size to keep the batch price fetch bounded
+        if len(legs) > 50:
+            return jsonify({'success': False, 'message': 'A basket can contain at most 50 legs'}), 400
+        
+        parsed_legs = []
+        for leg in legs:
+            if not isinstance(leg, dict):
+                return jsonify({'success': False, 'message': 'Invalid leg'}), 400
+            
+            symbol = str(leg.get('symbol', '')).strip().upper()
+            side = str(leg.get('side', '')).strip().upper()
+            
+            if not symbol:
+                return jsonify({'success': False, 'message': 'Stock symbol is required'}), 400
+            
+            if side not in ('BUY', 'SELL'):
+                return jsonify({'success': False, 'message': 'Side must be BUY or SELL'}), 400
+            
+            try:
+                shares = int(leg.get('shares', 0))
+            except (ValueError, TypeError):
+                return jsonify({'success': False, 'message': 'Invalid number of shares'}), 400
+            
+            if shares <= 0:
+                return jsonify({'success': False, 'message': 'Number of shares must be positive'}), 400
+            
+            parsed_legs.append({'symbol': symbol, 'side': side, 'shares': shares})
+        
+        result = trading_service.execute_basket(username, parsed_legs)
+        
+        if result['success']:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Basket order failed'}), 500
+
+@trading_bp.route('/order-requests', methods=['POST'])
+def submit_order_request():
+    """Queue a market order for asynchronous execution"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        data = request.get_json()
+        idempotency_key = (request.headers.get('Idempotency-Key') or data.get('idempotency_key') or '').strip()
+        side = data.get('side', '').strip().upper()
+        symbol = data.get('symbol', '').strip().upper()
+        shares = data.get('shares', 0)
+        
+        if not idempotency_key or len(idempotency_key) > 128:
+            return jsonify({'success': False, 'message': 'An Idempotency-Key of at most 128 characters is required'}), 400
+        
+        if not symbol:
+            return jsonify({'success': False, 'message': 'Stock symbol is required'}), 400
+        
+        try:
+            shares = int(shares)
+        except (ValueError, TypeError):
+            return jsonify({'success': False, 'message': 'Invalid number of shares'}), 400
+        
+        if shares <= 0:
+            return jsonify({'success': False, 'message': 'Number of shares must be positive'}), 400
+        
+        result = order_pipeline.submit(username, idempotency_key, side, symbol, shares)
+        
+        if result['success']:
+            return jsonify(result), 200 if result['duplicate'] else 202
+        elif result.get('conflict'):
+            return jsonify(result), 409
+        else:
+            return jsonify(result), 400
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to submit order'}), 500
+
+@trading_bp.route('/order-requests/<int:request_id>', methods=['GET'])
+def get_order_request(request_id):
+    """Get the status of an asynchronous order"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        order_request = order_pipeline.get_status(username, request_id)
+        if order_request:
+            return jsonify({'success': True, 'order_request': order_request})
+        else:
+            return jsonify({'success': False, 'message': 'Order request not found'}), 404
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to fetch order request'}), 500
+
+@trading_bp.route('/orders', methods=['POST'])
+def place_order():
+    """Place a limit, stop or stop-limit order"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        data = request.get_json()
+        symbol = data.get('symbol', '').strip().upper()
+        side = data.get('side', '').strip().upper()
+        order_type = data.get('order_type', '').strip().upper()
+        
+        if not symbol:
+            return jsonify({'success': False, 'message': 'Stock symbol is required'}), 400
+        
+        try:
+            shares = int(data.get('shares', 0))
+            limit_price = data.get('limit_price')
+            stop_price = data.get('stop_price')
+            limit_price = float(limit_price) if limit_price is not None else None
+            stop_price = float(stop_price) if stop_price is not None else None
+        except (ValueError, TypeError):
+            return jsonify({'success': False, 'message': 'Invalid shares or price'}), 400
+        
+        if shares <= 0:
+            return jsonify({'success': False, 'message': 'Number of shares must be positive'}), 400
+        
+        result = order_service.place_order(username, symbol, side, order_type, shares, limit_price, stop_price)
+        
+        if result['success']:
+            return jsonify(result)
+        else:
+            return jsonify(result), 400
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to place order'}), 500
+
+@trading_bp.route('/orders', methods=['GET'])
+def get_orders():
+    """List user's orders"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        status = request.args.get('status', '').strip().upper() or None
+        limit = request.args.get('limit', 50, type=int)
+        
+        if status and status not in ORDER_STATUSES:
+            return jsonify({'success': False, 'message': 'Invalid order status'}), 400
+        
+        orders = order_service.get_orders(username, status, limit)
+        return jsonify({'success': True, 'orders': orders})
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to fetch orders'}), 500
+
+@trading_bp.route('/orders/<int:order_id>', methods=['DELETE'])
+def cancel_order(order_id):
+    """Cancel a resting order"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        result = order_service.cancel_order(username, order_id)
+        
+        if result['success']:
+            return jsonify(result)
+        else:
+            return jsonify(result), 404
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Failed to cancel order'}), 500
+
+@trading_bp.route('/backtest', methods=['POST'])
+def run_backtest():
+    """Backtest a rule-based strategy, optionally sweeping its parameters"""
+    username = require_auth()
+    if not username:
+        return jsonify({'success': False, 'message': 'Authentication required'}), 401
+    
+    try:
+        data = request.get_json()
+        symbol = data.get('symbol', '').strip().upper()
+        strategy = data.get('strategy')
+        sweep = data.get('sweep')
+        period = data.get('period', '2y')
+        
+        if not symbol:
+            return jsonify({'success': False, 'message': 'Stock symbol is required'}), 400
+        
+        if not isinstance(strategy, dict) or not strategy.get('entry'):
+            return jsonify({'success': False, 'message': 'Strategy with entry conditions is required'}), 400
+        
+        if sweep is not None and (not isinstance(sweep, dict) or
+                                  not all(isinstance(values, list) and values for values in sweep.values())):
+            return jsonify({'success': False, 'message': 'Sweep must map parameter paths to lists of values'}), 400
+        
+        valid_periods = ['6mo', '1y', '2y', '5y', '10y', 'ytd', 'max']
+        if period not in valid_periods:
+            period = '2y'
+        
+        try:
+            initial_cash = float(data.get('initial_cash', 100000))
+        except (ValueError, TypeError):
+            return jsonify({'success': False, 'message': 'Invalid initial cash'}), 400
+        
+        if initial_cash <= 0:
+            return jsonify({'success': False, 'message': 'Initial cash must be positive'}), 400
+        
+        result = backtester.backtest(symbol, strategy, period, initial_cash, sweep)
+        
+        if result['success']:
+            return jsonify(result)
+        elif result.get('timeout'):
+            return jsonify(result), 504
+        else:
+            return jsonify(result), 400
+    
+    except Exception as e:
+        return jsonify({'success': False, 'message': 'Backtest failed'}), 500
+
 @trading_bp.route('/transactions', methods=['GET'])
 def get_transactions():
     """Get transaction history"""
@@ -1,22 +1,61 @@
 import numpy as np
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
-from sklearn.metrics import mean_squared_error
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
-import yfinance as yf
 from datetime import datetime, timedelta
 import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services import feature_pipeline
+from services.model_tiers import TIERS, DEFAULT_TIER, DEFAULT_LATENCY_MS, LIGHTWEIGHT_MODELS, RidgeModel, rollout
+from services.model_registry import ModelRegistry
+from services.prediction_cache import PredictionCache
+from services.tflite_backend import export_checked
+from services.market_data import yf
+from services.metrics import registry as metrics, record_cache, cache_evictions
+
+inference_seconds = metrics.histogram(
+    'model_inference_duration_seconds', 'Forecast call latency by model tier (one call may cover several symbols)',
+    ['tier']
+)
+inference_symbols = metrics.counter('model_inference_symbols_total', 'Symbols forecast by model tier', ['tier'])
+
+def _sigmoid(x):
+    return 1 / (1 + np.exp(-x))
 
 class StockPredictor:
-    def __init__(self):
+    def __init__(self, model_memory_budget_mb=512, cache_path=None, bar_check_interval=900, model_path='models',
+                 inference_backend='keras', tflite_quantize=False, retrain_epochs=5, retrain_learning_rate=1e-4,
+                 indicator_engine=None):
         self.model = None
         self.scaler = MinMaxScaler()
-        self.sequence_length = 60
-        self.model_path = 'models'
+        self.sequence_length = feature_pipeline.SEQUENCE_LENGTH
+        self.model_path = model_path
         self.ensure_model_dir()
+        # Loaded models are shared across requests; never stash per-symbol state on self
+        self.tflite_quantize = tflite_quantize
+        self.registry = ModelRegistry(
+            self.model_path, memory_budget_mb=model_memory_budget_mb, backend=inference_backend
+        )
+        self._stacked_models = OrderedDict()    # ((symbol, version), ...) -> stacked weights
+        self._stacked_lock = threading.Lock()
+        self.max_stacked_models = 8
+        self.cache = PredictionCache(cache_path or os.path.join(self.model_path, 'predictions.db'))
+        self.bar_check_interval = bar_check_interval  # seconds before re-checking for a new daily bar
+        self.training_jobs = None
+        self.retrain_epochs = retrain_epochs                # fine-tuning epochs for incremental retrains
+        self.retrain_learning_rate = retrain_learning_rate
+        # Streaming indicators shared with the stock API; without one, features are computed from the frame
+        self.indicator_engine = indicator_engine
+        # Running estimate of forecast latency per symbol for each tier, used for latency budgets
+        self.tier_latency_ms = dict(DEFAULT_LATENCY_MS)
     
     def ensure_model_dir(self):
         if not os.path.exists(self.model_path):
@@ -32,38 +71,28 @@ class StockPredictor:
             print(f"Error fetching data for {symbol}: {e}")
             return None
     
-    def prepare_data(self, data):
-        """Prepare data for LSTM model"""
-        # Use Close price and add technical indicators
-        df = data.copy()
-        df['MA_20'] = df['Close'].rolling(window=20).mean()
-        df['MA_50'] = df['Close'].rolling(window=50).mean()
-        df['RSI'] = self.calculate_rsi(df['Close'])
-        df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
-        
-        # Select features
-        features = ['Close', 'Volume', 'MA_20', 'MA_50', 'RSI', 'Volume_MA']
-        df = df[features].dropna()
-        
-        # Scale the data
-        scaled_data = self.scaler.fit_transform(df)
-        
-        # Create sequences
-        X, y = [], []
-        for i in range(self.sequence_length, len(scaled_data)):
-            X.append(scaled_data[i-self.sequence_length:i])
-            y.append(scaled_data[i, 0])  # Predict Close price
-        
-        return np.array(X), np.array(y)
-    
-    def calculate_rsi(self, prices, period=14):
-        """Calculate RSI indicator"""
-        delta = prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        return rsi
+    def prepare_data(self, data, scaler=None, fit=True):
+        """Prepare data for LSTM model.
+        
+        Fits the scaler (unless ``fit`` is False, to reuse a trained model's scaling) and
+        returns (X, y), where X is a zero-copy view of every input window over the scaled
+        features.
+        """
+        scaler = scaler or self.scaler
+        scaled_data = feature_pipeline.scale_features(feature_pipeline.feature_frame(data), scaler, fit=fit)
+        return feature_pipeline.training_windows(scaled_data, self.sequence_length)
+    
+    def _dataset(self, X, y, batch_size, shuffle):
+        """Stream windows to Keras in batches instead of materializing them all"""
+        signature = (
+            tf.TensorSpec([None, X.shape[1], X.shape[2]], tf.float32),
+            tf.TensorSpec([None], tf.float32)
+        )
+        dataset = tf.data.Dataset.from_generator(
+            lambda: feature_pipeline.batches(X, y, batch_size, shuffle=shuffle), output_signature=signature
+        )
+        steps = -(-len(X) // batch_size)
+        return dataset.apply(tf.data.experimental.assert_cardinality(steps)).prefetch(2)
     
     def build_model(self, input_shape):
         """Build LSTM neural network"""
@@ -81,136 +110,450 @@ class StockPredictor:
         model.compile(optimizer='adam', loss='mean_squared_error')
         return model
     
-    def train_model(self, symbol):
-        """Train model for specific stock"""
-        print(f"Training model for {symbol}...")
+    def train_model(self, symbol, progress=None, tier=DEFAULT_TIER):
+        """Train model for specific stock.
+        
+        ``progress(epoch, epochs, logs)`` is called after every LSTM epoch; returning True
+        stops training early and the model is discarded instead of saved.
+        """
+        print(f"Training {tier} model for {symbol}...")
         
         # Get data
         data = self.get_stock_data(symbol)
         if data is None or len(data) < 100:
             return False
         
-        # Prepare data
-        X, y = self.prepare_data(data)
+        # Prepare data with a scaler private to this training run
+        scaler = MinMaxScaler()
+        X, y = self.prepare_data(data, scaler)
         if len(X) == 0:
             return False
         
+        if tier != 'lstm':
+            return self.train_lightweight_model(symbol, tier, X, y, scaler)
+        
         # Split data
         split = int(0.8 * len(X))
         X_train, X_test = X[:split], X[split:]
         y_train, y_test = y[:split], y[split:]
         
         # Build and train model
-        self.model = self.build_model((X_train.shape[1], X_train.shape[2]))
+        model = self.build_model((X_train.shape[1], X_train.shape[2]))
         
         # Train with early stopping
         early_stop = tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=10)
+        callbacks = [early_stop]
         
-        self.model.fit(
-            X_train, y_train,
-            batch_size=32,
-            epochs=50,
-            validation_data=(X_test, y_test),
-            callbacks=[early_stop],
+        epochs = 50
+        cancelled = []
+        if progress:
+            callbacks.append(self._progress_callback(model, progress, epochs, cancelled))
+        
+        model.fit(
+            self._dataset(X_train, y_train, 32, shuffle=True),
+            epochs=epochs,
+            validation_data=self._dataset(X_test, y_test, 32, shuffle=False),
+            shuffle=False,  # the training batches are already shuffled each epoch
+            callbacks=callbacks,
             verbose=0
         )
         
+        if cancelled:
+            print(f"Training cancelled for {symbol}")
+            return False
+        
         # Save model and scaler
-        model_file = f"{self.model_path}/{symbol}_model.h5"
-        scaler_file = f"{self.model_path}/{symbol}_scaler.pkl"
+        _, scaler_file = self.registry.model_files(symbol)
         
-        self.model.save(model_file)
         with open(scaler_file, 'wb') as f:
-            pickle.dump(self.scaler, f)
+            pickle.dump(scaler, f)
+        self._save_lstm(symbol, model, X_test[-8:])
         
         print(f"Model trained and saved for {symbol}")
         return True
     
-    def load_model(self, symbol):
-        """Load trained model for symbol"""
-        model_file = f"{self.model_path}/{symbol}_model.h5"
-        scaler_file = f"{self.model_path}/{symbol}_scaler.pkl"
+    def retrain_model(self, symbol, progress=None):
+        """Fine-tune the symbol's saved LSTM on recent bars instead of training from scratch.
+        
+        Starts from the saved weights and scaler and trains for ``retrain_epochs`` at a
+        low learning rate on the last year of data. The newest windows are held out, and
+        the fine-tuned model replaces the current one only if its loss on them is no
+        higher. Returns a summary whose ``status`` is 'promoted', 'rejected', 'skipped'
+        (no model, not enough data or no bars since the model was saved) or 'cancelled'.
+        """
+        result = {'symbol': symbol, 'status': 'skipped'}
+        model_file, scaler_file = self.registry.model_files(symbol)
+        if not os.path.exists(model_file) or not os.path.exists(scaler_file):
+            result['message'] = 'No trained model'
+            return result
+        
+        # Models trained before the TFLite backend was enabled get their artifact here, whatever the retrain decides
+        if self.registry.backend == 'tflite' and not self.registry.has_tflite(model_file):
+            if export_checked(tf.keras.models.load_model(model_file, compile=False), model_file, self.tflite_quantize):
+                self.registry.invalidate(symbol)
+        
+        data = self.get_stock_data(symbol, period='1y')
+        if data is None or len(data) < 100:
+            result['message'] = 'Not enough data'
+            return result
+        if pd.Timestamp(data.index[-1]).timestamp() <= os.path.getmtime(model_file):
+            result['message'] = 'No new bars since the model was saved'
+            return result
+        
+        print(f"Fine-tuning lstm model for {symbol}...")
+        
+        # Same scaling as the saved weights were trained with
+        with open(scaler_file, 'rb') as f:
+            scaler = pickle.load(f)
+        X, y = self.prepare_data(data, scaler, fit=False)
+        holdout = max(5, len(X) // 10)
+        if len(X) < 4 * holdout:
+            result['message'] = 'Not enough data'
+            return result
+        X_train, X_val = X[:-holdout], X[-holdout:]
+        y_train, y_val = y[:-holdout], y[-holdout:]
+        
+        model = tf.keras.models.load_model(model_file, compile=False)
+        model.compile(optimizer=tf.keras.optimizers.Adam(learning_rate=self.retrain_learning_rate), loss='mean_squared_error')
+        validation = self._dataset(X_val, y_val, 32, shuffle=False)
+        baseline_loss = float(model.evaluate(validation, verbose=0))
+        
+        epochs = self.retrain_epochs
+        cancelled = []
+        callbacks = [tf.keras.callbacks.EarlyStopping(monitor='val_loss', patience=2, restore_best_weights=True)]
+        if progress:
+            callbacks.append(self._progress_callback(model, progress, epochs, cancelled))
+        
+        model.fit(
+            self._dataset(X_train, y_train, 32, shuffle=True),
+            epochs=epochs,
+            validation_data=validation,
+            shuffle=False,
+            callbacks=callbacks,
+            verbose=0
+        )
+        
+        if cancelled:
+            print(f"Fine-tuning cancelled for {symbol}")
+            result['status'] = 'cancelled'
+            return result
+        
+        candidate_loss = float(model.evaluate(validation, verbose=0))
+        result.update(baseline_loss=baseline_loss, candidate_loss=candidate_loss)
+        if candidate_loss > baseline_loss:
+            print(f"Kept current model for {symbol}: val loss {baseline_loss:.6f} -> {candidate_loss:.6f}")
+            result['status'] = 'rejected'
+            return result
+        
+        self._save_lstm(symbol, model, X_val[-8:])
+        print(f"Fine-tuned model promoted for {symbol}: val loss {baseline_loss:.6f} -> {candidate_loss:.6f}")
+        result['status'] = 'promoted'
+        return result
+    
+    def _progress_callback(self, model, progress, epochs, cancelled):
+        """Report each epoch to ``progress`` and stop training when it asks to cancel"""
+        def on_epoch_end(epoch, logs):
+            if progress(epoch + 1, epochs, logs or {}):
+                cancelled.append(True)
+                model.stop_training = True
+        return tf.keras.callbacks.LambdaCallback(on_epoch_end=on_epoch_end)
+    
+    def _save_lstm(self, symbol, model, windows):
+        """Save a trained LSTM as the symbol's current model and drop stale copies"""
+        model_file, _ = self.registry.model_files(symbol)
+        model.save(model_file)
+        # Exported alongside the Keras file so TFLite deployments never convert at request time
+        if self.registry.backend == 'tflite':
+            export_checked(model, model_file, self.tflite_quantize, windows)
+        self.registry.invalidate(symbol)
+        self.cache.invalidate(symbol, 'lstm')
+    
+    def train_lightweight_model(self, symbol, tier, X, y, scaler):
+        """Fit a fast-tier model on every window; takes well under a second"""
+        model = LIGHTWEIGHT_MODELS[tier]().fit(X, y)
+        
+        model_file, = self.registry.model_files(symbol, tier)
+        with open(model_file, 'wb') as f:
+            pickle.dump({'model': model, 'scaler': scaler}, f)
+        self.registry.invalidate(symbol, tier)
+        self.cache.invalidate(symbol, tier)
+        
+        print(f"{tier} model trained and saved for {symbol}")
+        return True
+    
+    def select_tier(self, tier=None, latency_budget_ms=None, count=1):
+        """Pick the model tier for a request.
         
-        if os.path.exists(model_file) and os.path.exists(scaler_file):
-            self.model = tf.keras.models.load_model(model_file)
-            with open(scaler_file, 'rb') as f:
-                self.scaler = pickle.load(f)
-            return True
-        return False
+        An explicit tier wins. With a latency budget, the most accurate tier whose
+        estimated forecast time for ``count`` symbols fits is used, falling back to the
+        fastest tier.
+        """
+        if tier:
+            if tier not in TIERS:
+                raise ValueError(f'Unknown model tier: {tier}')
+            return tier
+        if latency_budget_ms is None:
+            return DEFAULT_TIER
+        for candidate in TIERS:
+            if self.tier_latency_ms[candidate] * count <= latency_budget_ms:
+                return candidate
+        return min(TIERS, key=lambda candidate: self.tier_latency_ms[candidate])
+    
+    def record_latency(self, tier, seconds, count=1):
+        """Fold an observed forecast time into the tier's running per-symbol estimate"""
+        inference_seconds.observe(seconds, tier=tier)
+        inference_symbols.inc(count, tier=tier)
+        per_symbol = seconds * 1000 / count
+        self.tier_latency_ms[tier] = 0.8 * self.tier_latency_ms[tier] + 0.2 * per_symbol
+    
+    def set_training_jobs(self, training_jobs):
+        """Queue missing models on a TrainingJobManager instead of training inline"""
+        self.training_jobs = training_jobs
     
-    def predict_trend(self, symbol, days=5):
+    def pending_prediction(self, symbol):
+        """Placeholder returned while a symbol's first model is trained in the background"""
+        job = self.training_jobs.submit(symbol)['job']
+        return {'symbol': symbol, 'status': 'pending', 'job': job}
+    
+    def load_model(self, symbol, tier=DEFAULT_TIER):
+        """Load trained model for symbol; returns the registry entry or None"""
+        return self.registry.get(symbol, tier)
+    
+    def predict_trend(self, symbol, days=5, tier=None, latency_budget_ms=None):
         """Predict stock trend for next few days"""
+        tier = self.select_tier(tier, latency_budget_ms)
         try:
-            # Load or train model
-            if not self.load_model(symbol):
-                if not self.train_model(symbol):
+            cached = self.cached_prediction(symbol, days, tier)
+            if cached:
+                return cached
+            
+            # Load or train model; only the LSTM is slow enough to need a background job
+            entry = self.load_model(symbol, tier)
+            if entry is None:
+                if tier == 'lstm' and self.training_jobs:
+                    return self.pending_prediction(symbol)
+                if not self.train_model(symbol, tier=tier):
                     return None
+                entry = self.load_model(symbol, tier)
+                if entry is None:
+                    return None
+            scaler = entry['scaler']
             
             # Get recent data
             data = self.get_stock_data(symbol, period='6mo')
-            if data is None:
+            if data is None or data.empty:
                 return None
             
-            # Prepare recent data
-            df = data.copy()
-            df['MA_20'] = df['Close'].rolling(window=20).mean()
-            df['MA_50'] = df['Close'].rolling(window=50).mean()
-            df['RSI'] = self.calculate_rsi(df['Close'])
-            df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
-            
-            features = ['Close', 'Volume', 'MA_20', 'MA_50', 'RSI', 'Volume_MA']
-            df = df[features].dropna()
+            last_bar = self.record_latest_bar(symbol, data)
+            cached = self.cache.get(symbol, tier, entry['version'], last_bar, days)
+            if cached:
+                return cached
             
-            if len(df) < self.sequence_length:
+            start = time.perf_counter()
+            prepared = self.prepare_window(data, scaler, symbol)
+            if prepared is None:
                 return None
+            last_sequence, current_price = prepared
             
-            # Scale recent data
-            scaled_data = self.scaler.transform(df)
-            
-            # Get last sequence
-            last_sequence = scaled_data[-self.sequence_length:].reshape(1, self.sequence_length, -1)
-            
-            # Predict next prices
-            predictions = []
-            current_sequence = last_sequence.copy()
-            
-            for _ in range(days):
-                pred = self.model.predict(current_sequence, verbose=0)[0, 0]
-                predictions.append(pred)
-                
-                # Update sequence for next prediction
-                new_row = current_sequence[0, -1, :].copy()
-                new_row[0] = pred  # Update close price
-                new_row = new_row.reshape(1, 1, -1)
-                current_sequence = np.concatenate([current_sequence[:, 1:, :], new_row], axis=1)
-            
-            # Inverse transform predictions
-            dummy_array = np.zeros((len(predictions), scaled_data.shape[1]))
-            dummy_array[:, 0] = predictions
-            predicted_prices = self.scaler.inverse_transform(dummy_array)[:, 0]
-            
-            # Get current price
-            current_price = df['Close'].iloc[-1]
+            # Predict next prices in one rollout
+            predictions = self.forecast(entry, last_sequence, days)[0]
+            self.record_latency(tier, time.perf_counter() - start)
             
-            # Calculate trend
-            future_price = predicted_prices[-1]
-            trend_change = (future_price - current_price) / current_price * 100
-            
-            return {
-                'symbol': symbol,
-                'current_price': float(current_price),
-                'predicted_price': float(future_price),
-                'trend_change': float(trend_change),
-                'prediction_days': days,
-                'confidence': self.calculate_confidence(trend_change),
-                'recommendation': self.get_recommendation(trend_change),
-                'predicted_prices': [float(p) for p in predicted_prices]
-            }
+            prediction = self.build_prediction(symbol, days, current_price, predictions, scaler)
+            self.cache.put(symbol, tier, entry['version'], last_bar, days, prediction)
+            return prediction
             
         except Exception as e:
             print(f"Prediction error for {symbol}: {e}")
             return None
     
+    def cached_prediction(self, symbol, days, tier=DEFAULT_TIER):
+        """Cached result for the current model and latest bar, without fetching market data"""
+        version = self.registry.version(symbol, tier)
+        last_bar = self.cache.latest_bar(symbol, self.bar_check_interval)
+        if version is None or last_bar is None:
+            return None
+        return self.cache.get(symbol, tier, version, last_bar, days)
+    
+    def record_latest_bar(self, symbol, data):
+        """Remember the newest bar in freshly fetched data so repeat requests can skip the fetch"""
+        last_bar = data.index[-1].isoformat()
+        self.cache.set_latest_bar(symbol, last_bar)
+        return last_bar
+    
+    def prepare_window(self, data, scaler, symbol=None):
+        """Build the scaled (1, sequence_length, features) input window from recent data.
+        
+        With an indicator engine, ``data`` only advances the symbol's streaming indicators
+        and the window comes from their feature rows, so nothing is recomputed over the
+        history. Returns (window, current_price) or None if there isn't enough history.
+        """
+        if self.indicator_engine is not None and symbol:
+            self.indicator_engine.sync(symbol, data)
+            df = self.indicator_engine.window(symbol, self.sequence_length)
+            if df is None:
+                return None
+        else:
+            df = feature_pipeline.feature_frame(data)
+            if len(df) < self.sequence_length:
+                return None
+            df = df.iloc[-self.sequence_length:]
+        
+        # Only the last window needs scaling
+        scaled_data = feature_pipeline.scale_features(df, scaler)
+        last_sequence = feature_pipeline.latest_window(scaled_data, self.sequence_length)
+        return last_sequence, float(df['Close'].iloc[-1])
+    
+    def build_prediction(self, symbol, days, current_price, predictions, scaler):
+        """Turn scaled close forecasts into the prediction dict returned by the API"""
+        # Inverse transform predictions
+        dummy_array = np.zeros((len(predictions), scaler.n_features_in_))
+        dummy_array[:, 0] = predictions
+        predicted_prices = scaler.inverse_transform(dummy_array)[:, 0]
+        
+        # Calculate trend
+        future_price = predicted_prices[-1]
+        trend_change = (future_price - current_price) / current_price * 100
+        
+        return {
+            'symbol': symbol,
+            'current_price': float(current_price),
+            'predicted_price': float(future_price),
+            'trend_change': float(trend_change),
+            'prediction_days': days,
+            'confidence': self.calculate_confidence(trend_change),
+            'recommendation': self.get_recommendation(trend_change),
+            'predicted_prices': [float(p) for p in predicted_prices]
+        }
+    
+    def _rollout(self, entry):
+        """Compiled multi-day forecast for a loaded model, built once per registry entry.
+        
+        The autoregressive loop runs inside the graph, so a whole forecast is a single
+        call instead of one Keras ``predict`` (and one window copy) per day.
+        """
+        rollout = entry.get('rollout')
+        if rollout is not None:
+            return rollout
+        
+        model = entry['model']
+        n_features = model.input_shape[-1]
+        
+        @tf.function(input_signature=[
+            tf.TensorSpec([None, self.sequence_length, n_features], tf.float32),
+            tf.TensorSpec([], tf.int32)
+        ])
+        def rollout(window, days):
+            predictions = tf.TensorArray(tf.float32, size=days)
+            for i in tf.range(days):
+                pred = model(window, training=False)[:, 0]
+                predictions = predictions.write(i, pred)
+                # Next input row repeats the last row with Close replaced by the prediction
+                new_row = tf.concat([pred[:, None], window[:, -1, 1:]], axis=1)
+                window = tf.concat([window[:, 1:, :], new_row[:, None, :]], axis=1)
+            return tf.transpose(predictions.stack())
+        
+        entry['rollout'] = rollout
+        return rollout
+    
+    def forecast(self, entry, windows, days):
+        """Forecast ``days`` scaled closes for a batch of windows; returns (batch, days)"""
+        windows = np.asarray(windows, dtype=np.float32)
+        if entry['backend'] != 'keras':
+            return entry['model'].forecast(windows, days)
+        return self._rollout(entry)(tf.constant(windows), tf.constant(days, dtype=tf.int32)).numpy()
+    
+    @staticmethod
+    def _layer_specs(model):
+        """Describe a model as plain LSTM/Dense steps, or None if it has other layers"""
+        specs = []
+        for layer in model.layers:
+            name = layer.__class__.__name__
+            config = layer.get_config()
+            if name == 'Dropout':
+                continue    # inactive at inference
+            if name == 'LSTM' and config['activation'] == 'tanh' and config['recurrent_activation'] == 'sigmoid' \
+                    and config['use_bias']:
+                specs.append(('lstm', config['return_sequences'], layer.get_weights()))
+            elif name == 'Dense' and config['activation'] == 'linear' and config['use_bias']:
+                specs.append(('dense', False, layer.get_weights()))
+            else:
+                return None
+        return specs
+    
+    def _stacked_model(self, entries):
+        """Weights of same-architecture models stacked along a leading symbol axis.
+        
+        Built once per set of (symbol, model version) and kept in a small LRU; evicted
+        stacks release their copies of the weights.
+        """
+        key = tuple((entry['symbol'], entry['version']) for entry in entries)
+        with self._stacked_lock:
+            stacked = self._stacked_models.get(key)
+            record_cache('stacked_models', stacked is not None)
+            if stacked is not None:
+                self._stacked_models.move_to_end(key)
+                return stacked
+        
+        per_model = [self._layer_specs(entry['model']) for entry in entries]
+        stacked = []
+        for layers in zip(*per_model):
+            kind, return_sequences, _ = layers[0]
+            weights = [np.stack([layer[2][i] for layer in layers]).astype(np.float32) for i in range(len(layers[0][2]))]
+            stacked.append((kind, return_sequences, weights))
+        
+        with self._stacked_lock:
+            self._stacked_models[key] = stacked
+            while len(self._stacked_models) > self.max_stacked_models:
+                self._stacked_models.popitem(last=False)
+                cache_evictions.inc(cache='stacked_models')
+        return stacked
+    
+    @staticmethod
+    def _stacked_forward(stacked, x):
+        """One forward pass of n stacked models over x of shape (n, timesteps, features)"""
+        for kind, return_sequences, weights in stacked:
+            if kind == 'dense':
+                kernel, bias = weights
+                x = np.einsum('ni,nio->no', x, kernel) + bias
+                continue
+            
+            kernel, recurrent_kernel, bias = weights
+            units = recurrent_kernel.shape[1]
+            # Input projections for every timestep in one batched matmul; gates are i, f, c, o
+            inputs = np.einsum('ntf,nfg->ntg', x, kernel) + bias[:, None, :]
+            h = np.zeros((x.shape[0], units), dtype=np.float32)
+            c = np.zeros_like(h)
+            outputs = []
+            for t in range(inputs.shape[1]):
+                z = inputs[:, t] + np.einsum('nu,nug->ng', h, recurrent_kernel)
+                i, f, g, o = np.split(z, 4, axis=1)
+                c = _sigmoid(f) * c + _sigmoid(i) * np.tanh(g)
+                h = _sigmoid(o) * np.tanh(c)
+                if return_sequences:
+                    outputs.append(h)
+            x = np.stack(outputs, axis=1) if return_sequences else h
+        return x
+    
+    def forecast_group(self, entries, windows, days):
+        """Forecast one window per entry; returns (len(entries), days).
+        
+        Models with the same plain LSTM/Dense stack, or ridge models, run as a single
+        batched forward pass per day with their weights stacked, instead of one model
+        call per symbol.
+        """
+        windows = np.asarray(windows, dtype=np.float32)
+        if len(entries) == 1:
+            return self.forecast(entries[0], windows, days)
+        
+        if entries[0]['tier'] == 'ridge':
+            return RidgeModel.forecast_many([entry['model'] for entry in entries], windows, days)
+        if entries[0]['backend'] != 'keras':
+            return np.concatenate([self.forecast(entry, windows[i:i + 1], days) for i, entry in enumerate(entries)])
+        
+        stacked = self._stacked_model(entries)
+        return rollout(lambda batch: self._stacked_forward(stacked, batch)[:, 0], windows, days)
+    
     def calculate_confidence(self, trend_change):
         """Calculate confidence based on trend magnitude"""
         abs_change = abs(trend_change)
@@ -230,11 +573,91 @@ class StockPredictor:
         else:
             return 'HOLD'
     
-    def get_multiple_predictions(self, symbols):
-        """Get predictions for multiple symbols"""
+    def get_multiple_predictions(self, symbols, days=5, tier=None, latency_budget_ms=None):
+        """Get predictions for multiple symbols.
+        
+        Input windows are fetched and models loaded concurrently. Symbols whose models
+        share an architecture are then forecast together, one batched forward pass per day.
+        A latency budget applies to the whole batch.
+        """
+        order = list(dict.fromkeys(symbols))
+        tier = self.select_tier(tier, latency_budget_ms, count=len(order))
         predictions = {}
+        for symbol in order:
+            cached = self.cached_prediction(symbol, days, tier)
+            if cached:
+                predictions[symbol] = cached
+        
+        # Only cache misses go through the batched pipeline
+        symbols = [symbol for symbol in order if symbol not in predictions]
+        if not symbols:
+            return predictions
+        
+        def load(symbol):
+            try:
+                return self.load_model(symbol, tier)
+            except Exception as e:
+                print(f"Model load error for {symbol}: {e}")
+                return None
+        
+        workers = min(16, len(symbols))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            entries = dict(zip(symbols, pool.map(load, symbols)))
+            recent = dict(zip(symbols, pool.map(lambda symbol: self.get_stock_data(symbol, period='6mo'), symbols)))
+        
+        groups = {}
+        untrained = []
         for symbol in symbols:
-            pred = self.predict_trend(symbol)
+            entry = entries[symbol]
+            if entry is None:
+                untrained.append(symbol)
+                continue
+            
+            data = recent[symbol]
+            if data is None or data.empty:
+                continue
+            
+            last_bar = self.record_latest_bar(symbol, data)
+            cached = self.cache.get(symbol, tier, entry['version'], last_bar, days)
+            if cached:
+                predictions[symbol] = cached
+                continue
+            
+            prepared = self.prepare_window(data, entry['scaler'], symbol)
+            if prepared is None:
+                continue
+            
+            # Group by layer stack and weight shapes; unsupported stacks forecast on their own
+            specs = self._layer_specs(entry['model']) if entry['backend'] == 'keras' else None
+            if tier == 'ridge':
+                key = (tier, prepared[0].shape)
+            elif specs:
+                key = tuple((kind, rs, tuple(w.shape for w in weights)) for kind, rs, weights in specs)
+            else:
+                key = symbol
+            group = groups.setdefault(key, {'entries': [], 'windows': [], 'prices': [], 'bars': []})
+            group['entries'].append(entry)
+            group['windows'].append(prepared[0])
+            group['prices'].append(prepared[1])
+            group['bars'].append(last_bar)
+        
+        for group in groups.values():
+            try:
+                start = time.perf_counter()
+                forecasts = self.forecast_group(group['entries'], np.concatenate(group['windows']), days)
+                self.record_latency(tier, time.perf_counter() - start, count=len(group['entries']))
+            except Exception as e:
+                print(f"Batch prediction error for {[entry['symbol'] for entry in group['entries']]}: {e}")
+                continue
+            for entry, price, last_bar, forecast in zip(group['entries'], group['prices'], group['bars'], forecasts):
+                prediction = self.build_prediction(entry['symbol'], days, price, forecast, entry['scaler'])
+                self.cache.put(entry['symbol'], tier, entry['version'], last_bar, days, prediction)
+                predictions[entry['symbol']] = prediction
+        
+        # Symbols without a model are queued for training, or trained inline without a job manager
+        for symbol in untrained:
+            pred = self.predict_trend(symbol, days, tier)
             if pred:
                 predictions[symbol] = pred
-        return predictions
\ No newline at end of file
+        
+        return {symbol: predictions[symbol] for symbol in order if symbol in predictions}
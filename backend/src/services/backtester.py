@@ -0,0 +1,241 @@
+import copy
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from typing import Dict, List, Optional
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.indicators import add_indicators, indicator_series
+from services.portfolio_analytics import TRADING_DAYS
+from services.pool_workers import sweep_worker
+
+COMPARISONS = {
+    '<': np.less,
+    '<=': np.less_equal,
+    '>': np.greater,
+    '>=': np.greater_equal,
+}
+CROSSES = ('crosses_above', 'crosses_below')
+MAX_SWEEP_RUNS = 200
+
+
+def _operand(df: pd.DataFrame, value) -> np.ndarray:
+    """A condition operand is either a number or the name of an indicator"""
+    if isinstance(value, str):
+        return indicator_series(df, value).to_numpy(dtype=float)
+    return np.full(len(df), float(value))
+
+
+def _signal(df: pd.DataFrame, conditions: List[Dict]) -> np.ndarray:
+    """AND together a list of conditions into one boolean array over all bars"""
+    signal = np.ones(len(df), dtype=bool)
+    for condition in conditions:
+        left = _operand(df, condition['indicator'])
+        right = _operand(df, condition['value'])
+        op = condition['op']
+
+        with np.errstate(invalid='ignore'):
+            if op in COMPARISONS:
+                result = COMPARISONS[op](left, right)
+            elif op in CROSSES:
+                above = left > right
+                prev_above = np.concatenate([[False], above[:-1]])
+                below = left < right
+                prev_below = np.concatenate([[False], below[:-1]])
+                result = above & prev_below if op == 'crosses_above' else below & prev_above
+            else:
+                raise ValueError(f'Unknown operator: {op}')
+
+        signal &= result & ~np.isnan(left) & ~np.isnan(right)
+    return signal
+
+
+def run_backtest(df: pd.DataFrame, strategy: Dict, initial_cash: float = 100000,
+                 include_curve: bool = True) -> Dict:
+    """Replay a long-only rule strategy over OHLCV history.
+
+    Signals are evaluated at each bar's close and filled at the next bar's open.
+    Entries buy whole shares with ``position_size`` of available cash; exits sell the
+    whole position. Holdings use the same average-cost accounting as
+    ``Database.update_portfolio``.
+    """
+    df = add_indicators(df)
+    entry = _signal(df, strategy.get('entry', []))
+    exit_ = _signal(df, strategy.get('exit', [])) if strategy.get('exit') else np.zeros(len(df), dtype=bool)
+    position_size = float(strategy.get('position_size', 1.0))
+
+    # Desired state is whichever signal fired last: 1 = long, 0 = flat
+    desired = pd.Series(np.where(exit_, 0.0, np.where(entry, 1.0, np.nan))).ffill().fillna(0.0).to_numpy()
+    # Act on the next bar's open
+    held = np.concatenate([[0.0], desired[:-1]])
+    changes = np.flatnonzero(np.diff(np.concatenate([[0.0], held])))
+
+    opens = df['Open'].to_numpy(dtype=float)
+    closes = df['Close'].to_numpy(dtype=float)
+
+    cash = initial_cash
+    shares = 0
+    avg_price = 0.0
+    cash_after = np.empty(len(changes))
+    shares_after = np.empty(len(changes))
+    trades = []
+
+    # Only trade events are walked; bar-level series are filled in vectorized below
+    for i, bar in enumerate(changes):
+        price = opens[bar]
+        if held[bar] > 0 and shares == 0:
+            quantity = int(cash * position_size // price)
+            if quantity > 0:
+                total_cost = (shares * avg_price) + (quantity * price)
+                shares += quantity
+                avg_price = total_cost / shares
+                cash -= quantity * price
+                trades.append({'date': df.index[bar].strftime('%Y-%m-%d'), 'type': 'BUY',
+                               'shares': quantity, 'price': round(float(price), 2)})
+        elif held[bar] == 0 and shares > 0:
+            cash += shares * price
+            trades.append({'date': df.index[bar].strftime('%Y-%m-%d'), 'type': 'SELL', 'shares': shares,
+                           'price': round(float(price), 2), 'pnl': round(float((price - avg_price) * shares), 2)})
+            shares = 0
+            avg_price = 0.0
+        cash_after[i] = cash
+        shares_after[i] = shares
+
+    # Forward-fill cash and shares from each trade event across the bars that follow it
+    if len(changes):
+        event_index = np.searchsorted(changes, np.arange(len(df)), side='right') - 1
+        cash_series = np.where(event_index >= 0, cash_after[event_index], initial_cash)
+        shares_series = np.where(event_index >= 0, shares_after[event_index], 0)
+    else:
+        cash_series = np.full(len(df), float(initial_cash))
+        shares_series = np.zeros(len(df))
+    equity = cash_series + shares_series * closes
+
+    returns = np.diff(equity) / equity[:-1]
+    volatility = returns.std(ddof=1) if len(returns) > 1 else 0.0
+    sharpe = returns.mean() / volatility * np.sqrt(TRADING_DAYS) if volatility > 0 else 0.0
+    drawdown = equity / np.maximum.accumulate(equity) - 1
+    sells = [trade for trade in trades if trade['type'] == 'SELL']
+    years = len(df) / TRADING_DAYS
+
+    stats = {
+        'initial_cash': round(initial_cash, 2),
+        'final_equity': round(float(equity[-1]), 2),
+        'total_return': round(float(equity[-1] / initial_cash - 1) * 100, 2),
+        'annualized_return': round(float((equity[-1] / initial_cash) ** (1 / years) - 1) * 100, 2) if years > 0 else 0.0,
+        'annualized_volatility': round(float(volatility * np.sqrt(TRADING_DAYS)) * 100, 2),
+        'sharpe_ratio': round(float(sharpe), 2),
+        'max_drawdown': round(float(drawdown.min()) * 100, 2),
+        'num_trades': len(trades),
+        'win_rate': round(sum(1 for trade in sells if trade['pnl'] > 0) / len(sells) * 100, 2) if sells else 0.0,
+        'buy_and_hold_return': round(float(closes[-1] / opens[0] - 1) * 100, 2),
+        'exposure': round(float(held.mean()) * 100, 2)
+    }
+
+    result = {'stats': stats, 'trades': trades}
+    if include_curve:
+        result['equity_curve'] = [
+            {'date': date.strftime('%Y-%m-%d'), 'value': round(float(value), 2)}
+            for date, value in zip(df.index, equity)
+        ]
+    return result
+
+
+def apply_params(strategy: Dict, params: Dict) -> Dict:
+    """Return a copy of ``strategy`` with dotted paths like ``entry.0.value`` replaced"""
+    strategy = copy.deepcopy(strategy)
+    for path, value in params.items():
+        target = strategy
+        keys = path.split('.')
+        for key in keys[:-1]:
+            target = target[int(key)] if isinstance(target, list) else target[key]
+        last = keys[-1]
+        if isinstance(target, list):
+            target[int(last)] = value
+        else:
+            target[last] = value
+    return strategy
+
+
+class Backtester:
+    """Rule-based strategy backtests over historical bars"""
+
+    def __init__(self, stock_service, max_workers: Optional[int] = None, sweep_timeout: float = 60):
+        self.stock_service = stock_service
+        self.max_workers = max_workers
+        self.sweep_timeout = sweep_timeout    # seconds a whole sweep may take
+        self._executor = None
+        self._executor_lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Created on first sweep so single backtests never pay for worker processes.
+        # Spawned rather than forked: forking a threaded process that may have TensorFlow loaded is unsafe
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+
+    def backtest(self, symbol: str, strategy: Dict, period: str = '2y', initial_cash: float = 100000,
+                 sweep: Optional[Dict[str, List]] = None) -> Dict:
+        """Run a single backtest, or a parameter sweep spread over a process pool"""
+        data = self.stock_service.get_history(symbol, period)
+        if data is None or len(data) < 60:
+            return {'success': False, 'message': f'Not enough history for {symbol}'}
+
+        data = data[['Open', 'High', 'Low', 'Close', 'Volume']]
+
+        try:
+            if not sweep:
+                result = run_backtest(data, strategy, initial_cash)
+                return {'success': True, 'symbol': symbol, 'period': period, **result}
+
+            paths = list(sweep.keys())
+            grid = [dict(zip(paths, values)) for values in itertools.product(*sweep.values())]
+            if len(grid) > MAX_SWEEP_RUNS:
+                return {'success': False, 'message': f'Sweep is limited to {MAX_SWEEP_RUNS} combinations'}
+
+            # Validate every variant up front so a bad path fails the request, not a worker
+            variants = [apply_params(strategy, params) for params in grid]
+
+            futures = [
+                self._pool().submit(sweep_worker, data, variant, params, initial_cash)
+                for variant, params in zip(variants, grid)
+            ]
+            deadline = time.monotonic() + self.sweep_timeout
+            try:
+                runs = [future.result(timeout=max(0, deadline - time.monotonic())) for future in futures]
+            except TimeoutError:
+                # Runs not yet started are dropped; ones already running finish in the background
+                for future in futures:
+                    future.cancel()
+                return {
+                    'success': False,
+                    'timeout': True,
+                    'message': f'Sweep did not finish within {self.sweep_timeout:g} seconds'
+                }
+            ranked = sorted(
+                (run for run in runs if 'stats' in run),
+                key=lambda run: run['stats']['total_return'], reverse=True
+            )
+
+            best = None
+            if ranked:
+                best_result = run_backtest(data, apply_params(strategy, ranked[0]['params']), initial_cash)
+                best = {'params': ranked[0]['params'], **best_result}
+
+            return {
+                'success': True,
+                'symbol': symbol,
+                'period': period,
+                'runs': ranked + [run for run in runs if 'error' in run],
+                'best': best
+            }
+        except (KeyError, IndexError, TypeError, ValueError) as e:
+            return {'success': False, 'message': f'Invalid strategy: {e}'}
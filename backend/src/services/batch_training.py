@@ -0,0 +1,180 @@
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.training_jobs import TrainingJobManager, TRAINING_MODES
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+
+class TrainingManifest:
+    """Progress of a batch training run, persisted as JSON after every change.
+
+    Each symbol is ``pending``, ``queued``, ``completed``, ``failed`` or ``cancelled``,
+    with its attempt count, job id and last message. The file is replaced atomically,
+    so an interrupted run leaves a readable manifest to resume from: completed symbols
+    are skipped, and symbols left queued are trained again.
+    """
+
+    def __init__(self, path: str, mode: str = 'full'):
+        self.path = path
+        self._lock = threading.RLock()
+        if os.path.exists(path):
+            with open(path) as f:
+                self.data = json.load(f)
+        else:
+            self.data = {'mode': mode, 'created_at': _now(), 'updated_at': None, 'symbols': {}}
+
+    @property
+    def mode(self) -> str:
+        return self.data['mode']
+
+    def add(self, symbols: Iterable[str]) -> int:
+        """Add symbols not in the manifest yet; returns how many were new"""
+        added = 0
+        with self._lock:
+            for symbol in symbols:
+                symbol = symbol.strip().upper()
+                if symbol and symbol not in self.data['symbols']:
+                    self.data['symbols'][symbol] = {
+                        'status': 'pending', 'attempts': 0, 'job_id': None, 'message': None, 'finished_at': None
+                    }
+                    added += 1
+            self.save()
+        return added
+
+    def todo(self, max_attempts: int) -> List[str]:
+        """Symbols still to train: not completed, and failures with attempts left"""
+        with self._lock:
+            return [
+                symbol for symbol, entry in self.data['symbols'].items()
+                if entry['status'] != 'completed' and (entry['status'] != 'failed' or entry['attempts'] < max_attempts)
+            ]
+
+    def mark(self, symbol: str, status: str, **fields):
+        with self._lock:
+            entry = self.data['symbols'][symbol]
+            entry.update(fields, status=status)
+            if status in ('completed', 'failed', 'cancelled'):
+                entry['finished_at'] = _now()
+            self.save()
+
+    def counts(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {}
+            for entry in self.data['symbols'].values():
+                counts[entry['status']] = counts.get(entry['status'], 0) + 1
+            return counts
+
+    def save(self):
+        with self._lock:
+            self.data['updated_at'] = _now()
+            directory = os.path.dirname(self.path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(self.data, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+
+class BatchTrainer:
+    """Trains a list of symbols on a training job pool, recording progress in a manifest.
+
+    Every symbol goes through ``TrainingJobManager``, so the jobs show up in the training
+    job API, can be cancelled there, and are never run twice at once: a symbol that
+    another process is already training stays pending for the next run.
+    """
+
+    def __init__(self, manager: TrainingJobManager, manifest: TrainingManifest, max_attempts: int = 2):
+        self.manager = manager
+        self.manifest = manifest
+        self.max_attempts = max_attempts
+        self._outstanding = {}    # job_id -> symbol
+        self._lock = threading.RLock()
+        self._done = threading.Event()
+        manager.set_notifier(self._finished)
+
+    def _finished(self, job: Optional[Dict]):
+        if not job:
+            return
+        with self._lock:
+            symbol = self._outstanding.pop(job['job_id'], None)
+            if symbol is None:
+                return
+            self.manifest.mark(symbol, job['status'].lower(), message=job['message'])
+            print(f"{symbol}: {job['status']} - {job['message']} ({self._progress()})")
+            if not self._outstanding:
+                self._done.set()
+
+    def _progress(self) -> str:
+        return ', '.join(f'{count} {status}' for status, count in sorted(self.manifest.counts().items()))
+
+    def run(self) -> Dict[str, int]:
+        """Train every symbol still to do and wait for them; returns the status counts"""
+        symbols = self.manifest.todo(self.max_attempts)
+        print(f"Training {len(symbols)} symbols ({self.manifest.mode}) on {self.manager.max_workers} processes "
+              f"with {self.manager.intra_op_threads} intra-op / {self.manager.inter_op_threads} inter-op threads each")
+        start = time.time()
+
+        with self._lock:
+            for symbol in symbols:
+                attempts = self.manifest.data['symbols'][symbol]['attempts']
+                result = self.manager.submit(symbol, mode=self.manifest.mode)
+                job = result['job']
+                if result['duplicate']:
+                    self.manifest.mark(symbol, 'pending', message=f"Job {job['job_id']} already active")
+                    continue
+                self.manifest.mark(symbol, 'queued', attempts=attempts + 1, job_id=job['job_id'], message=None)
+                self._outstanding[job['job_id']] = symbol
+            if not self._outstanding:
+                self._done.set()
+
+        try:
+            # Waiting in short slices keeps the main thread responsive to Ctrl+C
+            while not self._done.wait(1):
+                pass
+        except KeyboardInterrupt:
+            print('Interrupted: cancelling outstanding jobs; completed symbols are kept in the manifest')
+            self.cancel()
+            raise
+        finally:
+            self.manager.shutdown()
+
+        elapsed = time.time() - start
+        print(f"Finished in {elapsed / 60:.1f} min ({self._progress()})")
+        return self.manifest.counts()
+
+    def cancel(self):
+        with self._lock:
+            job_ids = list(self._outstanding)
+        for job_id in job_ids:
+            self.manager.cancel(job_id)
+
+
+def train_symbols(symbols: Iterable[str], manifest_path: str, mode: Optional[str] = None, max_workers: int = 1,
+                  predictor_options: Optional[Dict] = None, store_path: str = 'models/training_jobs.db',
+                  intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None,
+                  max_attempts: int = 2) -> Dict[str, int]:
+    """Train ``symbols`` (added to the manifest at ``manifest_path``) and any it has left to do.
+
+    ``mode`` defaults to the manifest's mode when resuming, and to ``full`` otherwise.
+    """
+    if mode is not None and mode not in TRAINING_MODES:
+        raise ValueError(f"Unknown training mode: {mode}")
+    manifest = TrainingManifest(manifest_path, mode or 'full')
+    if mode is not None and manifest.mode != mode:
+        raise ValueError(f"Manifest {manifest_path} is for {manifest.mode} training, not {mode}")
+    manifest.add(symbols)
+
+    manager = TrainingJobManager(
+        store_path, max_workers=max_workers, predictor_options=predictor_options,
+        intra_op_threads=intra_op_threads, inter_op_threads=inter_op_threads
+    )
+    return BatchTrainer(manager, manifest, max_attempts).run()
@@ -0,0 +1,57 @@
+from typing import Iterator, Optional, Tuple
+import sys
+import os
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.indicators import add_indicators
+
+FEATURES = ['Close', 'Volume', 'MA_20', 'MA_50', 'RSI', 'Volume_MA']
+SEQUENCE_LENGTH = 60
+
+
+def feature_frame(data: pd.DataFrame) -> pd.DataFrame:
+    """Model input columns for an OHLCV frame, dropping the indicator warm-up rows"""
+    return add_indicators(data)[FEATURES].dropna()
+
+
+def scale_features(frame: pd.DataFrame, scaler, fit: bool = False) -> np.ndarray:
+    """Scale a feature frame into a contiguous float32 (rows, features) array"""
+    scaled = scaler.fit_transform(frame) if fit else scaler.transform(frame)
+    return np.ascontiguousarray(scaled, dtype=np.float32)
+
+
+def windows(scaled: np.ndarray, sequence_length: int = SEQUENCE_LENGTH) -> np.ndarray:
+    """Every (sequence_length, features) window of ``scaled`` as a read-only view, no copies"""
+    return sliding_window_view(scaled, sequence_length, axis=0).transpose(0, 2, 1)
+
+
+def training_windows(scaled: np.ndarray, sequence_length: int = SEQUENCE_LENGTH) -> Tuple[np.ndarray, np.ndarray]:
+    """Inputs and targets for next-day Close prediction.
+
+    ``X[i]`` is the window ending the day before ``y[i]``. Both are views into ``scaled``.
+    """
+    X = windows(scaled, sequence_length)[:-1]
+    y = scaled[sequence_length:, 0]
+    return X, y
+
+
+def latest_window(scaled: np.ndarray, sequence_length: int = SEQUENCE_LENGTH) -> Optional[np.ndarray]:
+    """The most recent window shaped (1, sequence_length, features), or None if too short"""
+    if len(scaled) < sequence_length:
+        return None
+    return scaled[-sequence_length:][None]
+
+
+def batches(X: np.ndarray, y: np.ndarray, batch_size: int = 32, shuffle: bool = False,
+            seed: Optional[int] = None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """Yield (inputs, targets) batches; only one batch of windows is materialized at a time"""
+    order = np.arange(len(X))
+    if shuffle:
+        np.random.default_rng(seed).shuffle(order)
+    for start in range(0, len(order), batch_size):
+        index = order[start:start + batch_size]
+        if not shuffle:
+            index = slice(index[0], index[-1] + 1)
+        yield np.ascontiguousarray(X[index]), y[index]
@@ -0,0 +1,321 @@
+import math
+import sys
+import os
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, time as dt_time
+from typing import Callable, Dict, Optional
+from zoneinfo import ZoneInfo
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.feature_pipeline import FEATURES, SEQUENCE_LENGTH
+
+RSI_PERIOD = 14
+MARKET_TIMEZONE = ZoneInfo('America/New_York')
+MARKET_OPEN = dt_time(9, 30)
+
+
+class _RollingSum:
+    """Sum of the last ``size`` values, updated in O(1)"""
+
+    __slots__ = ('size', 'values', 'total')
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = deque(maxlen=size)
+        self.total = 0.0
+
+    def push(self, value: float):
+        if len(self.values) == self.size:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+    def replace_last(self, value: float):
+        self.total += value - self.values[-1]
+        self.values[-1] = value
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.size if len(self.values) == self.size else None
+
+
+def _rsi(avg_gain: Optional[float], avg_loss: Optional[float]) -> Optional[float]:
+    if avg_gain is None or avg_loss is None:
+        return None
+    if avg_loss == 0:
+        # Matches pandas: no losses is 100, a completely flat window is undefined
+        return 100.0 if avg_gain > 0 else None
+    return 100 - 100 / (1 + avg_gain / avg_loss)
+
+
+class StreamingIndicators:
+    """Model features and RSI for one symbol, updated in O(1) per bar or tick.
+
+    Computes exactly what ``feature_pipeline.feature_frame`` does (MA_20, MA_50, RSI as a
+    14-bar mean of gains and losses, Volume_MA) plus RSI_WILDER, and keeps the last
+    ``sequence_length`` complete feature rows for the predictor. The newest bar stays
+    open: updates carrying its date revise it instead of appending a new bar.
+    """
+
+    def __init__(self, sequence_length: int = SEQUENCE_LENGTH, rsi_period: int = RSI_PERIOD):
+        self.rsi_period = rsi_period
+        self.ma_20 = _RollingSum(20)
+        self.ma_50 = _RollingSum(50)
+        self.volume_ma = _RollingSum(20)
+        self.gains = _RollingSum(rsi_period)
+        self.losses = _RollingSum(rsi_period)
+        self.rows = deque(maxlen=sequence_length)    # feature rows of bars with every feature defined
+        self.deltas = 0                  # close-to-close changes seen, including the open bar's
+        self.last_date = None            # date of the open bar
+        self.previous_close = None       # close of the bar before it
+        self.close = None
+        self.volume = None
+        self.wilder = (None, None)       # smoothed (gain, loss) including the open bar
+        self._wilder_before = (None, None)
+        self._row_open = False           # whether rows[-1] belongs to the open bar
+        self.updated_at = None
+
+    def update(self, bar_date: date, close: float, volume: Optional[float] = None) -> bool:
+        """Apply a bar or tick; returns False for dates older than the open bar"""
+        if self.last_date is not None and bar_date < self.last_date:
+            return False
+
+        close = float(close)
+        if bar_date == self.last_date:
+            volume = self.volume if volume is None else float(volume)
+            self.ma_20.replace_last(close)
+            self.ma_50.replace_last(close)
+            self.volume_ma.replace_last(volume)
+            if self.previous_close is not None:
+                self.gains.replace_last(max(close - self.previous_close, 0.0))
+                self.losses.replace_last(max(self.previous_close - close, 0.0))
+        else:
+            volume = 0.0 if volume is None else float(volume)
+            self.previous_close = self.close
+            self.last_date = bar_date
+            self.ma_20.push(close)
+            self.ma_50.push(close)
+            self.volume_ma.push(volume)
+            if self.previous_close is not None:
+                self.gains.push(max(close - self.previous_close, 0.0))
+                self.losses.push(max(self.previous_close - close, 0.0))
+                self.deltas += 1
+            self._wilder_before = self.wilder
+            self._row_open = False
+
+        self.close = close
+        self.volume = volume
+        self._update_wilder()
+        self._update_row()
+        self.updated_at = time.time()
+        return True
+
+    def _update_wilder(self):
+        if self.previous_close is None or self.deltas < self.rsi_period:
+            self.wilder = (None, None)
+        elif self.deltas == self.rsi_period:
+            # Seeded with the simple average of the first period's changes
+            self.wilder = (self.gains.total / self.rsi_period, self.losses.total / self.rsi_period)
+        else:
+            avg_gain, avg_loss = self._wilder_before
+            n = self.rsi_period
+            self.wilder = (
+                (avg_gain * (n - 1) + self.gains.values[-1]) / n,
+                (avg_loss * (n - 1) + self.losses.values[-1]) / n
+            )
+
+    def _update_row(self):
+        rsi = _rsi(self.gains.mean(), self.losses.mean())
+        values = (self.close, self.volume, self.ma_20.mean(), self.ma_50.mean(), rsi, self.volume_ma.mean())
+        complete = all(value is not None and not math.isnan(value) for value in values)
+
+        if self._row_open:
+            if complete:
+                self.rows[-1] = values
+            else:
+                self.rows.pop()
+                self._row_open = False
+        elif complete:
+            self.rows.append(values)
+            self._row_open = True
+
+    def window(self, length: int) -> Optional[np.ndarray]:
+        """The last ``length`` feature rows in FEATURES order, or None if fewer exist"""
+        if len(self.rows) < length:
+            return None
+        return np.array(list(self.rows)[-length:], dtype=np.float64)
+
+    def snapshot(self) -> Dict:
+        return {
+            'date': self.last_date.isoformat() if self.last_date else None,
+            'close': self.close,
+            'volume': self.volume,
+            'MA_20': self.ma_20.mean(),
+            'MA_50': self.ma_50.mean(),
+            'RSI': _rsi(self.gains.mean(), self.losses.mean()),
+            'RSI_WILDER': _rsi(*self.wilder),
+            'Volume_MA': self.volume_ma.mean(),
+            'updated_at': self.updated_at
+        }
+
+
+def _bar_date(timestamp) -> date:
+    timestamp = pd.Timestamp(timestamp)
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.tz_convert(MARKET_TIMEZONE)
+    return timestamp.date()
+
+
+class IndicatorEngine:
+    """Streaming indicators for every tracked symbol.
+
+    A symbol is seeded from its daily history on first use and then advanced by new
+    bars and price ticks in O(1) each; nothing is recomputed over the history again.
+    Tracked symbols are re-synced from ``history(symbol, period)`` every
+    ``refresh_interval`` seconds, so bars that arrived without ticks are picked up.
+    Ticks don't keep a symbol tracked: one that hasn't been read for ``idle_timeout``
+    seconds is dropped when a new symbol is added, as is the least recently read one
+    once ``max_symbols`` are tracked.
+    """
+
+    def __init__(self, history: Optional[Callable] = None, refresh_interval: int = 900, seed_period: str = '1y',
+                 max_symbols: int = 1000, idle_timeout: int = 3600):
+        self.history = history
+        self.refresh_interval = refresh_interval
+        self.seed_period = seed_period
+        self.max_symbols = max_symbols
+        self.idle_timeout = idle_timeout
+        self._symbols = {}         # symbol -> StreamingIndicators
+        self._synced_at = {}       # symbol -> time of the last sync from history
+        self._read_at = {}         # symbol -> time it was last synced or read
+        self._lock = threading.Lock()
+        self._load_locks = {}      # symbol -> lock so only one thread fetches its history
+
+    @staticmethod
+    def _apply(state: StreamingIndicators, data: pd.DataFrame):
+        for timestamp, close, volume in zip(data.index, data['Close'], data['Volume']):
+            state.update(_bar_date(timestamp), close, volume)
+
+    @staticmethod
+    def _tail(data: pd.DataFrame, open_date: date) -> Optional[pd.DataFrame]:
+        """Rows from ``open_date`` onwards, or None if ``data`` has no bar for that date"""
+        i = len(data) - 1
+        while i >= 0 and _bar_date(data.index[i]) > open_date:
+            i -= 1
+        if i < 0 or _bar_date(data.index[i]) != open_date:
+            return None
+        return data.iloc[i:]
+
+    def sync(self, symbol: str, data: pd.DataFrame) -> Optional[StreamingIndicators]:
+        """Bring a symbol up to date with a daily OHLCV frame.
+
+        Only bars from the open bar onwards are applied, found by walking back from the
+        end of ``data``. The symbol is reseeded from ``data`` when it isn't tracked yet
+        or ``data`` doesn't contain its open bar (a gap, or a bar the history never had).
+        """
+        if data is None or data.empty:
+            return self._symbols.get(symbol)
+
+        with self._lock:
+            state = self._symbols.get(symbol)
+            if state is not None:
+                if _bar_date(data.index[-1]) < state.last_date:
+                    # Ticks have already moved past this data
+                    return state
+                tail = self._tail(data, state.last_date)
+                if tail is not None:
+                    self._apply(state, tail)
+                    self._synced_at[symbol] = self._read_at[symbol] = time.time()
+                    return state
+            else:
+                self._evict()
+
+            state = StreamingIndicators()
+            self._apply(state, data)
+            self._symbols[symbol] = state
+            self._synced_at[symbol] = self._read_at[symbol] = time.time()
+            return state
+
+    def _evict(self):
+        """Make room for one more symbol; called with ``_lock`` held"""
+        now = time.time()
+        idle = [symbol for symbol in self._symbols if now - self._read_at.get(symbol, 0) > self.idle_timeout]
+        for symbol in idle:
+            self._forget(symbol)
+        while self._symbols and len(self._symbols) >= self.max_symbols:
+            self._forget(min(self._symbols, key=lambda symbol: self._read_at.get(symbol, 0)))
+        # A read can race an eviction and leave a timestamp behind
+        for symbol in [symbol for symbol in self._read_at if symbol not in self._symbols]:
+            del self._read_at[symbol]
+
+    def _forget(self, symbol: str):
+        self._symbols.pop(symbol, None)
+        self._synced_at.pop(symbol, None)
+        self._read_at.pop(symbol, None)
+
+    def ensure(self, symbol: str) -> Optional[StreamingIndicators]:
+        """Tracked state for a symbol, seeding or refreshing it from history when due"""
+        state = self._symbols.get(symbol)
+        if self.history is not None and (
+            state is None or time.time() - self._synced_at.get(symbol, 0) >= self.refresh_interval
+        ):
+            state = self._load(symbol)
+        if state is not None:
+            self._read_at[symbol] = time.time()
+        return state
+
+    def _load(self, symbol: str) -> Optional[StreamingIndicators]:
+        with self._lock:
+            load_lock = self._load_locks.setdefault(symbol, threading.Lock())
+        try:
+            with load_lock:
+                state = self._symbols.get(symbol)
+                if state is not None and time.time() - self._synced_at.get(symbol, 0) < self.refresh_interval:
+                    return state
+                return self.sync(symbol, self.history(symbol, self.seed_period))
+        finally:
+            # Waiting threads still hold the lock object; later callers recheck freshness first
+            with self._lock:
+                if self._load_locks.get(symbol) is load_lock:
+                    del self._load_locks[symbol]
+
+    def on_tick(self, symbol: str, price: float, at: Optional[datetime] = None,
+                volume: Optional[float] = None) -> Optional[Dict]:
+        """Revise (or, once the session opens, start) today's bar of a tracked symbol.
+
+        ``volume`` is the day's cumulative volume from the quote; without it a new bar
+        starts at zero volume and a revised bar keeps its last volume.
+        """
+        state = self._symbols.get(symbol)
+        if state is None:
+            return None
+
+        at = (at or datetime.now(MARKET_TIMEZONE)).astimezone(MARKET_TIMEZONE)
+        today = at.date()
+        # Quotes outside a session carry the last close; they never start a bar
+        if today != state.last_date and (at.weekday() >= 5 or at.time() < MARKET_OPEN):
+            return None
+
+        with self._lock:
+            if not state.update(today, price, volume):
+                return None
+            return dict(state.snapshot(), symbol=symbol)
+
+    def snapshot(self, symbol: str) -> Optional[Dict]:
+        state = self.ensure(symbol)
+        if state is None or state.last_date is None:
+            return None
+        with self._lock:
+            return dict(state.snapshot(), symbol=symbol)
+
+    def window(self, symbol: str, length: int = SEQUENCE_LENGTH) -> Optional[pd.DataFrame]:
+        """The symbol's last ``length`` model feature rows as a FEATURES frame"""
+        state = self._symbols.get(symbol)
+        if state is None:
+            return None
+        self._read_at[symbol] = time.time()
+        with self._lock:
+            rows = state.window(length)
+        return pd.DataFrame(rows, columns=FEATURES) if rows is not None else None
@@ -0,0 +1,41 @@
+import pandas as pd
+
+
+def calculate_rsi(prices: pd.Series, period: int = 14) -> pd.Series:
+    """Calculate RSI indicator"""
+    delta = prices.diff()
+    gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+    rs = gain / loss
+    rsi = 100 - (100 / (1 + rs))
+    return rsi
+
+
+def add_indicators(data: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of an OHLCV frame with MA_20, MA_50, RSI and Volume_MA columns"""
+    df = data.copy()
+    df['MA_20'] = df['Close'].rolling(window=20).mean()
+    df['MA_50'] = df['Close'].rolling(window=50).mean()
+    df['RSI'] = calculate_rsi(df['Close'])
+    df['Volume_MA'] = df['Volume'].rolling(window=20).mean()
+    return df
+
+
+def indicator_series(df: pd.DataFrame, name: str) -> pd.Series:
+    """Resolve an indicator by name, including parameterized forms like MA_10 or RSI_7"""
+    if name in df:
+        return df[name]
+
+    kind, _, window = name.partition('_')
+    if not window.isdigit() or int(window) < 1:
+        raise ValueError(f'Unknown indicator: {name}')
+
+    window = int(window)
+    if kind == 'MA':
+        return df['Close'].rolling(window=window).mean()
+    if kind == 'RSI':
+        return calculate_rsi(df['Close'], window)
+    if kind == 'VOLMA':
+        return df['Volume'].rolling(window=window).mean()
+
+    raise ValueError(f'Unknown indicator: {name}')
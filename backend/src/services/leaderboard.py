@@ -0,0 +1,104 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional
+import numpy as np
+
+
+class Leaderboard:
+    """Global ranking of users by total account value.
+
+    A refresh is one SQL query for every position, one batched price fetch for the
+    distinct symbols and a vectorized valuation and sort, so its cost doesn't grow with
+    per-user round trips. Reads are served from the last snapshot.
+    """
+
+    def __init__(self, db, stock_service, initial_balance: float = 100000, refresh_interval: int = 60):
+        self.db = db
+        self.stock_service = stock_service
+        self.initial_balance = initial_balance
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        self._refresh_lock = threading.Lock()
+
+    def refresh(self) -> Dict:
+        """Recompute the ranking from scratch"""
+        with self._refresh_lock:
+            rows = self.db.get_all_positions()
+            if not rows:
+                self._snapshot = {
+                    'usernames': np.array([], dtype=object),
+                    'values': np.array([]),
+                    'ranks': {},
+                    'generated_at': datetime.utcnow().isoformat(),
+                    'timestamp': time.time()
+                }
+                return self._snapshot
+
+            user_ids, usernames, balances, symbols, shares, avg_prices = (np.array(col, dtype=object) for col in zip(*rows))
+
+            unique_ids, first_row, user_idx = np.unique(user_ids.astype(np.int64), return_index=True, return_inverse=True)
+            held = symbols != None  # noqa: E711 -- elementwise comparison
+            held_symbols = symbols[held].astype(str)
+
+            distinct_symbols, symbol_idx = np.unique(held_symbols, return_inverse=True)
+            prices = self.stock_service.get_multiple_prices(distinct_symbols.tolist())
+            price_vector = np.array([prices.get(symbol, np.nan) for symbol in distinct_symbols], dtype=float)
+
+            # Positions without a live price are carried at cost
+            position_prices = price_vector[symbol_idx]
+            position_prices = np.where(np.isnan(position_prices), avg_prices[held].astype(float), position_prices)
+            position_values = shares[held].astype(float) * position_prices
+
+            totals = balances[first_row].astype(float) + np.bincount(
+                user_idx[held], weights=position_values, minlength=len(unique_ids)
+            )
+
+            order = np.argsort(-totals, kind='stable')
+            ranked_names = usernames[first_row][order]
+
+            self._snapshot = {
+                'usernames': ranked_names,
+                'values': totals[order],
+                'ranks': dict(zip(ranked_names.tolist(), range(1, len(order) + 1))),
+                'generated_at': datetime.utcnow().isoformat(),
+                'timestamp': time.time()
+            }
+            return self._snapshot
+
+    def refresh_if_stale(self):
+        """Refresh when the snapshot is older than the refresh interval (called from price ticks)"""
+        snapshot = self._snapshot
+        if snapshot is None or time.time() - snapshot['timestamp'] >= self.refresh_interval:
+            self.refresh()
+
+    def _entry(self, rank: int, username: str, value: float) -> Dict:
+        return {
+            'rank': rank,
+            'username': username,
+            'total_value': round(float(value), 2),
+            'return_percent': round((float(value) - self.initial_balance) / self.initial_balance * 100, 2)
+        }
+
+    def get(self, username: Optional[str] = None, limit: int = 10) -> Dict:
+        """Top ``limit`` users plus the caller's own rank"""
+        snapshot = self._snapshot or self.refresh()
+
+        leaders = [
+            self._entry(rank, name, value)
+            for rank, (name, value) in enumerate(
+                zip(snapshot['usernames'][:limit], snapshot['values'][:limit]), start=1
+            )
+        ]
+
+        me = None
+        rank = snapshot['ranks'].get(username)
+        if rank:
+            me = self._entry(rank, username, snapshot['values'][rank - 1])
+
+        return {
+            'leaders': leaders,
+            'me': me,
+            'total_users': len(snapshot['usernames']),
+            'generated_at': snapshot['generated_at']
+        }
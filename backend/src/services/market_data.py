@@ -0,0 +1,97 @@
+import importlib
+import os
+import sys
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.metrics import registry
+
+provider_requests = registry.counter(
+    'market_data_requests_total', 'Market data provider calls by call type and outcome', ['call', 'outcome']
+)
+provider_latency = registry.histogram(
+    'market_data_request_duration_seconds', 'Market data provider call latency by call type', ['call']
+)
+
+
+class LazyModule:
+    """Module proxy that imports its target on first attribute access.
+
+    yfinance pulls in a large dependency tree (curl_cffi, bs4, lxml, ...), so services
+    reference it through this proxy and workers that never fetch market data don't
+    pay for the import at startup.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._module = importlib.import_module(self._name)
+        return self._module
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+
+def _observe(call: str, fetch):
+    start = time.perf_counter()
+    try:
+        result = fetch()
+    except Exception:
+        provider_requests.inc(call=call, outcome='error')
+        raise
+    finally:
+        provider_latency.observe(time.perf_counter() - start, call=call)
+    provider_requests.inc(call=call, outcome='ok')
+    return result
+
+
+class InstrumentedTicker:
+    """Ticker wrapper recording history and info calls"""
+
+    def __init__(self, ticker):
+        self._ticker = ticker
+
+    def history(self, *args, **kwargs):
+        return _observe('history', lambda: self._ticker.history(*args, **kwargs))
+
+    @property
+    def info(self):
+        return _observe('info', lambda: self._ticker.info)
+
+    def __getattr__(self, attr):
+        return getattr(self._ticker, attr)
+
+
+class InstrumentedProvider:
+    """Market data provider wrapper recording the count and latency of every call.
+
+    Calls are labelled history, info (Ticker) or batch (download).
+    """
+
+    def __init__(self, provider):
+        self._provider = provider
+
+    def Ticker(self, symbol: str):
+        return InstrumentedTicker(self._provider.Ticker(symbol))
+
+    def download(self, *args, **kwargs):
+        return _observe('batch', lambda: self._provider.download(*args, **kwargs))
+
+    def __getattr__(self, attr):
+        return getattr(self._provider, attr)
+
+
+# Market data provider, shared by every service that fetches quotes or history. Any module
+# with yfinance's Ticker/download interface can stand in for it, e.g.
+# MARKET_DATA_PROVIDER=services.offline_market_data for offline development and load tests
+yf = InstrumentedProvider(LazyModule(os.getenv('MARKET_DATA_PROVIDER', 'yfinance')))
@@ -0,0 +1,232 @@
+import bisect
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Prometheus' default buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if value == -math.inf:
+        return '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ''
+    pairs = ','.join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class Metric:
+    """A named metric family with a fixed set of label names"""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}    # label values -> value
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict) -> Tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} takes labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, Sequence[str], Sequence, float]]:
+        """(name suffix, label names, label values, value) for every series"""
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in sorted(values):
+            yield '', self.labelnames, key, value
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for suffix, names, values, value in self.samples():
+            lines.append(f'{self.name}{suffix}{_format_labels(names, values)} {_format_value(value)}')
+        return lines
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(Metric):
+    """A value that goes up and down; with ``collect`` it is read at scrape time instead.
+
+    ``collect`` returns a number, or for a labelled gauge a dict of label value tuples
+    to numbers.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 collect: Optional[Callable] = None):
+        super().__init__(name, documentation, labelnames)
+        self.collect = collect
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.collect is None:
+            yield from super().samples()
+            return
+        collected = self.collect()
+        if not isinstance(collected, dict):
+            collected = {(): collected}
+        for key, value in sorted(collected.items()):
+            yield '', self.labelnames, key, value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                # Per-bucket counts (the last one is +Inf), sum
+                series = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the duration of the block in seconds"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        with self._lock:
+            values = [(key, (list(counts), total)) for key, (counts, total) in self._values.items()]
+        names = self.labelnames + ('le',)
+        for key, (counts, total) in sorted(values):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                yield '_bucket', names, key + (_format_value(bound),), cumulative
+            yield '_sum', self.labelnames, key, total
+            yield '_count', self.labelnames, key, cumulative
+
+
+class MetricsRegistry:
+    """Process-wide metric families, rendered in the Prometheus text exposition format.
+
+    Getting a metric that already exists returns it, so modules can declare their metrics
+    at import time even when they end up imported under two names.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, documentation: str, labelnames: Sequence[str], **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f'Metric {name} is already registered as a different {metric.kind}')
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+              collect: Optional[Callable] = None) -> Gauge:
+        gauge = self._get(Gauge, name, documentation, labelnames)
+        if collect is not None:
+            # The latest collector wins, e.g. when create_app runs more than once
+            gauge.collect = collect
+        return gauge
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            try:
+                lines += metric.render()
+            except Exception as e:
+                # A failing collector must not take the whole scrape down
+                print(f'Error collecting metric {metric.name}: {e}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+# Shared by every cache, labelled with the cache's name
+cache_requests = registry.counter('cache_requests_total', 'Cache lookups by cache and result (hit or miss)',
+                                  ['cache', 'result'])
+cache_evictions = registry.counter('cache_evictions_total', 'Entries evicted to stay within a cache\'s bounds',
+                                   ['cache'])
+
+
+def record_cache(cache: str, hit: bool):
+    cache_requests.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def time_methods(histogram: Histogram, label: str = 'method'):
+    """Class decorator observing the duration of every public method, labelled by its name"""
+    def wrap(name, method):
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            with histogram.time(**{label: name}):
+                return method(*args, **kwargs)
+        return timed
+
+    def decorate(cls):
+        for name, method in list(vars(cls).items()):
+            if not name.startswith('_') and callable(method):
+                setattr(cls, name, wrap(name, method))
+        return cls
+    return decorate
@@ -0,0 +1,182 @@
+import os
+import pickle
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.metrics import registry as metrics, record_cache, cache_evictions
+
+model_load_seconds = metrics.histogram(
+    'model_load_duration_seconds', 'Time to load a model from disk by tier and serving backend', ['tier', 'backend']
+)
+
+
+class ModelRegistry:
+    """Thread-safe in-memory LRU cache of per-symbol (model, scaler) pairs.
+
+    Entries are keyed by symbol and model tier and versioned by the modification time
+    of their files, so a retrained model on disk is picked up on the next lookup. When
+    the estimated size of loaded models exceeds the memory budget, the least recently
+    used entries are evicted.
+
+    With the ``tflite`` backend, LSTM models are served from the TFLite artifact
+    exported when they were trained, and fall back to Keras when there is no current
+    one (trained before the backend was enabled, or the artifact didn't match Keras).
+    """
+
+    def __init__(self, model_path: str = 'models', memory_budget_mb: int = 512,
+                 backend: str = 'keras'):
+        self.model_path = model_path
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.backend = backend
+        self._entries = OrderedDict()   # (symbol, tier) -> entry dict, least recently used first
+        self._lock = threading.Lock()
+        self._load_locks = {}           # (symbol, tier) -> lock so only one thread deserializes a model
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def model_files(self, symbol: str, tier: str = 'lstm'):
+        """Files holding a trained model; the LSTM keeps Keras weights and scaler apart"""
+        if tier == 'lstm':
+            return (
+                f"{self.model_path}/{symbol}_model.h5",
+                f"{self.model_path}/{symbol}_scaler.pkl"
+            )
+        return (f"{self.model_path}/{symbol}_{tier}.pkl",)
+
+    def symbols(self, tier: str = 'lstm') -> List[str]:
+        """Symbols with a trained model of the given tier on disk"""
+        suffix = os.path.basename(self.model_files('', tier)[0])
+        try:
+            names = os.listdir(self.model_path)
+        except FileNotFoundError:
+            return []
+        return sorted(name[:-len(suffix)] for name in names if name.endswith(suffix) and len(name) > len(suffix))
+
+    def version(self, symbol: str, tier: str = 'lstm') -> Optional[float]:
+        """Version of the model on disk, or None if it hasn't been trained"""
+        try:
+            return max(os.path.getmtime(path) for path in self.model_files(symbol, tier))
+        except OSError:
+            return None
+
+    def get(self, symbol: str, tier: str = 'lstm') -> Optional[Dict]:
+        """Get the loaded entry for a symbol, loading or reloading it from disk if needed"""
+        key = (symbol, tier)
+        version = self.version(symbol, tier)
+        if version is None:
+            self.invalidate(symbol, tier)
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry['version'] == version:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                record_cache('models', True)
+                return entry
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        with load_lock:
+            # Another thread may have finished loading while we waited
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry and entry['version'] == version:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    record_cache('models', True)
+                    return entry
+
+            start = time.perf_counter()
+            entry = self._load(symbol, tier, version)
+            model_load_seconds.observe(time.perf_counter() - start, tier=tier, backend=entry['backend'])
+
+            with self._lock:
+                self.misses += 1
+                record_cache('models', False)
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self._evict()
+            return entry
+
+    def _load(self, symbol: str, tier: str, version: float) -> Dict:
+        files = self.model_files(symbol, tier)
+        if tier == 'lstm':
+            model_file, scaler_file = files
+            with open(scaler_file, 'rb') as f:
+                scaler = pickle.load(f)
+
+            model = self._load_tflite(model_file) if self.backend == 'tflite' else None
+            if model is not None:
+                backend = 'tflite'
+                size = os.path.getsize(model.path) + os.path.getsize(scaler_file)
+            else:
+                import tensorflow as tf
+
+                backend = 'keras'
+                model = tf.keras.models.load_model(model_file)
+                # float32 weights dominate the footprint of a loaded model
+                size = model.count_params() * 4 + os.path.getsize(scaler_file)
+        else:
+            with open(files[0], 'rb') as f:
+                saved = pickle.load(f)
+            model, scaler = saved['model'], saved['scaler']
+            backend = 'numpy'
+            size = os.path.getsize(files[0])
+
+        return {
+            'symbol': symbol,
+            'tier': tier,
+            'backend': backend,
+            'model': model,
+            'scaler': scaler,
+            'version': version,
+            'size': size
+        }
+
+    @staticmethod
+    def has_tflite(model_file: str) -> bool:
+        """Whether the Keras model file has a TFLite artifact at least as new as itself"""
+        from services.tflite_backend import tflite_path
+
+        path = tflite_path(model_file)
+        return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(model_file)
+
+    def _load_tflite(self, model_file: str):
+        """TFLite model for a Keras model file, or None if training didn't export a current one"""
+        from services.tflite_backend import TFLiteModel, tflite_path
+
+        # Converting takes tens of seconds, far too long for the request that loads the model,
+        # so it only happens in training; until then the model is served by Keras
+        if not self.has_tflite(model_file):
+            print(f"No current TFLite artifact for {model_file}; serving it with Keras until it is retrained")
+            return None
+        return TFLiteModel(tflite_path(model_file))
+
+    def _evict(self):
+        """Drop least recently used entries until under budget (always keep the newest)"""
+        total = sum(entry['size'] for entry in self._entries.values())
+        while total > self.memory_budget and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            total -= evicted['size']
+            self.evictions += 1
+            cache_evictions.inc(cache='models')
+
+    def invalidate(self, symbol: str, tier: str = 'lstm'):
+        """Forget a symbol's loaded model (e.g. after retraining)"""
+        with self._lock:
+            self._entries.pop((symbol, tier), None)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'loaded': [f'{symbol}/{tier}' for symbol, tier in self._entries],
+                'memory_bytes': sum(entry['size'] for entry in self._entries.values()),
+                'memory_budget_bytes': self.memory_budget,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
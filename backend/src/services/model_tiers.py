@@ -0,0 +1,67 @@
+from typing import Callable, Dict
+import numpy as np
+
+# Tiers in order of preference when a latency budget allows them, heaviest first.
+# Latencies (ms per prediction) seed the running estimates StockPredictor uses to
+# pick a tier for a budget.
+TIERS = ('lstm', 'ridge')
+DEFAULT_TIER = 'lstm'
+DEFAULT_LATENCY_MS = {'lstm': 250.0, 'ridge': 5.0}
+
+
+def rollout(predict_next: Callable[[np.ndarray], np.ndarray], windows: np.ndarray, days: int) -> np.ndarray:
+    """Autoregressive multi-day forecast for a batch of (n, sequence_length, features) windows.
+
+    Each day's predicted Close is appended as a new row that otherwise repeats the last
+    row's features. Returns (n, days) scaled closes.
+    """
+    windows = np.asarray(windows, dtype=np.float32)
+    predictions = np.empty((len(windows), days), dtype=np.float32)
+    for day in range(days):
+        pred = predict_next(windows)
+        predictions[:, day] = pred
+        new_row = np.concatenate([pred[:, None], windows[:, -1, 1:]], axis=1)
+        windows = np.concatenate([windows[:, 1:, :], new_row[:, None, :]], axis=1)
+    return predictions
+
+
+class RidgeModel:
+    """Fast tier: ridge regression of next-day Close on the flattened feature window.
+
+    Uses the same windows as the LSTM, trains in well under a second and forecasts a
+    whole batch of symbols with one matrix product per day.
+    """
+
+    tier = 'ridge'
+
+    def __init__(self, alpha: float = 1.0):
+        # Imported here so the API can read TIERS without loading scikit-learn
+        from sklearn.linear_model import Ridge
+
+        self.regressor = Ridge(alpha=alpha)
+
+    def fit(self, X: np.ndarray, y: np.ndarray) -> 'RidgeModel':
+        self.regressor.fit(X.reshape(len(X), -1), y)
+        return self
+
+    def predict_next(self, windows: np.ndarray) -> np.ndarray:
+        flat = windows.reshape(len(windows), -1)
+        return (flat @ self.regressor.coef_ + self.regressor.intercept_).astype(np.float32)
+
+    def forecast(self, windows: np.ndarray, days: int) -> np.ndarray:
+        return rollout(self.predict_next, windows, days)
+
+    @staticmethod
+    def forecast_many(models, windows: np.ndarray, days: int) -> np.ndarray:
+        """Forecast one window per model, with every model's coefficients applied at once"""
+        coefs = np.stack([model.regressor.coef_ for model in models]).astype(np.float32)
+        intercepts = np.array([model.regressor.intercept_ for model in models], dtype=np.float32)
+        return rollout(
+            lambda batch: np.einsum('nk,nk->n', batch.reshape(len(batch), -1), coefs) + intercepts,
+            windows, days
+        )
+
+
+LIGHTWEIGHT_MODELS: Dict[str, type] = {
+    'ridge': RidgeModel
+}
@@ -0,0 +1,107 @@
+# Offline stand-in for the parts of yfinance the services use, selected with
+# MARKET_DATA_PROVIDER=services.offline_market_data. Every symbol exists and has a
+# deterministic synthetic daily history ending today, so the API runs without network
+# access and load tests see the same data on every run.
+import os
+import threading
+import time
+import zlib
+from datetime import date
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+MARKET_TIMEZONE = 'America/New_York'
+MAX_BARS = 5 * 252
+PERIOD_BARS = {
+    '1d': 1, '2d': 2, '5d': 5, '1mo': 21, '3mo': 63, '6mo': 126,
+    '1y': 252, '2y': 504, '5y': MAX_BARS, 'max': MAX_BARS
+}
+SECTORS = ['Technology', 'Healthcare', 'Financial Services', 'Consumer Cyclical', 'Energy']
+
+# Simulated round-trip time of every provider call, in milliseconds
+latency_ms = float(os.getenv('OFFLINE_MARKET_DATA_LATENCY_MS', '0'))
+
+_histories = {}    # (symbol, day) -> full synthetic history
+_lock = threading.Lock()
+
+
+def _wait():
+    if latency_ms > 0:
+        time.sleep(latency_ms / 1000)
+
+
+def _seed(symbol: str) -> int:
+    return zlib.crc32(symbol.upper().encode())
+
+
+def _full_history(symbol: str) -> pd.DataFrame:
+    """MAX_BARS business days of OHLCV ending today, the same for a symbol all day"""
+    key = (symbol.upper(), date.today())
+    history = _histories.get(key)
+    if history is not None:
+        return history
+
+    rng = np.random.default_rng(_seed(symbol))
+    start_price = rng.uniform(20, 500)
+    returns = rng.normal(0.0003, 0.018, MAX_BARS)
+    close = start_price * np.exp(np.cumsum(returns))
+    spread = np.abs(rng.normal(0, 0.01, MAX_BARS))
+    index = pd.bdate_range(end=pd.Timestamp(date.today()), periods=MAX_BARS).tz_localize(MARKET_TIMEZONE)
+    history = pd.DataFrame({
+        'Open': close * (1 + rng.normal(0, 0.005, MAX_BARS)),
+        'High': close * (1 + spread),
+        'Low': close * (1 - spread),
+        'Close': close,
+        'Volume': rng.integers(1_000_000, 20_000_000, MAX_BARS).astype(float),
+        'Dividends': 0.0,
+        'Stock Splits': 0.0
+    }, index=index)
+    history.index.name = 'Date'
+
+    with _lock:
+        # Keep only today's histories
+        for stale in [k for k in _histories if k[1] != key[1]]:
+            del _histories[stale]
+        _histories[key] = history
+    return history
+
+
+def _slice(history: pd.DataFrame, period: Optional[str], start: Optional[str]) -> pd.DataFrame:
+    if start is not None:
+        return history[history.index >= pd.Timestamp(start, tz=MARKET_TIMEZONE)]
+    return history.iloc[-PERIOD_BARS.get(period or '1mo', PERIOD_BARS['1mo']):]
+
+
+class Ticker:
+    def __init__(self, symbol: str):
+        self.ticker = symbol.upper()
+
+    def history(self, period: str = '1mo', start: Optional[str] = None, **kwargs) -> pd.DataFrame:
+        _wait()
+        return _slice(_full_history(self.ticker), period, start).copy()
+
+    @property
+    def info(self) -> Dict:
+        _wait()
+        last = _full_history(self.ticker).iloc[-1]
+        seed = _seed(self.ticker)
+        return {
+            'symbol': self.ticker,
+            'shortName': f'{self.ticker} Corp',
+            'longName': f'{self.ticker} Corporation',
+            'volume': int(last['Volume']),
+            'marketCap': int(last['Close'] * (50_000_000 + seed % 5_000_000_000)),
+            'sector': SECTORS[seed % len(SECTORS)],
+            'industry': 'Synthetic'
+        }
+
+
+def download(tickers: Union[str, List[str]], period: Optional[str] = None, start: Optional[str] = None,
+             **kwargs) -> pd.DataFrame:
+    """Frame with (field, symbol) columns, like yfinance's multi-ticker download"""
+    _wait()
+    symbols = tickers.split() if isinstance(tickers, str) else list(tickers)
+    frames = {symbol: _slice(_full_history(symbol), period, start) for symbol in symbols}
+    return pd.concat(frames, axis=1).swaplevel(0, 1, axis=1).sort_index(axis=1)
@@ -0,0 +1,279 @@
+import heapq
+import threading
+from typing import Dict, List, Optional, Tuple
+
+ORDER_TYPES = ('LIMIT', 'STOP', 'STOP_LIMIT')
+ORDER_SIDES = ('BUY', 'SELL')
+ORDER_STATUSES = ('OPEN', 'TRIGGERED', 'FILLED', 'CANCELLED', 'REJECTED')
+
+
+class OrderBook:
+    """Resting orders for a single symbol, indexed by trigger price.
+
+    Each side keeps a heap ordered so that the order closest to being crossed is on
+    top, which makes a price tick cost O(log n) per triggered order instead of a scan
+    of every open order. Cancelled orders are removed lazily when they surface.
+    """
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.orders = {}          # order_id -> order dict, live orders only
+        self._buy_limits = []     # fill when price <= limit; highest limit on top
+        self._sell_limits = []    # fill when price >= limit; lowest limit on top
+        self._buy_stops = []      # trigger when price >= stop; lowest stop on top
+        self._sell_stops = []     # trigger when price <= stop; highest stop on top
+
+    def __len__(self):
+        return len(self.orders)
+
+    def add(self, order: Dict):
+        """Index an order by the price that will next act on it"""
+        self.orders[order['order_id']] = order
+        if order['order_type'] == 'LIMIT' or order['status'] == 'TRIGGERED':
+            self._push_limit(order)
+        else:
+            self._push_stop(order)
+
+    def remove(self, order_id: int) -> Optional[Dict]:
+        """Drop an order; its heap entries are discarded when they reach the top"""
+        return self.orders.pop(order_id, None)
+
+    def cross(self, price: float) -> Tuple[List[Dict], List[Dict]]:
+        """Pull every order whose trigger is crossed by ``price``.
+
+        Returns (fills, triggered): orders to fill now at ``price``, and stop-limit
+        orders whose stop fired and now rest as limit orders.
+        """
+        fills, triggered = [], []
+
+        for order in self._pop_crossed(self._buy_stops, lambda key: key <= price, negate=False) + \
+                self._pop_crossed(self._sell_stops, lambda key: key >= price, negate=True):
+            if order['order_type'] == 'STOP':
+                fills.append(self.orders.pop(order['order_id']))
+            else:
+                order['status'] = 'TRIGGERED'
+                self._push_limit(order)
+                triggered.append(order)
+
+        # Limits are checked after stops so a stop-limit that triggers and is marketable fills on this tick
+        for order in self._pop_crossed(self._buy_limits, lambda key: key >= price, negate=True) + \
+                self._pop_crossed(self._sell_limits, lambda key: key <= price, negate=False):
+            fills.append(self.orders.pop(order['order_id']))
+
+        return fills, triggered
+
+    def _push_limit(self, order: Dict):
+        if order['side'] == 'BUY':
+            heapq.heappush(self._buy_limits, (-order['limit_price'], order['order_id'], 'LIMIT'))
+        else:
+            heapq.heappush(self._sell_limits, (order['limit_price'], order['order_id'], 'LIMIT'))
+
+    def _push_stop(self, order: Dict):
+        if order['side'] == 'BUY':
+            heapq.heappush(self._buy_stops, (order['stop_price'], order['order_id'], 'STOP'))
+        else:
+            heapq.heappush(self._sell_stops, (-order['stop_price'], order['order_id'], 'STOP'))
+
+    def _pop_crossed(self, heap: List, is_crossed, negate: bool) -> List[Dict]:
+        """Pop heap entries while the top one is crossed, skipping stale entries"""
+        crossed = []
+        while heap:
+            key, order_id, stage = heap[0]
+            order = self.orders.get(order_id)
+            if order is None or self._stage(order) != stage:
+                heapq.heappop(heap)
+                continue
+            if not is_crossed(-key if negate else key):
+                break
+            heapq.heappop(heap)
+            crossed.append(order)
+        return crossed
+
+    def _stage(self, order: Dict) -> str:
+        if order['order_type'] == 'LIMIT' or order['status'] == 'TRIGGERED':
+            return 'LIMIT'
+        return 'STOP'
+
+
+class OrderService:
+    """Limit, stop and stop-limit orders matched against price ticks"""
+
+    def __init__(self, trading_service):
+        self.trading_service = trading_service
+        self.db = trading_service.db
+        self.stock_service = trading_service.stock_service
+        self.books = {}
+        self._lock = threading.Lock()
+        self._load_open_orders()
+
+    def _load_open_orders(self):
+        """Rebuild the in-memory books from persisted resting orders"""
+        for row in self.db.get_open_orders():
+            order = self._format_order(row)
+            self._book(order['symbol']).add(order)
+
+    def _book(self, symbol: str) -> OrderBook:
+        book = self.books.get(symbol)
+        if book is None:
+            book = self.books[symbol] = OrderBook(symbol)
+        return book
+
+    def _format_order(self, row: Tuple) -> Dict:
+        (order_id, user_id, symbol, side, order_type, shares, limit_price, stop_price,
+         status, filled_price, message, created_at, updated_at) = row
+        return {
+            'order_id': order_id,
+            'user_id': user_id,
+            'symbol': symbol,
+            'side': side,
+            'order_type': order_type,
+            'shares': shares,
+            'limit_price': limit_price,
+            'stop_price': stop_price,
+            'status': status,
+            'filled_price': filled_price,
+            'message': message,
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+
+    def symbols(self) -> List[str]:
+        """Symbols that have resting orders and therefore need price ticks"""
+        with self._lock:
+            return [symbol for symbol, book in self.books.items() if len(book)]
+
+    def place_order(self, username: str, symbol: str, side: str, order_type: str, shares: int,
+                    limit_price: Optional[float] = None, stop_price: Optional[float] = None) -> Dict:
+        """Place a resting limit, stop or stop-limit order"""
+        user = self.db.get_user(username)
+        if not user:
+            return {'success': False, 'message': 'User not found'}
+
+        user_id, _, _, balance, _, _ = user
+        symbol = symbol.upper()
+
+        if side not in ORDER_SIDES:
+            return {'success': False, 'message': 'Side must be BUY or SELL'}
+
+        if order_type not in ORDER_TYPES:
+            return {'success': False, 'message': 'Order type must be LIMIT, STOP or STOP_LIMIT'}
+
+        if shares <= 0:
+            return {'success': False, 'message': 'Invalid number of shares'}
+
+        if order_type in ('LIMIT', 'STOP_LIMIT') and (limit_price is None or limit_price <= 0):
+            return {'success': False, 'message': 'A positive limit price is required'}
+
+        if order_type in ('STOP', 'STOP_LIMIT') and (stop_price is None or stop_price <= 0):
+            return {'success': False, 'message': 'A positive stop price is required'}
+
+        if not self.stock_service.validate_symbol(symbol):
+            return {'success': False, 'message': 'Invalid stock symbol'}
+
+        # Early feedback only; cash and shares are re-checked atomically when the order fills
+        if side == 'BUY':
+            reference_price = limit_price if limit_price is not None else stop_price
+            if balance < shares * reference_price:
+                return {
+                    'success': False,
+                    'message': f'Insufficient funds. Required: ${shares * reference_price:.2f}, Available: ${balance:.2f}'
+                }
+        else:
+            owned_shares = 0
+            for port_symbol, port_shares, _ in self.db.get_portfolio(user_id):
+                if port_symbol == symbol:
+                    owned_shares = port_shares
+                    break
+            if owned_shares < shares:
+                return {
+                    'success': False,
+                    'message': f'Insufficient shares. You own {owned_shares} shares of {symbol}'
+                }
+
+        order_id = self.db.create_order(user_id, symbol, side, order_type, shares, limit_price, stop_price)
+        order = self._format_order(self.db.get_order(order_id))
+
+        with self._lock:
+            self._book(symbol).add(order)
+
+        return {
+            'success': True,
+            'message': f'{order_type.replace("_", "-").title()} {side.lower()} order placed for {shares} shares of {symbol}',
+            'order': order
+        }
+
+    def cancel_order(self, username: str, order_id: int) -> Dict:
+        """Cancel a resting order"""
+        user = self.db.get_user(username)
+        if not user:
+            return {'success': False, 'message': 'User not found'}
+
+        user_id = user[0]
+
+        # Holding the lock keeps a cancel from racing a fill of the same order
+        with self._lock:
+            if not self.db.cancel_order(user_id, order_id):
+                return {'success': False, 'message': 'Order not found or no longer open'}
+            for book in self.books.values():
+                if book.remove(order_id):
+                    break
+
+        return {'success': True, 'message': f'Order {order_id} cancelled'}
+
+    def get_orders(self, username: str, status: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """Get user's orders"""
+        user = self.db.get_user(username)
+        if not user:
+            return []
+
+        user_id = user[0]
+        return [self._format_order(row) for row in self.db.get_orders(user_id, status, limit)]
+
+    def on_price_tick(self, symbol: str, price: float) -> List[Dict]:
+        """Match resting orders against a new price; returns the orders whose state changed"""
+        updates = []
+
+        with self._lock:
+            book = self.books.get(symbol)
+            if not book:
+                return updates
+
+            fills, triggered = book.cross(price)
+
+            for order in triggered:
+                try:
+                    self.db.update_order_status(order['order_id'], 'TRIGGERED')
+                except Exception as e:
+                    # Still triggered in memory; the FILLED write below doesn't depend on it
+                    print(f"Error recording trigger of order {order['order_id']}: {e}")
+                updates.append(dict(order))
+
+            for order in fills:
+                try:
+                    update = self._fill(order, symbol, price)
+                except Exception as e:
+                    # Nothing was committed, so the order is still resting; retry on a later tick
+                    print(f"Error filling order {order['order_id']}: {e}")
+                    book.add(order)
+                    continue
+                if update:
+                    updates.append(update)
+
+            if not len(book):
+                del self.books[symbol]
+
+        return updates
+
+    def _fill(self, order: Dict, symbol: str, price: float) -> Optional[Dict]:
+        """Fill or reject a crossed order; returns its new state, or None if it had already left the book"""
+        new_balance = self.trading_service.fill_order(
+            order['order_id'], order['user_id'], symbol, order['side'], order['shares'], price
+        )
+        if new_balance is not None:
+            return dict(order, status='FILLED', filled_price=price)
+
+        # Either the user lacks cash or shares, or the order was cancelled meanwhile (then this is a no-op)
+        message = 'Insufficient funds or shares at fill time'
+        if not self.db.update_order_status(order['order_id'], 'REJECTED', message=message):
+            return None
+        return dict(order, status='REJECTED', message=message)
@@ -0,0 +1,155 @@
+import json
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+
+class OrderPipeline:
+    """Asynchronous market order execution with idempotent submission.
+
+    Submitting only records the order and queues it, so request latency does not
+    depend on the market-data provider. Orders execute on a bounded worker pool and
+    their result is stored for the status endpoint and pushed to the notifier.
+    Each user's orders run one at a time in submission order; different users'
+    orders run in parallel.
+
+    Call ``recover`` once at startup from the process that serves requests; the
+    constructor leaves the database alone, so importing the module is side-effect free.
+    """
+
+    def __init__(self, trading_service, max_workers: int = 4):
+        self.trading_service = trading_service
+        self.db = trading_service.db
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='order-worker')
+        self.notifier = None
+        self._user_queues = {}    # user_id -> deque of request ids awaiting execution
+        self._queue_lock = threading.Lock()
+
+    def set_notifier(self, notifier: Callable[[Dict], None]):
+        """Register a callback invoked with the order request whenever it finishes"""
+        self.notifier = notifier
+
+    def recover(self):
+        """Re-queue submissions left behind by a previous process.
+
+        Only the process that owns the queue may call this, once, before serving:
+        anything RUNNING is assumed to belong to a dead process.
+        """
+        # A RUNNING order may or may not have committed before the restart, so never replay it
+        for row in self.db.get_order_requests_by_status('RUNNING'):
+            self.db.update_order_request(row[0], 'FAILED', json.dumps({
+                'success': False,
+                'message': 'Interrupted by server restart; check transaction history before resubmitting'
+            }))
+
+        for row in self.db.get_order_requests_by_status('QUEUED'):
+            self._enqueue(row[1], row[0])
+
+    def _enqueue(self, user_id: int, request_id: int):
+        """Append to the user's queue, starting a drain task if none is running"""
+        with self._queue_lock:
+            queue = self._user_queues.get(user_id)
+            if queue is not None:
+                queue.append(request_id)
+                return
+            self._user_queues[user_id] = deque([request_id])
+        self.executor.submit(self._drain, user_id)
+
+    def _drain(self, user_id: int):
+        """Execute a user's queued orders in order until the queue is empty"""
+        while True:
+            with self._queue_lock:
+                queue = self._user_queues[user_id]
+                if not queue:
+                    del self._user_queues[user_id]
+                    return
+                request_id = queue.popleft()
+            self._execute(request_id)
+
+    def _format_request(self, row: Tuple) -> Dict:
+        (request_id, user_id, idempotency_key, side, symbol, shares,
+         status, result, created_at, updated_at) = row
+        return {
+            'request_id': request_id,
+            'user_id': user_id,
+            'idempotency_key': idempotency_key,
+            'side': side,
+            'symbol': symbol,
+            'shares': shares,
+            'status': status,
+            'result': json.loads(result) if result else None,
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+
+    def submit(self, username: str, idempotency_key: str, side: str, symbol: str, shares: int) -> Dict:
+        """Record and enqueue a market order; replays of the same key return the original"""
+        user = self.db.get_user(username)
+        if not user:
+            return {'success': False, 'message': 'User not found'}
+
+        user_id = user[0]
+        symbol = symbol.upper()
+
+        if side not in ('BUY', 'SELL'):
+            return {'success': False, 'message': 'Side must be BUY or SELL'}
+
+        if shares <= 0:
+            return {'success': False, 'message': 'Invalid number of shares'}
+
+        row, created = self.db.create_order_request(user_id, idempotency_key, side, symbol, shares)
+        order_request = self._format_request(row)
+
+        if not created and (order_request['side'], order_request['symbol'], order_request['shares']) != (side, symbol, shares):
+            return {
+                'success': False,
+                'conflict': True,
+                'message': 'Idempotency key was already used for a different order'
+            }
+
+        if created:
+            self._enqueue(user_id, order_request['request_id'])
+
+        return {'success': True, 'duplicate': not created, 'order_request': order_request}
+
+    def get_status(self, username: str, request_id: int) -> Optional[Dict]:
+        """Get an order request owned by the user"""
+        user = self.db.get_user(username)
+        if not user:
+            return None
+
+        row = self.db.get_order_request(request_id)
+        if not row or row[1] != user[0]:
+            return None
+
+        return self._format_request(row)
+
+    def _execute(self, request_id: int):
+        """Worker body: run the trade and record its outcome"""
+        # Atomic QUEUED -> RUNNING, so a request is never executed twice
+        if not self.db.claim_order_request(request_id):
+            return
+
+        order_request = self._format_request(self.db.get_order_request(request_id))
+
+        try:
+            user = self.db.get_user_by_id(order_request['user_id'])
+            if not user:
+                result = {'success': False, 'message': 'User not found'}
+            elif order_request['side'] == 'BUY':
+                result = self.trading_service.buy_stock(user[1], order_request['symbol'], order_request['shares'])
+            else:
+                result = self.trading_service.sell_stock(user[1], order_request['symbol'], order_request['shares'])
+        except Exception as e:
+            print(f"Order request {request_id} failed: {e}")
+            result = {'success': False, 'message': 'Order execution failed'}
+
+        status = 'COMPLETED' if result['success'] else 'FAILED'
+        self.db.update_order_request(request_id, status, json.dumps(result))
+
+        if self.notifier:
+            try:
+                self.notifier(self._format_request(self.db.get_order_request(request_id)))
+            except Exception as e:
+                print(f"Error notifying order request {request_id}: {e}")
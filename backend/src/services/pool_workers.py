@@ -0,0 +1,84 @@
+"""Entry points for the process pools.
+
+Spawned pool processes import the module of the function they run, so the entry
+points live here rather than next to the pools: this module imports only the standard
+library at the top level, and everything a worker needs (TensorFlow, pandas, the
+services) is imported inside the worker. Keep it that way; in particular, never import the app or
+its routes, whose module-level singletons would start again in every worker.
+"""
+import os
+from typing import Dict
+
+
+def configure_threads(intra_op_threads: int, inter_op_threads: int):
+    """Process-pool initializer: fix TensorFlow's thread pools before any op runs"""
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(intra_op_threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = str(inter_op_threads)
+    os.environ['OMP_NUM_THREADS'] = str(intra_op_threads)
+    import tensorflow as tf
+
+    tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+
+
+def training_worker(job_id: int, symbol: str, store_path: str, predictor_options: Dict, mode: str = 'full') -> str:
+    """Process-pool entry point: train one symbol and record progress in the store"""
+    from services.training_jobs import TrainingJobStore
+
+    store = TrainingJobStore(store_path)
+    row = store.get(job_id)
+    if not row or row[2] != 'QUEUED':
+        return row[2] if row else 'FAILED'
+    if row[7]:
+        store.update(job_id, status='CANCELLED', message='Cancelled before start')
+        return 'CANCELLED'
+
+    store.update(job_id, status='RUNNING')
+
+    # Imported lazily so importing this module doesn't load TensorFlow
+    from services.ai_predictor import StockPredictor
+
+    def progress(epoch, epochs, logs):
+        store.update(job_id, epoch=epoch, epochs=epochs, loss=logs.get('loss'), val_loss=logs.get('val_loss'))
+        job = store.get(job_id)
+        return bool(job and job[7])
+
+    try:
+        predictor = StockPredictor(**predictor_options)
+        if mode == 'incremental':
+            result = predictor.retrain_model(symbol, progress=progress)
+        else:
+            trained = predictor.train_model(symbol, progress=progress)
+    except Exception as e:
+        store.update(job_id, status='FAILED', message=str(e))
+        return 'FAILED'
+
+    job = store.get(job_id)
+    if job and job[7]:
+        status, message = 'CANCELLED', 'Cancelled'
+    elif mode == 'incremental':
+        # Keeping the current model is a successful outcome, not a failure
+        status, message = 'COMPLETED', _retrain_message(result)
+    elif trained:
+        status, message = 'COMPLETED', f'Model trained for {symbol}'
+    else:
+        status, message = 'FAILED', f'Not enough data to train {symbol}'
+    store.update(job_id, status=status, message=message)
+    return status
+
+
+def _retrain_message(result: Dict) -> str:
+    if result['status'] == 'skipped':
+        return f"Skipped: {result['message']}"
+    verdict = 'Promoted fine-tuned model' if result['status'] == 'promoted' else 'Kept current model'
+    return f"{verdict} (val loss {result['baseline_loss']:.6f} -> {result['candidate_loss']:.6f})"
+
+
+def sweep_worker(df, strategy: Dict, params: Dict, initial_cash: float) -> Dict:
+    """Process-pool entry point for one point of a parameter sweep"""
+    from services.backtester import run_backtest
+
+    try:
+        return {'params': params, 'stats': run_backtest(df, strategy, initial_cash, include_curve=False)['stats']}
+    except Exception as e:
+        return {'params': params, 'error': str(e)}
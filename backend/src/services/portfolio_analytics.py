@@ -0,0 +1,212 @@
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+import sys
+import os
+import numpy as np
+import pandas as pd
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.user_locks import StripedLock
+from services.metrics import record_cache
+
+TRADING_DAYS = 252
+
+
+class PortfolioAnalytics:
+    """Performance analytics rebuilt from the transactions ledger and daily closes.
+
+    A user's history is held as dense (days x symbols) arrays of share deltas, trade
+    values and closes. Every metric is an array reduction over them, so there are no
+    per-row Python loops. The arrays are cached per user and extended in place when new
+    trades or new daily bars arrive instead of being rebuilt.
+    """
+
+    def __init__(self, db, stock_service, risk_free_rate: float = 0.0, bar_refresh_interval: int = 900):
+        self.db = db
+        self.stock_service = stock_service
+        self.risk_free_rate = risk_free_rate
+        self.bar_refresh_interval = bar_refresh_interval  # seconds between checks for new bars
+        self._cache = {}    # user_id -> history state
+        self._locks = StripedLock()
+
+    def get_analytics(self, username: str) -> Optional[Dict]:
+        """Get performance analytics for a user"""
+        user = self.db.get_user(username)
+        if not user:
+            return None
+
+        user_id = user[0]
+
+        with self._locks.hold(user_id):
+            state = self._cache.get(user_id)
+            record_cache('portfolio_analytics', state is not None)
+            # Cash and trades from one snapshot; a trade landing between two reads would skew the history
+            balance, new_trades = self.db.get_ledger_snapshot(user_id, state['last_tx_id'] if state else 0)
+            if balance is None:
+                return None
+            bars_stale = state is not None and time.time() - state['bars_checked'] > self.bar_refresh_interval
+
+            if state is None:
+                state = self._build(new_trades, balance)
+                self._cache[user_id] = state
+            elif new_trades or bars_stale:
+                self._extend(state, new_trades, balance)
+            else:
+                return state['result']
+
+            state['result'] = self._compute(state)
+            return state['result']
+
+    def invalidate(self, user_id: int):
+        """Drop a user's cached history so the next request rebuilds it"""
+        with self._locks.hold(user_id):
+            self._cache.pop(user_id, None)
+
+    def _build(self, ledger: List, balance: float) -> Dict:
+        """Build a user's history from scratch"""
+        state = {
+            'symbols': [],
+            'dates': np.array([], dtype='datetime64[D]'),
+            'closes': np.zeros((0, 0)),
+            'deltas': np.zeros((0, 0)),       # signed shares traded per day and symbol
+            'trade_values': np.zeros((0, 0)), # signed cost of those shares at the fill price
+            'start_cash': balance,
+            'last_tx_id': 0,
+            'bars_checked': time.time(),
+            'result': None
+        }
+        if ledger:
+            self._extend(state, ledger, balance)
+        return state
+
+    def _extend(self, state: Dict, ledger: List, balance: float):
+        """Fold new trades and new bars into the cached arrays.
+
+        Only rows from the last cached day onward are touched, since a new trade or
+        bar can't land any earlier than that.
+        """
+        symbols = state['symbols'] + sorted({row[1] for row in ledger} - set(state['symbols']))
+        if not symbols:
+            return
+
+        dates = state['dates']
+        keep = max(len(dates) - 1, 0)
+
+        if len(dates):
+            start = str(dates[-1])
+        else:
+            start = ledger[0][6][:10]
+
+        closes = self.stock_service.get_daily_closes(symbols, start)
+        if closes.empty:
+            # No daily bar yet (e.g. first trade today): value holdings at the current price
+            prices = self.stock_service.get_multiple_prices(symbols)
+            today = ledger[-1][6][:10] if ledger else str(dates[-1])
+            closes = pd.DataFrame([[prices.get(symbol, np.nan) for symbol in symbols]],
+                                  index=pd.to_datetime([today]), columns=symbols)
+
+        new_dates = closes.index.values.astype('datetime64[D]')
+        new_closes = closes.to_numpy(dtype=float)
+
+        width = len(symbols)
+        old_width = len(state['symbols'])
+
+        # Widen cached arrays for newly traded symbols, then splice in the fresh rows
+        def widen(array):
+            return np.pad(array[:keep], ((0, 0), (0, width - old_width)))
+
+        state['dates'] = np.concatenate([dates[:keep], new_dates])
+        state['closes'] = np.vstack([widen(state['closes']), new_closes])
+        rows = len(state['dates'])
+
+        deltas = np.zeros((rows, width))
+        trade_values = np.zeros((rows, width))
+        deltas[:keep] = widen(state['deltas'])
+        trade_values[:keep] = widen(state['trade_values'])
+        if len(dates) > keep:
+            # Carry over trades already recorded on the last cached day
+            deltas[keep, :old_width] = state['deltas'][keep]
+            trade_values[keep, :old_width] = state['trade_values'][keep]
+
+        if ledger:
+            index = {symbol: i for i, symbol in enumerate(symbols)}
+            sym_idx = np.array([index[row[1]] for row in ledger])
+            sign = np.where(np.array([row[2] for row in ledger]) == 'BUY', 1.0, -1.0)
+            trade_shares = sign * np.array([row[3] for row in ledger], dtype=float)
+            trade_amounts = sign * np.array([row[5] for row in ledger], dtype=float)
+            trade_dates = np.array([row[6][:10] for row in ledger], dtype='datetime64[D]')
+
+            # A trade is valued from the first bar on or after its date
+            day_idx = np.minimum(np.searchsorted(state['dates'], trade_dates), rows - 1)
+            np.add.at(deltas, (day_idx, sym_idx), trade_shares)
+            np.add.at(trade_values, (day_idx, sym_idx), trade_amounts)
+
+            state['last_tx_id'] = ledger[-1][0]
+
+        state['deltas'] = deltas
+        state['trade_values'] = trade_values
+        state['symbols'] = symbols
+        # Starting cash is whatever the current balance implies once every trade is unwound
+        state['start_cash'] = balance + trade_values.sum()
+        state['bars_checked'] = time.time()
+
+    def _compute(self, state: Dict) -> Dict:
+        """Compute the equity curve and summary statistics from the cached arrays"""
+        if not len(state['dates']):
+            return {
+                'start_date': None,
+                'end_date': None,
+                'starting_value': round(state['start_cash'], 2),
+                'ending_value': round(state['start_cash'], 2),
+                'time_weighted_return': 0.0,
+                'annualized_volatility': 0.0,
+                'sharpe_ratio': 0.0,
+                'max_drawdown': 0.0,
+                'positions': [],
+                'equity_curve': [],
+                'generated_at': datetime.utcnow().isoformat()
+            }
+
+        closes = pd.DataFrame(state['closes']).ffill().bfill().fillna(0.0).to_numpy()
+        shares = np.cumsum(state['deltas'], axis=0)
+        cash = state['start_cash'] - np.cumsum(state['trade_values'].sum(axis=1))
+        equity = cash + (shares * closes).sum(axis=1)
+
+        # Day-over-day P&L per position: carried shares marked to market plus same-day fills vs close
+        prev_shares = np.vstack([np.zeros((1, shares.shape[1])), shares[:-1]])
+        prev_closes = np.vstack([closes[:1], closes[:-1]])
+        position_pnl = prev_shares * (closes - prev_closes) + state['deltas'] * closes - state['trade_values']
+
+        prev_equity = np.concatenate([[state['start_cash']], equity[:-1]])
+        returns = np.divide(equity - prev_equity, prev_equity, out=np.zeros_like(equity), where=prev_equity != 0)
+        contributions = (position_pnl / np.where(prev_equity != 0, prev_equity, np.inf)[:, None]).sum(axis=0)
+
+        volatility = returns.std(ddof=1) if len(returns) > 1 else 0.0
+        excess = returns.mean() - self.risk_free_rate / TRADING_DAYS
+        sharpe = excess / volatility * np.sqrt(TRADING_DAYS) if volatility > 0 else 0.0
+        drawdowns = equity / np.maximum.accumulate(np.concatenate([[state['start_cash']], equity]))[1:] - 1
+
+        return {
+            'start_date': str(state['dates'][0]),
+            'end_date': str(state['dates'][-1]),
+            'starting_value': round(float(state['start_cash']), 2),
+            'ending_value': round(float(equity[-1]), 2),
+            'time_weighted_return': round(float(np.prod(1 + returns) - 1) * 100, 2),
+            'annualized_volatility': round(float(volatility * np.sqrt(TRADING_DAYS)) * 100, 2),
+            'sharpe_ratio': round(float(sharpe), 2),
+            'max_drawdown': round(float(drawdowns.min()) * 100, 2),
+            'positions': [
+                {
+                    'symbol': symbol,
+                    'shares': int(shares[-1, i]),
+                    'pnl': round(float(position_pnl[:, i].sum()), 2),
+                    'contribution': round(float(contributions[i]) * 100, 2)
+                }
+                for i, symbol in enumerate(state['symbols'])
+            ],
+            'equity_curve': [
+                {'date': str(date), 'value': round(float(value), 2)}
+                for date, value in zip(state['dates'], equity)
+            ],
+            'generated_at': datetime.utcnow().isoformat()
+        }
@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import sys
+import time
+from typing import Dict, Optional
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.metrics import record_cache
+
+
+class PredictionCache:
+    """On-disk prediction cache shared by every worker process.
+
+    Results are keyed by (symbol, tier, model version, last bar, days), so a retrained model
+    or a new daily bar naturally misses. The latest bar seen for each symbol is stored
+    too, letting repeat requests skip the market data fetch until it is due for a
+    re-check.
+    """
+
+    def __init__(self, db_path: str = 'models/predictions.db'):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def init_db(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+
+        # The store is only a cache, so a layout from before model tiers is just dropped
+        cursor.execute('PRAGMA table_info(predictions)')
+        columns = [row[1] for row in cursor.fetchall()]
+        if columns and 'tier' not in columns:
+            cursor.execute('DROP TABLE predictions')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS predictions (
+                symbol TEXT NOT NULL,
+                tier TEXT NOT NULL,
+                model_version REAL NOT NULL,
+                last_bar TEXT NOT NULL,
+                days INTEGER NOT NULL,
+                result TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (symbol, tier, model_version, last_bar, days)
+            )
+        ''')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS latest_bars (
+                symbol TEXT PRIMARY KEY,
+                last_bar TEXT NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def latest_bar(self, symbol: str, max_age: float) -> Optional[str]:
+        """Last bar recorded for a symbol, or None if unknown or checked too long ago"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT last_bar, checked_at FROM latest_bars WHERE symbol = ?', (symbol,))
+        row = cursor.fetchone()
+        conn.close()
+
+        fresh = bool(row) and time.time() - row[1] < max_age
+        record_cache('latest_bars', fresh)
+        return row[0] if fresh else None
+
+    def set_latest_bar(self, symbol: str, last_bar: str):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO latest_bars (symbol, last_bar, checked_at) VALUES (?, ?, ?)
+            ON CONFLICT(symbol) DO UPDATE SET last_bar = excluded.last_bar, checked_at = excluded.checked_at
+        ''', (symbol, last_bar, time.time()))
+        conn.commit()
+        conn.close()
+
+    def get(self, symbol: str, tier: str, model_version: float, last_bar: str, days: int) -> Optional[Dict]:
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT result FROM predictions
+            WHERE symbol = ? AND tier = ? AND model_version = ? AND last_bar = ? AND days = ?
+        ''', (symbol, tier, model_version, last_bar, days))
+        row = cursor.fetchone()
+        conn.close()
+        record_cache('predictions', row is not None)
+        return json.loads(row[0]) if row else None
+
+    def put(self, symbol: str, tier: str, model_version: float, last_bar: str, days: int, result: Dict):
+        """Store a result and drop the symbol's entries for older models or bars of the same tier"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            DELETE FROM predictions
+            WHERE symbol = ? AND tier = ? AND (model_version != ? OR last_bar != ?)
+        ''', (symbol, tier, model_version, last_bar))
+        cursor.execute('''
+            INSERT OR REPLACE INTO predictions (symbol, tier, model_version, last_bar, days, result)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (symbol, tier, model_version, last_bar, days, json.dumps(result)))
+        conn.commit()
+        conn.close()
+
+    def invalidate(self, symbol: str, tier: Optional[str] = None):
+        """Drop cached results for a symbol, or just one of its tiers (e.g. after retraining)"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        if tier:
+            cursor.execute('DELETE FROM predictions WHERE symbol = ? AND tier = ?', (symbol, tier))
+        else:
+            cursor.execute('DELETE FROM predictions WHERE symbol = ?', (symbol,))
+        conn.commit()
+        conn.close()
@@ -0,0 +1,225 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILE_ID = re.compile(r'^[\w.-]+$')
+# Numbered thread names ('Thread-12 (process_request_thread)', 'ThreadPoolExecutor-0_3') fold into one
+THREAD_NUMBERS = re.compile(r'^Thread-\d+ \((.+)\)$|-\d+(_\d+)?$|^Thread-\d+$')
+
+
+class ProfileStore:
+    """Directory of saved request profiles, keeping only the newest ``keep``.
+
+    Each profile is a pstats dump (``<id>.prof``, readable with pstats or snakeviz) with
+    a JSON sidecar describing the request.
+    """
+
+    def __init__(self, path: str = 'profiles', keep: int = 50):
+        self.path = path
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def _file(self, profile_id: str, extension: str) -> Optional[str]:
+        if not PROFILE_ID.match(profile_id):
+            return None
+        return os.path.join(self.path, f'{profile_id}.{extension}')
+
+    def save(self, profiler: cProfile.Profile, meta: Dict) -> str:
+        """Store a finished profile; returns its id"""
+        stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')
+        route = re.sub(r'\W+', '_', meta.get('route') or 'request').strip('_')
+        profile_id = f'{stamp}-{route}-{uuid.uuid4().hex[:6]}'
+        meta = {'id': profile_id, 'created_at': time.time(), **meta}
+
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            pstats.Stats(profiler).dump_stats(self._file(profile_id, 'prof'))
+            with open(self._file(profile_id, 'json'), 'w') as f:
+                json.dump(meta, f)
+            for stale in self.list()[self.keep:]:
+                for extension in ('prof', 'json'):
+                    try:
+                        os.remove(self._file(stale['id'], extension))
+                    except OSError:
+                        pass
+        return profile_id
+
+    def list(self) -> List[Dict]:
+        """Metadata of stored profiles, newest first"""
+        profiles = []
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return profiles
+        for name in names:
+            if name.endswith('.json'):
+                try:
+                    with open(os.path.join(self.path, name)) as f:
+                        profiles.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        profiles.sort(key=lambda meta: meta.get('created_at', 0), reverse=True)
+        return profiles
+
+    def profile_path(self, profile_id: str) -> Optional[str]:
+        path = self._file(profile_id, 'prof')
+        return path if path and os.path.exists(path) else None
+
+    def report(self, profile_id: str, limit: int = 50) -> Optional[str]:
+        path = self.profile_path(profile_id)
+        if path is None:
+            return None
+        with open(self._file(profile_id, 'json')) as f:
+            meta = json.load(f)
+        return format_report(pstats.Stats(path), meta, limit)
+
+
+def format_report(stats: pstats.Stats, meta: Dict, limit: int = 50) -> str:
+    """Request summary followed by the top functions by cumulative time"""
+    out = io.StringIO()
+    out.write(f"{meta.get('method')} {meta.get('path')} -> {meta.get('status')} "
+              f"in {meta.get('duration_ms')} ms (profile {meta.get('id')})\n\n")
+    stats.stream = out
+    stats.strip_dirs().sort_stats('cumulative').print_stats(limit)
+    return out.getvalue()
+
+
+class StackSampler:
+    """Periodic sampler of every thread's Python stack, for flamegraphs.
+
+    While running, a daemon thread reads ``sys._current_frames()`` every interval and
+    counts each thread's stack, root first, in the folded format that flamegraph.pl,
+    speedscope and inferno read: ``thread;frame;frame count``. Nothing is hooked into
+    the interpreter, so there is no cost while it is stopped, and running it costs one
+    stack walk per thread per interval. Only this process's threads are seen; training
+    pool processes are not.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stacks = Counter()
+        self._labels = {}    # code object -> frame label
+        self.interval = 0.01
+        self.started_at = None
+        self.stopped_at = None
+        self.samples = 0
+        self.sampling_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval_ms: float = 10, max_seconds: float = 600) -> bool:
+        """Start sampling from scratch; returns False if already running"""
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = max(interval_ms, 1) / 1000
+            self._stacks = Counter()
+            self.samples = 0
+            self.sampling_seconds = 0.0
+            self.started_at = time.time()
+            self.stopped_at = None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(max_seconds,), name='stack-sampler', daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> bool:
+        """Stop sampling, keeping the stacks collected so far; returns False if it wasn't running"""
+        with self._lock:
+            if not self.running:
+                return False
+            self._stop.set()
+            thread = self._thread
+        thread.join()
+        return True
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            filename = code.co_filename
+            if filename.startswith(SRC_DIR):
+                filename = os.path.relpath(filename, SRC_DIR)
+            elif 'site-packages' in filename:
+                filename = filename.rsplit('site-packages' + os.sep, 1)[-1]
+            else:
+                filename = os.path.basename(filename)
+            label = f'{code.co_name} ({filename}:{code.co_firstlineno})'.replace(';', ':')
+            self._labels[code] = label
+        return label
+
+    @staticmethod
+    def _thread_names() -> Dict[int, str]:
+        names = {}
+        for thread in threading.enumerate():
+            match = THREAD_NUMBERS.search(thread.name)
+            if match:
+                name = match.group(1) or thread.name[:match.start()] or 'Thread'
+            else:
+                name = thread.name
+            names[thread.ident] = name.replace(';', ':')
+        return names
+
+    def _sample(self, names: Dict[int, str], own_id: int):
+        frames_by_thread = sys._current_frames()
+        if any(thread_id not in names for thread_id in frames_by_thread):
+            # Only look thread names up again when a new thread appears
+            names.clear()
+            names.update(self._thread_names())
+        for thread_id, frame in frames_by_thread.items():
+            if thread_id == own_id:
+                continue
+            frames = []
+            while frame is not None:
+                frames.append(self._label(frame.f_code))
+                frame = frame.f_back
+            frames.append(names.get(thread_id, 'Thread'))
+            self._stacks[';'.join(reversed(frames))] += 1
+
+    def _run(self, max_seconds: float):
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + max_seconds
+        names = {}
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            start = time.perf_counter()
+            with self._lock:
+                self._sample(names, own_id)
+                self.samples += 1
+            elapsed = time.perf_counter() - start
+            self.sampling_seconds += elapsed
+            self._stop.wait(max(0.0, self.interval - elapsed))
+        self.stopped_at = time.time()
+
+    def folded(self) -> str:
+        """Collected stacks in the folded format, most frequent first"""
+        with self._lock:
+            stacks = self._stacks.most_common()
+        return ''.join(f'{stack} {count}\n' for stack, count in stacks)
+
+    def status(self) -> Dict:
+        end = self.stopped_at if self.stopped_at and not self.running else time.time()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        return {
+            'running': self.running,
+            'interval_ms': round(self.interval * 1000, 3),
+            'started_at': self.started_at,
+            'stopped_at': None if self.running else self.stopped_at,
+            'samples': self.samples,
+            'distinct_stacks': len(self._stacks),
+            # Share of wall time spent walking stacks (with the GIL held)
+            'overhead': round(self.sampling_seconds / elapsed, 4) if elapsed else 0.0
+        }
@@ -0,0 +1,236 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+
+def rank_recommendations(predictions: Dict[str, Dict]) -> List[Dict]:
+    """BUY and SELL predictions, strongest expected move first"""
+    recommendations = [pred for pred in predictions.values() if pred.get('recommendation') in ['BUY', 'SELL']]
+    recommendations.sort(key=lambda pred: abs(pred['trend_change']), reverse=True)
+    return recommendations
+
+
+class RecommendationSnapshots:
+    """Versioned recommendation snapshots in SQLite, served from memory.
+
+    Every web process reads the same store; each keeps the latest snapshot in memory and
+    checks for a newer version at most every ``reload_interval`` seconds, so serving a
+    snapshot costs the same whatever the size of the universe behind it.
+    """
+
+    def __init__(self, db_path: str = 'models/recommendations.db', reload_interval: int = 30, keep: int = 10):
+        self.db_path = db_path
+        self.reload_interval = reload_interval
+        self.keep = keep    # snapshots kept on disk
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self._latest = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def init_db(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS recommendation_snapshots (
+                version INTEGER PRIMARY KEY AUTOINCREMENT,
+                generated_at TEXT NOT NULL,
+                trigger TEXT NOT NULL,
+                universe_size INTEGER NOT NULL,
+                predicted INTEGER NOT NULL,
+                pending TEXT NOT NULL,
+                recommendations TEXT NOT NULL
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def save(self, trigger: str, universe_size: int, predicted: int, pending: List[str],
+             recommendations: List[Dict]) -> Dict:
+        """Store a new snapshot as the latest version and return it"""
+        snapshot = {
+            'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'trigger': trigger,
+            'universe_size': universe_size,
+            'predicted': predicted,
+            'pending': pending,
+            'recommendations': recommendations
+        }
+
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            INSERT INTO recommendation_snapshots
+            (generated_at, trigger, universe_size, predicted, pending, recommendations)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (snapshot['generated_at'], trigger, universe_size, predicted,
+              json.dumps(pending), json.dumps(recommendations)))
+        snapshot['version'] = cursor.lastrowid
+        cursor.execute('DELETE FROM recommendation_snapshots WHERE version <= ?', (snapshot['version'] - self.keep,))
+        conn.commit()
+        conn.close()
+
+        with self._lock:
+            self._latest = snapshot
+            self._checked_at = time.time()
+        return snapshot
+
+    def _load(self, version: int) -> Optional[Dict]:
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT version, generated_at, trigger, universe_size, predicted, pending, recommendations
+            FROM recommendation_snapshots WHERE version = ?
+        ''', (version,))
+        row = cursor.fetchone()
+        conn.close()
+        if not row:
+            return None
+
+        version, generated_at, trigger, universe_size, predicted, pending, recommendations = row
+        return {
+            'version': version,
+            'generated_at': generated_at,
+            'trigger': trigger,
+            'universe_size': universe_size,
+            'predicted': predicted,
+            'pending': json.loads(pending),
+            'recommendations': json.loads(recommendations)
+        }
+
+    def latest(self) -> Optional[Dict]:
+        """The newest snapshot, or None if none has been generated yet"""
+        with self._lock:
+            if time.time() - self._checked_at < self.reload_interval:
+                return self._latest
+
+            conn = self._connect()
+            cursor = conn.cursor()
+            cursor.execute('SELECT MAX(version) FROM recommendation_snapshots')
+            version = cursor.fetchone()[0]
+            conn.close()
+
+            if version is not None and (self._latest is None or self._latest['version'] != version):
+                self._latest = self._load(version) or self._latest
+            self._checked_at = time.time()
+            return self._latest
+
+
+class RecommendationJob:
+    """Regenerates the recommendation snapshot in the background.
+
+    A refresh runs once a day after ``hour_utc`` and when no snapshot exists yet (both
+    claimed so only one web process runs them, and released again if generation fails),
+    and after retraining. Refresh requests are
+    debounced, so a batch of retrains finishing together produces a single snapshot.
+    Predictions are made ``batch_size`` symbols at a time; symbols without a model have
+    training queued and are listed as pending until a later refresh.
+    """
+
+    def __init__(self, snapshots: RecommendationSnapshots, predictor: Callable, universe: List[str],
+                 claim_run: Callable[[str, str], bool], release_run: Callable[[str, str], None],
+                 tier: Optional[str] = None, days: int = 5, batch_size: int = 50, hour_utc: int = 21,
+                 debounce: int = 60, check_interval: int = 60):
+        self.snapshots = snapshots
+        self.predictor = predictor          # returns the shared StockPredictor
+        self.universe = list(dict.fromkeys(symbol.upper() for symbol in universe))
+        self.claim_run = claim_run
+        self.release_run = release_run
+        self.tier = tier
+        self.days = days
+        self.batch_size = batch_size
+        self.hour_utc = hour_utc            # after the US close, so predictions use the day's bar
+        self.debounce = debounce
+        self.check_interval = check_interval
+        self._requested = None              # (trigger, requested_at) of a pending refresh
+        self._request_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def generate(self, trigger: str = 'manual') -> Dict:
+        """Predict the whole universe and save the ranked result as a new snapshot"""
+        start = time.time()
+        predictor = self.predictor()
+        predictions = {}
+        pending = []
+        for i in range(0, len(self.universe), self.batch_size):
+            batch = self.universe[i:i + self.batch_size]
+            for symbol, pred in predictor.get_multiple_predictions(batch, self.days, tier=self.tier).items():
+                if pred.get('status') == 'pending':
+                    pending.append(symbol)
+                else:
+                    predictions[symbol] = pred
+
+        snapshot = self.snapshots.save(
+            trigger, len(self.universe), len(predictions), pending, rank_recommendations(predictions)
+        )
+        print(f"Recommendation snapshot {snapshot['version']} generated for {len(predictions)} symbols "
+              f"in {time.time() - start:.1f}s ({trigger})")
+        return snapshot
+
+    def request_refresh(self, trigger: str):
+        """Ask for a refresh once no other request has arrived for ``debounce`` seconds"""
+        with self._request_lock:
+            self._requested = (trigger, time.time())
+        self._wake.set()
+
+    def _due_request(self) -> Optional[str]:
+        with self._request_lock:
+            if self._requested is None or time.time() - self._requested[1] < self.debounce:
+                return None
+            trigger, _ = self._requested
+            self._requested = None
+            return trigger
+
+    def run_if_due(self, now: Optional[datetime] = None) -> Optional[Dict]:
+        """Generate a snapshot if one is requested, scheduled or missing"""
+        now = now or datetime.now(timezone.utc)
+        period = now.date().isoformat()
+        claimed = None
+        trigger = self._due_request()
+        if trigger is None and now.hour >= self.hour_utc and self.claim_run('recommendations', period):
+            trigger, claimed = 'schedule', 'recommendations'
+        if (trigger is None and self.snapshots.latest() is None
+                and self.claim_run('recommendations_initial', period)):
+            trigger, claimed = 'initial', 'recommendations_initial'
+        if not trigger:
+            return None
+
+        try:
+            return self.generate(trigger)
+        except Exception:
+            # Give the run back, so this or another process retries it on its next check
+            if claimed:
+                self.release_run(claimed, period)
+            raise
+
+    def _run(self):
+        while True:
+            try:
+                self.run_if_due()
+            except Exception as e:
+                print(f"Error generating recommendation snapshot: {e}")
+            self._wake.wait(self.check_interval)
+            self._wake.clear()
+            with self._request_lock:
+                requested = self._requested
+            if requested:
+                # Let the debounce window pass before checking again
+                time.sleep(max(0.0, self.debounce - (time.time() - requested[1])))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='recommendation-job', daemon=True)
+            self._thread.start()
@@ -1,8 +1,13 @@
-import yfinance as yf
+import pandas as pd
 import requests
 from typing import Dict, List, Optional
 from datetime import datetime, timedelta
 import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.market_data import yf
+from services.metrics import record_cache
 
 class StockService:
     def __init__(self):
@@ -27,10 +32,17 @@ class StockService:
     
     def get_stock_price(self, symbol: str) -> Optional[float]:
         """Get current stock price using yfinance"""
+        quote = self.get_stock_quote(symbol)
+        return quote['price'] if quote else None
+    
+    def get_stock_quote(self, symbol: str) -> Optional[Dict]:
+        """Get current price and the day's volume so far (None when unknown)"""
         try:
             # Check cache first
-            if self._is_cache_valid(symbol):
-                return self.cache[symbol]['price']
+            cached = self._is_cache_valid(symbol)
+            record_cache('prices', cached)
+            if cached:
+                return {'price': self.cache[symbol]['price'], 'volume': self.cache[symbol].get('volume')}
             
             stock = yf.Ticker(symbol)
             
@@ -40,14 +52,16 @@ class StockService:
                     data = stock.history(period=period)
                     if not data.empty:
                         current_price = float(data['Close'].iloc[-1])
+                        volume = float(data['Volume'].iloc[-1]) if 'Volume' in data else None
                         
                         # Update cache
                         self.cache[symbol] = {
                             'price': current_price,
+                            'volume': volume,
                             'timestamp': time.time()
                         }
                         
-                        return current_price
+                        return {'price': current_price, 'volume': volume}
                 except:
                     continue
             
@@ -59,7 +73,7 @@ class StockService:
             }
             
             if symbol in fallback_prices:
-                return fallback_prices[symbol]
+                return {'price': fallback_prices[symbol], 'volume': None}
             
             return None
         except Exception as e:
@@ -128,13 +142,22 @@ class StockService:
         
         return results[:10]  # Return top 10 results
     
-    def get_historical_data(self, symbol: str, period: str = "1mo") -> List[Dict]:
-        """Get historical stock data"""
+    def get_history(self, symbol: str, period: str = "1mo") -> Optional[pd.DataFrame]:
+        """Get raw OHLCV history as a DataFrame"""
         try:
             stock = yf.Ticker(symbol)
             data = stock.history(period=period)
+            return None if data.empty else data
+        except Exception as e:
+            print(f"Error fetching history for {symbol}: {e}")
+            return None
+    
+    def get_historical_data(self, symbol: str, period: str = "1mo") -> List[Dict]:
+        """Get historical stock data"""
+        try:
+            data = self.get_history(symbol, period)
             
-            if data.empty:
+            if data is None:
                 return []
             
             historical = []
@@ -153,6 +176,23 @@ class StockService:
             print(f"Error fetching historical data for {symbol}: {e}")
             return []
     
+    def get_daily_closes(self, symbols: List[str], start: str) -> pd.DataFrame:
+        """Get daily closes for several symbols from ``start`` (YYYY-MM-DD), one column per symbol"""
+        try:
+            data = yf.download(symbols, start=start, interval="1d", progress=False, threads=True)
+            if data.empty:
+                return pd.DataFrame(columns=symbols)
+            
+            closes = data['Close']
+            if isinstance(closes, pd.Series):
+                closes = closes.to_frame(symbols[0])
+            
+            closes.index = pd.to_datetime(closes.index).tz_localize(None).normalize()
+            return closes.reindex(columns=symbols)
+        except Exception as e:
+            print(f"Error fetching daily closes for {symbols}: {e}")
+            return pd.DataFrame(columns=symbols)
+    
     def validate_symbol(self, symbol: str) -> bool:
         """Validate if a stock symbol exists"""
         # Always allow popular stocks as fallback
@@ -204,10 +244,50 @@ class StockService:
     def get_multiple_prices(self, symbols: List[str]) -> Dict[str, float]:
         """Get prices for multiple symbols efficiently"""
         prices = {}
+        missing = []
         
         for symbol in symbols:
-            price = self.get_stock_price(symbol)
-            if price:
-                prices[symbol] = price
+            cached = self._is_cache_valid(symbol)
+            record_cache('prices', cached)
+            if cached:
+                prices[symbol] = self.cache[symbol]['price']
+            elif symbol not in missing:
+                missing.append(symbol)
+        
+        if missing:
+            prices.update(self._fetch_batch_prices(missing))
+        
+        # Anything the batch download missed goes through the single-symbol path (incl. fallbacks)
+        for symbol in missing:
+            if symbol not in prices:
+                price = self.get_stock_price(symbol)
+                if price:
+                    prices[symbol] = price
+        
+        return prices
+    
+    def _fetch_batch_prices(self, symbols: List[str]) -> Dict[str, float]:
+        """Download latest closes for several symbols in one provider call"""
+        prices = {}
+        try:
+            data = yf.download(symbols, period="5d", progress=False, threads=True)
+            if data.empty:
+                return prices
+            
+            closes = data['Close']
+            if isinstance(closes, pd.Series):
+                closes = closes.to_frame(symbols[0])
+            
+            now = time.time()
+            for symbol in symbols:
+                if symbol not in closes:
+                    continue
+                series = closes[symbol].dropna()
+                if not series.empty:
+                    price = float(series.iloc[-1])
+                    prices[symbol] = price
+                    self.cache[symbol] = {'price': price, 'timestamp': now}
+        except Exception as e:
+            print(f"Error fetching batch prices for {symbols}: {e}")
         
-        return prices
\ No newline at end of file
+        return prices
@@ -0,0 +1,121 @@
+import os
+import threading
+from typing import Optional
+import sys
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.model_tiers import rollout
+
+# The standalone LiteRT / tflite-runtime interpreters run models without loading
+# TensorFlow; fall back to the one bundled with TensorFlow when neither is installed.
+try:
+    from ai_edge_litert.interpreter import Interpreter
+except ImportError:
+    try:
+        from tflite_runtime.interpreter import Interpreter
+    except ImportError:
+        Interpreter = None
+
+# Largest acceptable difference from Keras, in scaled Close units
+PARITY_TOLERANCE = 1e-4
+QUANTIZED_PARITY_TOLERANCE = 1e-2
+
+
+def _interpreter_class():
+    if Interpreter is not None:
+        return Interpreter
+    import tensorflow as tf
+    return tf.lite.Interpreter
+
+
+def tflite_path(model_file: str) -> str:
+    return os.path.splitext(model_file)[0] + '.tflite'
+
+
+def export_tflite(model, path: str, quantize: bool = False) -> str:
+    """Convert a Keras Sequential model to a single-window TFLite flatbuffer at ``path``.
+
+    The converter can't lower the LSTM's dynamic while loop, so the model is rebuilt
+    with unrolled LSTMs and a fixed batch of one before conversion. ``quantize``
+    applies dynamic-range quantization to the weights.
+    """
+    import tensorflow as tf
+
+    config = model.get_config()
+    batch_shape = [1, *model.input_shape[1:]]
+    for layer in config['layers']:
+        if layer['class_name'] == 'LSTM':
+            layer['config']['unroll'] = True
+        # Keras 3 names the input shape 'batch_shape'; Keras 2 (TensorFlow 2.15) uses 'batch_input_shape',
+        # on the InputLayer and on a first layer built with input_shape=
+        for key in ('batch_shape', 'batch_input_shape'):
+            if key in layer['config']:
+                layer['config'][key] = batch_shape
+
+    inference_model = tf.keras.Sequential.from_config(config)
+    inference_model.set_weights(model.get_weights())
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(inference_model)
+    if quantize:
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    return path
+
+
+class TFLiteModel:
+    """Next-day Close model served through the TFLite interpreter.
+
+    The interpreter is not thread-safe, so invocations are serialized per model.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.interpreter = _interpreter_class()(model_path=path)
+        self.interpreter.allocate_tensors()
+        self._input = self.interpreter.get_input_details()[0]['index']
+        self._output = self.interpreter.get_output_details()[0]['index']
+        self._lock = threading.Lock()
+
+    def predict_next(self, windows: np.ndarray) -> np.ndarray:
+        predictions = np.empty(len(windows), dtype=np.float32)
+        with self._lock:
+            for i, window in enumerate(windows):
+                self.interpreter.set_tensor(self._input, np.ascontiguousarray(window[None], dtype=np.float32))
+                self.interpreter.invoke()
+                predictions[i] = self.interpreter.get_tensor(self._output)[0, 0]
+        return predictions
+
+    def forecast(self, windows: np.ndarray, days: int) -> np.ndarray:
+        return rollout(self.predict_next, windows, days)
+
+
+def parity_error(keras_model, tflite_model: TFLiteModel, windows: Optional[np.ndarray] = None) -> float:
+    """Largest absolute difference between Keras and TFLite next-day predictions"""
+    if windows is None:
+        windows = np.random.default_rng(0).random((8, *keras_model.input_shape[1:]), dtype=np.float32)
+    windows = np.asarray(windows, dtype=np.float32)
+    expected = keras_model(windows, training=False).numpy()[:, 0]
+    return float(np.abs(tflite_model.predict_next(windows) - expected).max())
+
+
+def export_checked(keras_model, model_file: str, quantize: bool = False,
+                   windows: Optional[np.ndarray] = None) -> Optional[str]:
+    """Export the TFLite artifact for ``model_file`` and keep it only if it matches Keras"""
+    path = tflite_path(model_file)
+    try:
+        export_tflite(keras_model, path, quantize)
+        error = parity_error(keras_model, TFLiteModel(path), windows)
+    except Exception as e:
+        print(f"TFLite export failed for {model_file}: {e}")
+        error = None
+
+    tolerance = QUANTIZED_PARITY_TOLERANCE if quantize else PARITY_TOLERANCE
+    if error is None or error > tolerance:
+        if error is not None:
+            print(f"TFLite parity check failed for {model_file}: max error {error:.2e}")
+        if os.path.exists(path):
+            os.remove(path)
+        return None
+    return path
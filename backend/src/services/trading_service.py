@@ -4,11 +4,14 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models.database import Database
 from services.stock_service import StockService
+from services.user_locks import StripedLock
 
 class TradingService:
-    def __init__(self):
-        self.db = Database()
-        self.stock_service = StockService()
+    def __init__(self, db: Optional[Database] = None, stock_service: Optional[StockService] = None):
+        self.db = db or Database()
+        self.stock_service = stock_service or StockService()
+        # Serializes each user's read-check-write; unrelated users rarely share a stripe
+        self.user_locks = StripedLock()
     
     def create_user(self, username: str, email: str = None, initial_balance: float = 100000) -> Optional[int]:
         """Create a new user account"""
@@ -106,18 +109,21 @@ class TradingService:
         
         total_cost = shares * current_price
         
-        # Check if user has enough balance
-        if balance < total_cost:
-            return {
-                'success': False, 
-                'message': f'Insufficient funds. Required: ${total_cost:.2f}, Available: ${balance:.2f}'
-            }
-        
-        # Execute trade
-        new_balance = balance - total_cost
-        self.db.update_balance(user_id, new_balance)
-        self.db.add_transaction(user_id, symbol, 'BUY', shares, current_price, total_cost)
-        self.db.update_portfolio(user_id, symbol, shares, current_price)
+        # Provider calls stay outside the critical section; only the balance check and write are locked
+        with self.user_locks.hold(user_id):
+            balance = self.db.get_user_by_id(user_id)[3]
+            
+            # Check if user has enough balance
+            if balance < total_cost:
+                return {
+                    'success': False, 
+                    'message': f'Insufficient funds. Required: ${total_cost:.2f}, Available: ${balance:.2f}'
+                }
+            
+            # Execute trade
+            new_balance = self.db.execute_trades(user_id, [(symbol, 'BUY', shares, current_price)])
+            if new_balance is None:
+                return {'success': False, 'message': 'Insufficient funds'}
         
         return {
             'success': True,
@@ -142,15 +148,8 @@ class TradingService:
         if shares <= 0:
             return {'success': False, 'message': 'Invalid number of shares'}
         
-        # Check if user owns the stock
-        portfolio = self.db.get_portfolio(user_id)
-        owned_shares = 0
-        
-        for port_symbol, port_shares, _ in portfolio:
-            if port_symbol == symbol:
-                owned_shares = port_shares
-                break
-        
+        # Cheap pre-check so users without the position don't cost a provider call
+        owned_shares = self._owned_shares(user_id, symbol)
         if owned_shares < shares:
             return {
                 'success': False, 
@@ -164,11 +163,19 @@ class TradingService:
         
         total_proceeds = shares * current_price
         
-        # Execute trade
-        new_balance = balance + total_proceeds
-        self.db.update_balance(user_id, new_balance)
-        self.db.add_transaction(user_id, symbol, 'SELL', shares, current_price, total_proceeds)
-        self.db.update_portfolio(user_id, symbol, -shares, current_price)
+        with self.user_locks.hold(user_id):
+            # Re-check holdings now that we hold the user's lock
+            owned_shares = self._owned_shares(user_id, symbol)
+            if owned_shares < shares:
+                return {
+                    'success': False, 
+                    'message': f'Insufficient shares. You own {owned_shares} shares of {symbol}'
+                }
+            
+            # Execute trade
+            new_balance = self.db.execute_trades(user_id, [(symbol, 'SELL', shares, current_price)])
+            if new_balance is None:
+                return {'success': False, 'message': f'Insufficient shares of {symbol}'}
         
         return {
             'success': True,
@@ -180,6 +187,103 @@ class TradingService:
             'new_balance': round(new_balance, 2)
         }
     
+    def execute_basket(self, username: str, legs: List[Dict]) -> Dict:
+        """Execute a multi-leg order atomically (all legs fill or none do)"""
+        user = self.db.get_user(username)
+        if not user:
+            return {'success': False, 'message': 'User not found'}
+        
+        user_id = user[0]
+        
+        orders = []
+        for leg in legs:
+            symbol = leg['symbol'].upper()
+            side = leg['side'].upper()
+            shares = leg['shares']
+            if side not in ('BUY', 'SELL'):
+                return {'success': False, 'message': f'Invalid side for {symbol}: {side}'}
+            if shares <= 0:
+                return {'success': False, 'message': f'Invalid number of shares for {symbol}'}
+            orders.append((symbol, side, shares))
+        
+        # One batched price lookup for the whole basket; a symbol without a price is rejected
+        symbols = list(dict.fromkeys(symbol for symbol, _, _ in orders))
+        prices = self.stock_service.get_multiple_prices(symbols)
+        unpriced = [symbol for symbol in symbols if not prices.get(symbol)]
+        if unpriced:
+            return {
+                'success': False,
+                'message': f'Unable to fetch current price for: {", ".join(unpriced)}'
+            }
+        
+        total_cost = sum(shares * prices[symbol] for symbol, side, shares in orders if side == 'BUY')
+        total_proceeds = sum(shares * prices[symbol] for symbol, side, shares in orders if side == 'SELL')
+        selling = {}
+        for symbol, side, shares in orders:
+            if side == 'SELL':
+                selling[symbol] = selling.get(symbol, 0) + shares
+        
+        with self.user_locks.hold(user_id):
+            # Validate share availability for every sell leg
+            owned = {port_symbol: port_shares for port_symbol, port_shares, _ in self.db.get_portfolio(user_id)}
+            for symbol, shares in selling.items():
+                if owned.get(symbol, 0) < shares:
+                    return {
+                        'success': False,
+                        'message': f'Insufficient shares. You own {owned.get(symbol, 0)} shares of {symbol}'
+                    }
+            
+            # Validate cash for the basket as a whole, with sells funding buys
+            balance = self.db.get_user_by_id(user_id)[3]
+            available = balance + total_proceeds
+            if available < total_cost:
+                return {
+                    'success': False,
+                    'message': f'Insufficient funds. Required: ${total_cost:.2f}, Available: ${available:.2f}'
+                }
+            
+            # Execute all legs in one transaction
+            trades = [(symbol, side, shares, prices[symbol]) for symbol, side, shares in orders]
+            new_balance = self.db.execute_trades(user_id, trades)
+            if new_balance is None:
+                return {'success': False, 'message': 'Basket could not be executed; no legs were filled'}
+        
+        return {
+            'success': True,
+            'message': f'Successfully executed basket of {len(trades)} orders',
+            'legs': [
+                {
+                    'symbol': symbol,
+                    'side': side,
+                    'shares': shares,
+                    'price': round(price, 2),
+                    'total_amount': round(shares * price, 2)
+                }
+                for symbol, side, shares, price in trades
+            ],
+            'total_cost': round(total_cost, 2),
+            'total_proceeds': round(total_proceeds, 2),
+            'new_balance': round(new_balance, 2)
+        }
+    
+    def fill_order(self, order_id: int, user_id: int, symbol: str, side: str, shares: int,
+                   price: float) -> Optional[float]:
+        """Fill a resting order through the transactional trade path; returns the new balance.
+        
+        The order is marked FILLED in the same transaction as the trade. None means
+        nothing was written: the user lacks the cash or shares, or the order is no
+        longer resting.
+        """
+        with self.user_locks.hold(user_id):
+            return self.db.execute_trades(user_id, [(symbol, side, shares, price)], fill_order_id=order_id)
+    
+    def _owned_shares(self, user_id: int, symbol: str) -> int:
+        """Shares of ``symbol`` currently held by the user"""
+        for port_symbol, port_shares, _ in self.db.get_portfolio(user_id):
+            if port_symbol == symbol:
+                return port_shares
+        return 0
+    
     def get_transaction_history(self, username: str, limit: int = 50) -> List[Dict]:
         """Get user's transaction history"""
         user = self.db.get_user(username)
@@ -0,0 +1,338 @@
+import multiprocessing
+import os
+import sqlite3
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Optional, Tuple
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from services.pool_workers import configure_threads, training_worker
+
+ACTIVE_STATUSES = ('QUEUED', 'RUNNING')
+# 'full' trains from scratch; 'incremental' fine-tunes the saved model on recent bars
+TRAINING_MODES = ('full', 'incremental')
+
+
+class TrainingJobStore:
+    """SQLite record of training jobs, shared by the web workers and training processes"""
+
+    def __init__(self, db_path: str = 'models/training_jobs.db'):
+        self.db_path = db_path
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.init_db()
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    def init_db(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS training_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                symbol TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'QUEUED' CHECK (status IN ('QUEUED', 'RUNNING', 'COMPLETED', 'FAILED', 'CANCELLED')),
+                epoch INTEGER DEFAULT 0,
+                epochs INTEGER,
+                loss REAL,
+                val_loss REAL,
+                cancel_requested INTEGER DEFAULT 0,
+                message TEXT,
+                owner_pid INTEGER,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                mode TEXT NOT NULL DEFAULT 'full'
+            )
+        ''')
+        cursor.execute('PRAGMA table_info(training_jobs)')
+        if 'mode' not in [column[1] for column in cursor.fetchall()]:
+            cursor.execute("ALTER TABLE training_jobs ADD COLUMN mode TEXT NOT NULL DEFAULT 'full'")
+
+        # At most one queued or running job per symbol, across every process
+        cursor.execute('''
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_training_jobs_active
+            ON training_jobs (symbol) WHERE status IN ('QUEUED', 'RUNNING')
+        ''')
+
+        # Last period each scheduled task ran for, so only one process runs it per period
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS scheduled_runs (
+                name TEXT PRIMARY KEY,
+                period TEXT NOT NULL
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def create(self, symbol: str, owner_pid: int, mode: str = 'full') -> Tuple[Tuple, bool]:
+        """Insert a queued job, or return the symbol's active job.
+
+        Returns (row, created) where created is False if a job was already active.
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                'INSERT INTO training_jobs (symbol, owner_pid, mode) VALUES (?, ?, ?)', (symbol, owner_pid, mode)
+            )
+            conn.commit()
+            cursor.execute('SELECT * FROM training_jobs WHERE id = ?', (cursor.lastrowid,))
+            created = True
+        except sqlite3.IntegrityError:
+            cursor.execute(
+                "SELECT * FROM training_jobs WHERE symbol = ? AND status IN ('QUEUED', 'RUNNING')", (symbol,)
+            )
+            created = False
+        row = cursor.fetchone()
+        conn.close()
+        return row, created
+
+    def get(self, job_id: int) -> Optional[Tuple]:
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM training_jobs WHERE id = ?', (job_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return row
+
+    def get_by_status(self, status: str):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT * FROM training_jobs WHERE status = ? ORDER BY id', (status,))
+        rows = cursor.fetchall()
+        conn.close()
+        return rows
+
+    def update(self, job_id: int, **fields):
+        """Update columns of a job; finished jobs are never moved back"""
+        columns = ', '.join(f'{name} = ?' for name in fields)
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute(f'''
+            UPDATE training_jobs SET {columns}, updated_at = CURRENT_TIMESTAMP
+            WHERE id = ? AND status IN ('QUEUED', 'RUNNING')
+        ''', (*fields.values(), job_id))
+        updated = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return updated
+
+    def request_cancel(self, job_id: int) -> bool:
+        return self.update(job_id, cancel_requested=1)
+
+    def claim_run(self, name: str, period: str) -> bool:
+        """Record that scheduled task ``name`` runs for ``period``.
+
+        Returns False if it already ran for that period, in this or another process.
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('INSERT OR IGNORE INTO scheduled_runs (name, period) VALUES (?, ?)', (name, ''))
+        cursor.execute('UPDATE scheduled_runs SET period = ? WHERE name = ? AND period != ?', (period, name, period))
+        claimed = cursor.rowcount > 0
+        conn.commit()
+        conn.close()
+        return claimed
+
+    def release_run(self, name: str, period: str):
+        """Undo a ``claim_run`` for ``period`` so the task can be claimed again"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('UPDATE scheduled_runs SET period = ? WHERE name = ? AND period = ?', ('', name, period))
+        conn.commit()
+        conn.close()
+
+
+def _process_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def thread_budget(max_workers: int) -> Tuple[int, int]:
+    """(intra-op, inter-op) TensorFlow threads per training process for ``max_workers`` processes.
+
+    Splits the cores evenly between the processes so concurrent training doesn't
+    oversubscribe them; a single LSTM's ops depend on each other, so one inter-op
+    thread is enough.
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, max_workers)), 1
+
+
+class TrainingJobManager:
+    """Runs model training on a bounded process pool.
+
+    Jobs are deduplicated per symbol, report their current epoch and losses through the
+    store, and can be cancelled: a queued job is dropped and a running one stops at the
+    end of its current epoch without saving its model. Each process gets fixed
+    TensorFlow thread pools (by default an even share of the cores) instead of
+    TensorFlow's defaults, which assume a process has the whole machine to itself.
+    """
+
+    def __init__(self, store_path: str = 'models/training_jobs.db', max_workers: int = 1,
+                 predictor_options: Optional[Dict] = None, intra_op_threads: Optional[int] = None,
+                 inter_op_threads: Optional[int] = None):
+        self.store = TrainingJobStore(store_path)
+        self.predictor_options = predictor_options or {}    # StockPredictor kwargs for the workers
+        self.max_workers = max_workers
+        default_intra, default_inter = thread_budget(max_workers)
+        self.intra_op_threads = intra_op_threads or default_intra
+        self.inter_op_threads = inter_op_threads or default_inter
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        self._futures = {}    # job_id -> future for jobs submitted by this process
+        self.notifier = None
+        self.recover()
+
+    def set_notifier(self, notifier: Callable[[Dict], None]):
+        """Register a callback invoked with the job when a job submitted by this process finishes"""
+        self.notifier = notifier
+
+    def _pool(self) -> ProcessPoolExecutor:
+        # Spawned rather than forked: forking a process that has TensorFlow loaded is unsafe
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=configure_threads, initargs=(self.intra_op_threads, self.inter_op_threads)
+                )
+            return self._executor
+
+    def shutdown(self, wait: bool = True):
+        """Stop the process pool; queued work that hasn't started is dropped"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=True)
+
+    def recover(self):
+        """Fail jobs left behind by a web process that no longer exists.
+
+        Jobs owned by live processes are left alone, so starting another web worker
+        doesn't fail them.
+        """
+        for status in ACTIVE_STATUSES:
+            for row in self.store.get_by_status(status):
+                if not _process_alive(row[9]):
+                    self.store.update(row[0], status='FAILED', message='Interrupted by server restart')
+
+    def _format_job(self, row: Tuple) -> Dict:
+        (job_id, symbol, status, epoch, epochs, loss, val_loss,
+         cancel_requested, message, _, created_at, updated_at, mode) = row
+        return {
+            'job_id': job_id,
+            'symbol': symbol,
+            'mode': mode,
+            'status': status,
+            'epoch': epoch,
+            'epochs': epochs,
+            'loss': loss,
+            'val_loss': val_loss,
+            'cancel_requested': bool(cancel_requested),
+            'message': message,
+            'created_at': created_at,
+            'updated_at': updated_at
+        }
+
+    def submit(self, symbol: str, mode: str = 'full') -> Dict:
+        """Queue training for a symbol; returns the already active job if there is one"""
+        if mode not in TRAINING_MODES:
+            raise ValueError(f"Unknown training mode: {mode}")
+        symbol = symbol.upper()
+        row, created = self.store.create(symbol, os.getpid(), mode)
+        job = self._format_job(row)
+
+        if created:
+            future = self._pool().submit(
+                training_worker, job['job_id'], symbol, self.store.db_path, self.predictor_options, mode
+            )
+            self._futures[job['job_id']] = future
+            future.add_done_callback(lambda f, job_id=job['job_id']: self._finished(job_id, f))
+
+        return {'success': True, 'duplicate': not created, 'job': job}
+
+    def _finished(self, job_id: int, future):
+        self._futures.pop(job_id, None)
+        if future.cancelled():
+            self.store.update(job_id, status='CANCELLED', message='Cancelled before start')
+        elif future.exception() is not None:
+            # The worker process died before it could record an outcome
+            self.store.update(job_id, status='FAILED', message=str(future.exception()))
+
+        if self.notifier:
+            try:
+                self.notifier(self.get(job_id))
+            except Exception as e:
+                print(f"Error notifying training job {job_id}: {e}")
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        row = self.store.get(job_id)
+        return self._format_job(row) if row else None
+
+    def cancel(self, job_id: int) -> Optional[Dict]:
+        """Cancel a queued or running job; returns the job, or None if it doesn't exist"""
+        row = self.store.get(job_id)
+        if not row:
+            return None
+
+        self.store.request_cancel(job_id)
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.cancel()    # only succeeds while the job is still waiting for a worker
+        return self.get(job_id)
+
+
+class RetrainScheduler:
+    """Queues an incremental retrain of every trained symbol once a day.
+
+    Runs in each web process, but a day's run is claimed through the job store so only
+    one process queues it. The jobs themselves go through the training pool, so they are
+    deduplicated and cancellable like any other training job.
+    """
+
+    def __init__(self, training_jobs: TrainingJobManager, symbols: Callable[[], Iterable[str]],
+                 hour_utc: int = 22, check_interval: int = 300):
+        self.training_jobs = training_jobs
+        self.symbols = symbols              # returns the symbols that have a trained model
+        self.hour_utc = hour_utc            # after the US close, so the day's bar is final
+        self.check_interval = check_interval
+        self._thread = None
+
+    def run_if_due(self, now: Optional[datetime] = None) -> int:
+        """Queue today's retrains if it's past the scheduled hour and nobody has yet"""
+        now = now or datetime.now(timezone.utc)
+        if now.hour < self.hour_utc or not self.training_jobs.store.claim_run('daily_retrain', now.date().isoformat()):
+            return 0
+
+        queued = 0
+        for symbol in sorted(self.symbols()):
+            if not self.training_jobs.submit(symbol, mode='incremental')['duplicate']:
+                queued += 1
+        print(f"Queued incremental retraining for {queued} symbols")
+        return queued
+
+    def _run(self):
+        while True:
+            try:
+                self.run_if_due()
+            except Exception as e:
+                print(f"Error scheduling retraining: {e}")
+            time.sleep(self.check_interval)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='retrain-scheduler', daemon=True)
+            self._thread.start()
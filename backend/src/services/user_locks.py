@@ -0,0 +1,23 @@
+import threading
+from contextlib import contextmanager
+
+
+class StripedLock:
+    """Fixed pool of locks striped by key.
+
+    Keys that hash to the same stripe share a lock, so memory stays bounded no matter
+    how many users there are, while unrelated users almost always proceed in parallel.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def lock_for(self, key) -> threading.Lock:
+        return self._locks[hash(key) % len(self._locks)]
+
+    @contextmanager
+    def hold(self, key):
+        """Hold the lock for ``key`` for the duration of the block"""
+        lock = self.lock_for(key)
+        with lock:
+            yield
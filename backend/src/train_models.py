@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Train models for many symbols in parallel, e.g. overnight for a whole universe.
+
+Symbols are trained on a pool of --workers processes, each with fixed TensorFlow
+thread pools (by default an even share of the cores), through the same job store as
+the API. Progress is kept in a JSON manifest; rerunning with the same manifest after
+an interruption skips completed symbols and retries failed ones up to --max-attempts.
+
+Usage (from backend/):
+    python src/train_models.py AAPL MSFT NVDA
+    python src/train_models.py --symbols-file universe.txt --workers 8 --manifest models/nightly.json
+    python src/train_models.py --manifest models/nightly.json      # resume
+"""
+
+import argparse
+import os
+import sys
+
+# Add the backend directory to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config.settings import Config
+from services.batch_training import train_symbols
+from services.training_jobs import TRAINING_MODES
+
+
+def read_symbols(path):
+    """One symbol per line (or comma-separated); blank lines and # comments are ignored"""
+    symbols = []
+    with open(path) as f:
+        for line in f:
+            line = line.split('#', 1)[0]
+            symbols += [symbol for symbol in line.replace(',', ' ').split()]
+    return symbols
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('symbols', nargs='*', help='symbols to train (added to the manifest)')
+    parser.add_argument('--symbols-file', help='file of symbols, one per line')
+    parser.add_argument('--manifest', default=Config.TRAINING_MANIFEST_PATH, help='progress manifest to create or resume')
+    parser.add_argument('--mode', choices=TRAINING_MODES, help="default: the manifest's mode, or full")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2),
+                        help='training processes (default: half the cores)')
+    parser.add_argument('--intra-op-threads', type=int, default=Config.TRAINING_INTRA_OP_THREADS or None,
+                        help='TensorFlow intra-op threads per process (default: cores / workers)')
+    parser.add_argument('--inter-op-threads', type=int, default=Config.TRAINING_INTER_OP_THREADS or None,
+                        help='TensorFlow inter-op threads per process (default: 1)')
+    parser.add_argument('--max-attempts', type=int, default=2, help='tries per symbol across runs')
+    args = parser.parse_args()
+
+    symbols = list(args.symbols)
+    if args.symbols_file:
+        symbols += read_symbols(args.symbols_file)
+    if not symbols and not os.path.exists(args.manifest):
+        parser.error('give symbols, --symbols-file, or an existing --manifest to resume')
+
+    try:
+        counts = train_symbols(
+            symbols, args.manifest, mode=args.mode, max_workers=args.workers,
+            store_path=Config.TRAINING_JOBS_PATH,
+            intra_op_threads=args.intra_op_threads, inter_op_threads=args.inter_op_threads,
+            max_attempts=args.max_attempts,
+            predictor_options={
+                'cache_path': Config.PREDICTION_CACHE_PATH,
+                'inference_backend': Config.INFERENCE_BACKEND,
+                'tflite_quantize': Config.TFLITE_QUANTIZE,
+                'retrain_epochs': Config.RETRAIN_EPOCHS
+            }
+        )
+    except ValueError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        print(f'Resume with: python src/train_models.py --manifest {args.manifest}')
+        sys.exit(130)
+
+    sys.exit(0 if not counts.get('failed') else 1)
+
+
+if __name__ == '__main__':
+    main()
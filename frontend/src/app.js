@@ -2,6 +2,7 @@ class StockTradingApp {
     constructor() {
         this.apiBase = 'http://localhost:5000/api';
         this.socket = null;
+        this.subscribedSymbols = new Set();
         this.currentUser = null;
         this.selectedStock = null;
         this.searchTimeout = null;
@@ -44,10 +45,15 @@ class StockTradingApp {
     }
 
     initializeWebSocket() {
-        this.socket = io('http://localhost:5000');
+        // The session cookie must go with the handshake so the server can put us in our user room
+        this.socket = io('http://localhost:5000', { withCredentials: true });
         
         this.socket.on('connect', () => {
             console.log('Connected to WebSocket');
+            // Subscriptions live in server-side rooms, so restore them after a reconnect
+            this.subscribedSymbols.forEach(symbol => {
+                this.subscribeToStock(symbol);
+            });
         });
 
         this.socket.on('price_update', (data) => {
@@ -59,6 +65,18 @@ class StockTradingApp {
         });
     }
 
+    reconnectWebSocket() {
+        // The server reads the login from the session at connect time, so a socket opened
+        // before login never joins the user's room; reconnect to receive order updates
+        this.socket.disconnect();
+        this.socket.connect();
+    }
+
+    subscribeToStock(symbol) {
+        this.subscribedSymbols.add(symbol);
+        this.socket.emit('subscribe_stock', { symbol: symbol });
+    }
+
     async checkAuthStatus() {
         try {
             const response = await fetch(`${this.apiBase}/auth/me`, {
@@ -131,6 +149,7 @@ class StockTradingApp {
 
             if (data.success) {
                 this.currentUser = data.user;
+                this.reconnectWebSocket();
                 this.hideAuthModal();
                 this.loadDashboard();
                 this.showToast(data.message, 'success');
@@ -152,6 +171,7 @@ class StockTradingApp {
             
             this.currentUser = null;
             this.showAuthModal();
+            this.subscribedSymbols.clear();
             this.socket.disconnect();
         } catch (error) {
             console.error('Logout error:', error);
@@ -257,7 +277,7 @@ class StockTradingApp {
 
         // Subscribe to price updates for holdings
         portfolio.portfolio.forEach(holding => {
-            this.socket.emit('subscribe_stock', { symbol: holding.symbol });
+            this.subscribeToStock(holding.symbol);
         });
     }
 
@@ -315,7 +335,7 @@ class StockTradingApp {
                 document.getElementById('searchResults').innerHTML = '';
                 
                 // Subscribe to price updates
-                this.socket.emit('subscribe_stock', { symbol: symbol });
+                this.subscribeToStock(symbol);
             }
         } catch (error) {
             console.error('Stock info error:', error);
@@ -457,7 +477,7 @@ class StockTradingApp {
 
         // Subscribe to price updates
         watchlist.forEach(stock => {
-            this.socket.emit('subscribe_stock', { symbol: stock.symbol });
+            this.subscribeToStock(stock.symbol);
         });
     }
 
@@ -609,15 +629,25 @@ class StockTradingApp {
         predictionBtn.disabled = true;
 
         try {
-            const response = await fetch(`${this.apiBase}/ai/predict/${this.selectedStock.symbol}`, {
-                credentials: 'include'
-            });
-
-            const data = await response.json();
+            const symbol = this.selectedStock.symbol;
+            let data = await this.fetchAIPrediction(symbol);
+
+            // No model yet: the server queued training; wait for the job, then ask again
+            if (data.success && data.pending) {
+                predictionBtn.textContent = `🤖 Model training (job #${data.job.job_id})...`;
+                const job = await this.waitForTrainingJob(data.job.job_id);
+                if (job.status !== 'COMPLETED') {
+                    this.showToast(job.message || `Model training ${job.status.toLowerCase()}`, 'error');
+                    return;
+                }
+                data = await this.fetchAIPrediction(symbol);
+            }
 
-            if (data.success) {
+            if (data.success && data.prediction) {
                 this.displayAIPrediction(data.prediction);
                 this.showToast('AI prediction generated', 'success');
+            } else if (data.success) {
+                this.showToast('Model is still training, try again shortly', 'warning');
             } else {
                 this.showToast(data.message, 'error');
             }
@@ -630,6 +660,29 @@ class StockTradingApp {
         }
     }
 
+    async fetchAIPrediction(symbol) {
+        const response = await fetch(`${this.apiBase}/ai/predict/${symbol}`, {
+            credentials: 'include'
+        });
+        return response.json();
+    }
+
+    async waitForTrainingJob(jobId, intervalMs = 3000) {
+        while (true) {
+            await new Promise(resolve => setTimeout(resolve, intervalMs));
+            const response = await fetch(`${this.apiBase}/ai/train/jobs/${jobId}`, {
+                credentials: 'include'
+            });
+            const data = await response.json();
+            if (!data.success) {
+                throw new Error(data.message);
+            }
+            if (!['QUEUED', 'RUNNING'].includes(data.job.status)) {
+                return data.job;
+            }
+        }
+    }
+
     displayAIPrediction(prediction) {
         document.getElementById('predictionRecommendation').textContent = prediction.recommendation;
         document.getElementById('predictionRecommendation').className = `recommendation ${prediction.recommendation}`;